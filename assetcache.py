@@ -0,0 +1,181 @@
+"""
+Caching images, scaled as they're used, on disk, and loading them in the
+background
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+import hashlib
+import os
+import struct
+import tempfile
+from typing import Any, Callable, Dict, Literal, Optional, Tuple
+
+import pygame  # type: ignore
+
+## Bump when the cache file format or the image processing changes
+CACHE_VERSION = 1
+## width, height, pixel format
+_HEADER = struct.Struct("<II4s")
+
+PixelFormat = Literal["RGB", "RGBA"]
+
+
+def defaultCacheDir() -> str:
+    """
+    $ORBITALGAME_CACHE, or orbitalGame in the user's cache directory
+    """
+    result = os.environ.get("ORBITALGAME_CACHE")
+    if result:
+        return result
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "orbitalGame")
+
+
+class AssetCache:
+    """
+    Images scaled to the size they're shown at, saved as raw pixels so that
+    loading them again needs no decoding or scaling
+
+    Entries are keyed by a hash of the source file's contents and the
+    processing done to it, so a changed file is never served stale. If the
+    cache directory can't be written, images are processed every time.
+    """
+
+    def __init__(self, cacheDir: Optional[str] = None) -> None:
+        self.cacheDir: str = cacheDir if cacheDir is not None else defaultCacheDir()
+        ## source file hashes by path, size and modification time
+        self.hashes: Dict[Tuple[str, int, int], str] = {}
+        ## images already loaded in this process, by key
+        self.images: Dict[str, pygame.surface.Surface] = {}
+
+    def key(self, filename: str, *params: Any) -> str:
+        """
+        Cache key for filename processed with params
+        """
+        stat = os.stat(filename)
+        statKey = (os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+        sourceHash = self.hashes.get(statKey)
+        if sourceHash is None:
+            with open(filename, "rb") as f:
+                sourceHash = hashlib.sha1(f.read()).hexdigest()
+            self.hashes[statKey] = sourceHash
+        params = (CACHE_VERSION,) + params
+        return hashlib.sha1((sourceHash + repr(params)).encode()).hexdigest()
+
+    def scaledImage(
+        self, filename: str, size: Tuple[int, int]
+    ) -> pygame.surface.Surface:
+        """
+        The image in filename smoothscaled to size, without alpha
+        """
+        return self._cached(
+            self.key(filename, "scaled", tuple(size)),
+            lambda: pygame.transform.smoothscale(_load(filename), size),
+            "RGB",
+        )
+
+    def scaledSprite(self, filename: str, scale: float) -> pygame.surface.Surface:
+        """
+        The image in filename, with alpha, smoothscaled by scale
+        """
+
+        def process() -> pygame.surface.Surface:
+            image = _load(filename)
+            w, h = image.get_size()
+            return pygame.transform.smoothscale(image, (int(w * scale), int(h * scale)))
+
+        return self._cached(self.key(filename, "sprite", scale), process, "RGBA")
+
+    def _cached(
+        self,
+        key: str,
+        process: Callable[[], pygame.surface.Surface],
+        pixelFormat: PixelFormat,
+    ) -> pygame.surface.Surface:
+        """
+        The image for key from memory or disk, or else from process, saving
+        it to both
+        """
+        image = self.images.get(key)
+        if image is not None:
+            return image
+        path = os.path.join(self.cacheDir, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            w, h, storedFormat = _HEADER.unpack_from(data)
+            image = pygame.image.frombytes(
+                data[_HEADER.size :], (w, h), storedFormat.decode().strip()
+            )
+        except (OSError, struct.error, ValueError):
+            image = process()
+            self._save(path, image, pixelFormat)
+        self.images[key] = image
+        return image
+
+    def _save(
+        self, path: str, image: pygame.surface.Surface, pixelFormat: PixelFormat
+    ) -> None:
+        """
+        Write image to path, atomically so other processes never see half of
+        it, or do nothing if that fails
+        """
+        w, h = image.get_size()
+        try:
+            os.makedirs(self.cacheDir, exist_ok=True)
+            fd, tmpPath = tempfile.mkstemp(dir=self.cacheDir)
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(w, h, pixelFormat.ljust(4).encode()))
+                f.write(pygame.image.tobytes(image, pixelFormat))
+            os.replace(tmpPath, path)
+        except OSError:
+            pass
+
+
+def _load(filename: str) -> pygame.surface.Surface:
+    try:
+        return pygame.image.load(filename)
+    except (pygame.error, FileNotFoundError) as e:
+        print(("Cannot load image:", filename))
+        raise SystemExit(e)
+
+
+_defaultCache: Optional[AssetCache] = None
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def defaultCache() -> AssetCache:
+    """
+    The AssetCache in the default directory, shared by the whole game
+    """
+    global _defaultCache
+    if _defaultCache is None:
+        _defaultCache = AssetCache()
+    return _defaultCache
+
+
+def loadInBackground(function: Callable[..., Any], *args: Any) -> Future:
+    """
+    Call function(*args) on a background thread, returning its Future
+
+    Converting surfaces for the display should still be done on the main
+    thread, once the Future is done.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="assets")
+    return _executor.submit(function, *args)
+
+
+@lru_cache(maxsize=None)
+def font(size: int) -> Optional[pygame.font.Font]:
+    """
+    The default font at size, made the first time it's asked for, or None
+    if pygame has no font support
+    """
+    if not pygame.font:
+        return None
+    return pygame.font.Font(None, size)
@@ -0,0 +1,91 @@
+#!/usr/bin/python
+"""
+Benchmark the memory used per massless object, as SpaceObjectModels in a
+UniverseModel and in a compactstate.CompactCatalog, and the time to step
+each of them
+
+Run as: python bench_memory.py [nObjects]
+"""
+
+from math import cos, pi, sin, sqrt
+import sys
+import time
+import tracemalloc
+
+from utils import Vec2
+from spaceobject import SpaceObjectModel
+from universe import UniverseModel
+
+mEarth = 6.0e24
+
+
+def makeUniverse() -> UniverseModel:
+    universe = UniverseModel()
+    universe.addObject(SpaceObjectModel(Vec2(0.0, 0.0), mEarth))
+    return universe
+
+
+def orbits(universe: UniverseModel, nObjects: int) -> list:
+    """
+    Positions and velocities of nObjects circular orbits, spread out
+    between 7e6 and 4.2e7 m
+    """
+    result = []
+    for i in range(nObjects):
+        r = 7e6 + 3.5e7 * i / nObjects
+        angle = 2.0 * pi * i / nObjects * 37.0
+        v = sqrt(universe.G * mEarth / r)
+        result.append((r * cos(angle), r * sin(angle), -v * sin(angle), v * cos(angle)))
+    return result
+
+
+def measure(fill, universe: UniverseModel) -> tuple:
+    """
+    Bytes allocated by fill(), and seconds to step universe once after
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    fill()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    universe.update(100.0)
+    return after - before, time.perf_counter() - start
+
+
+def main() -> None:
+    nObjects = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    objects = makeUniverse()
+    states = orbits(objects, nObjects)
+
+    def addObjects() -> None:
+        for x, y, vx, vy in states:
+            obj = SpaceObjectModel(Vec2(x, y))
+            obj.kinematics.velocity = Vec2(vx, vy)
+            objects.addObject(obj)
+
+    compact = makeUniverse()
+    catalog = compact.enableCompactCatalog()
+
+    def addCompact() -> None:
+        for state in states:
+            catalog.add(*state)
+
+    for name, fill, universe in [
+        ("SpaceObjectModel", addObjects, objects),
+        ("CompactCatalog", addCompact, compact),
+    ]:
+        nBytes, stepTime = measure(fill, universe)
+        print(
+            "{0}: {1:.1f} bytes per object, {2:.0f} MB per million, "
+            "step {3:.2f} us per object".format(
+                name,
+                nBytes / nObjects,
+                nBytes / nObjects,
+                stepTime / nObjects * 1e6,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/python
+"""
+Benchmark the time from launch to the first frame, with an empty (cold)
+and a filled (warm) asset cache
+
+Run as: python bench_startup.py [nLaunches]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+FIRST_FRAME = """
+import time
+start = time.perf_counter()
+import pygame
+pygameImported = time.perf_counter()
+from engine import makeUniverse
+pygame.init()
+universe = makeUniverse()
+universe.updateViewToModel()
+universe.mainwindow.update()
+universe.view.update()
+firstFrame = time.perf_counter() - start
+while universe.mainwindow.backgroundFuture is not None:
+    time.sleep(0.001)
+    universe.mainwindow.update()
+print(pygameImported - start, firstFrame, time.perf_counter() - start)
+"""
+
+
+def launch(cacheDir: str) -> tuple:
+    """
+    Launch the game in a new process, returning the seconds it took to
+    import pygame, to draw its first frame, and to show its background
+    """
+    env = dict(os.environ, ORBITALGAME_CACHE=cacheDir, SDL_VIDEODRIVER="dummy")
+    env["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+    output = subprocess.run(
+        [sys.executable, "-c", FIRST_FRAME],
+        env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return tuple(float(t) for t in output.split())
+
+
+def main() -> None:
+    nLaunches = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as cacheDir:
+        for name in ["cold", "warm"]:
+            results = []
+            for i in range(nLaunches):
+                if name == "cold":
+                    for entry in os.listdir(cacheDir):
+                        os.remove(os.path.join(cacheDir, entry))
+                results.append(launch(cacheDir))
+            pygameImport, firstFrame, background = [
+                min(r[i] for r in results) * 1e3 for i in range(3)
+            ]
+            print(
+                "{0}: first frame {1:.1f} ms, background shown {2:.1f} ms, "
+                "of which importing pygame {3:.1f} ms".format(
+                    name, firstFrame, background, pygameImport
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
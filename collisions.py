@@ -0,0 +1,202 @@
+"""
+Collision and close-approach (conjunction) detection between SpaceObjectModels
+"""
+
+from dataclasses import dataclass
+from math import floor, sqrt
+from typing import Dict, Iterator, List, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from spaceobject import SpaceObjectModel
+
+
+@dataclass
+class Conjunction:
+    """
+    A close approach between two objects
+    """
+
+    objA: "SpaceObjectModel"
+    objB: "SpaceObjectModel"
+    time: float  # model time of closest approach
+    distance: float  # distance between centers at closest approach, in meters
+
+
+class ConjunctionDetector:
+    """
+    Finds pairs of objects that come within threshold of each other's
+    surfaces during a model step
+
+    Motion is taken to be linear within a step. Candidate pairs are found by
+    binning the bounding boxes of each object's swept path into a
+    hierarchical grid, on both axes, so only objects that are near each
+    other get the closest-approach check. Each level's cells are
+    maxCellsAcross times the size of the level below's, and a box goes in
+    the finest level where it's less than maxCellsAcross cells across, so
+    boxes that sweep far don't have to be checked against every other box.
+    """
+
+    ## Boxes this many cells across go up a level, to cells this many times
+    ## bigger
+    maxCellsAcross: int = 4
+
+    def __init__(self, threshold: float = 0.0) -> None:
+        """
+        threshold: distance in meters between the objects' surfaces (set by
+            their radius attribute) at which a conjunction is reported
+        """
+        self.threshold: float = threshold
+        ## box overlap tests done by the last candidatePairs
+        self.nBoxTests: int = 0
+
+    def candidatePairs(
+        self,
+        startPositions: Sequence[Tuple[float, float]],
+        endPositions: Sequence[Tuple[float, float]],
+        padding: Sequence[float],
+    ) -> List[Tuple[int, int]]:
+        """
+        Broad phase: the index pairs whose swept bounding boxes, inflated by
+        padding, overlap
+        """
+        boxes: List[Tuple[float, float, float, float]] = []
+        for i in range(len(startPositions)):
+            x0, y0 = startPositions[i]
+            x1, y1 = endPositions[i]
+            pad = padding[i]
+            boxes.append(
+                (
+                    min(x0, x1) - pad,
+                    max(x0, x1) + pad,
+                    min(y0, y1) - pad,
+                    max(y0, y1) + pad,
+                )
+            )
+        if len(boxes) < 2:
+            return []
+        ## Cells at the finest level the size of a typical box, so most
+        ## boxes are in a few cells
+        extents = sorted(max(box[1] - box[0], box[3] - box[2]) for box in boxes)
+        cellSize = extents[len(extents) // 2] or extents[-1] or 1.0
+        maxCells = self.maxCellsAcross
+        ## cells by level, and each box's level
+        levels: Dict[int, Dict[Tuple[int, int], List[int]]] = {}
+        boxLevels: List[int] = []
+        result: List[Tuple[int, int]] = []
+        nBoxTests = 0
+        for i, box in enumerate(boxes):
+            level = 0
+            size = cellSize
+            while (
+                floor(box[1] / size) - floor(box[0] / size) >= maxCells
+                or floor(box[3] / size) - floor(box[2] / size) >= maxCells
+            ):
+                level += 1
+                size *= maxCells
+            boxLevels.append(level)
+            cells = levels.setdefault(level, {})
+            ## Pairs within a level as the boxes go in
+            for (cx, cy), cell in self._cellsOf(box, size, cells, True):
+                nBoxTests += len(cell)
+                for j in self._overlapping(box, cell, boxes, cx, cy, size):
+                    result.append((j, i))
+                cell.append(i)
+        ## Pairs across levels, from each box to the coarser levels
+        for i, box in enumerate(boxes):
+            for level, cells in levels.items():
+                if level <= boxLevels[i]:
+                    continue
+                size = cellSize * maxCells**level
+                for (cx, cy), cell in self._cellsOf(box, size, cells, False):
+                    nBoxTests += len(cell)
+                    for j in self._overlapping(box, cell, boxes, cx, cy, size):
+                        result.append((j, i))
+        self.nBoxTests = nBoxTests
+        return result
+
+    def _cellsOf(
+        self,
+        box: Tuple[float, float, float, float],
+        size: float,
+        cells: Dict[Tuple[int, int], List[int]],
+        add: bool,
+    ) -> Iterator[Tuple[Tuple[int, int], List[int]]]:
+        """
+        The cells of size size that box covers, making them if add is True,
+        otherwise only those that have boxes in them
+        """
+        for cx in range(floor(box[0] / size), floor(box[1] / size) + 1):
+            for cy in range(floor(box[2] / size), floor(box[3] / size) + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    if not add:
+                        continue
+                    cell = cells[(cx, cy)] = []
+                yield (cx, cy), cell
+
+    def _overlapping(
+        self,
+        box: Tuple[float, float, float, float],
+        cell: List[int],
+        boxes: Sequence[Tuple[float, float, float, float]],
+        cx: int,
+        cy: int,
+        size: float,
+    ) -> Iterator[int]:
+        """
+        The boxes in cell (cx, cy) that overlap box, only where the
+        overlap's corner is in this cell, so each pair is found once
+        """
+        xMin, xMax, yMin, yMax = box
+        for j in cell:
+            other = boxes[j]
+            if (
+                other[0] <= xMax
+                and xMin <= other[1]
+                and other[2] <= yMax
+                and yMin <= other[3]
+                and floor(max(xMin, other[0]) / size) == cx
+                and floor(max(yMin, other[2]) / size) == cy
+            ):
+                yield j
+
+    def detect(
+        self,
+        objects: Sequence["SpaceObjectModel"],
+        startPositions: Sequence[Tuple[float, float]],
+        startTime: float,
+        dt: float,
+    ) -> List[Conjunction]:
+        """
+        Find the conjunctions during a step of length dt from startTime
+
+        startPositions are the positions of objects at startTime; their
+        current positions are taken as the positions at the end of the step.
+        Each encounter is reported once, in the step containing its closest
+        approach.
+        """
+        endPositions = [obj.kinematics.position.tuple() for obj in objects]
+        padding = [obj.radius + 0.5 * self.threshold for obj in objects]
+        result: List[Conjunction] = []
+        for i, j in self.candidatePairs(startPositions, endPositions, padding):
+            ## relative position at the start and relative displacement
+            px = startPositions[i][0] - startPositions[j][0]
+            py = startPositions[i][1] - startPositions[j][1]
+            dx = endPositions[i][0] - endPositions[j][0] - px
+            dy = endPositions[i][1] - endPositions[j][1] - py
+            dd = dx * dx + dy * dy
+            ## Closing at the start and not closing at the end of the step
+            if dd == 0.0 or px * dx + py * dy >= 0.0:
+                continue
+            if (px + dx) * dx + (py + dy) * dy < 0.0:
+                continue
+            frac = -(px * dx + py * dy) / dd
+            cx = px + frac * dx
+            cy = py + frac * dy
+            distance = sqrt(cx * cx + cy * cy)
+            maxDistance = objects[i].radius + objects[j].radius + self.threshold
+            if distance <= maxDistance:
+                result.append(
+                    Conjunction(objects[i], objects[j], startTime + frac * dt, distance)
+                )
+        return result
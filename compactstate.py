@@ -0,0 +1,254 @@
+"""
+Compact storage for huge catalogs of coasting massless objects
+
+Each object's position and velocity are stored as float32, relative to a
+frame whose origin is float64. A frame can follow a massive body, its
+primary, so objects are stored relative to what they orbit, or stay where
+it's put, as a floating origin moved with moveFrame. An object takes 18
+bytes, instead of the hundreds of bytes of a SpaceObjectModel, and all of
+the states are in one contiguous array.
+
+Error bounds: float32 has a 24 bit significand, so each time a state is
+stored, each relative coordinate is rounded by at most 2^-24 (6.0e-8) of
+its size. Around Earth, out to 4.2e7 m and 1.1e4 m/s relative to it, that's
+at most er = 2.5 m and ev = 6.6e-4 m/s per step. These don't just add up:
+a rounded position or velocity is a slightly different orbit, with a
+slightly different period, so each rounding also starts a drift along the
+orbit. To first order, for a near circular orbit of radius r and speed v,
+that's 3 (ev + v/r er) per second. Summed over n steps of dt, the error
+is at most about
+
+    n er + 3/2 n^2 dt (ev + v/r er)
+
+and as roundings are as likely to be up as down, typically about
+n^1.5 dt (ev + v/r er). At 3.5e7 m, with 100 s steps, that's about
+1.4e4 m after 5000 steps and 1.1e5 m after 20000, so the catalog suits
+screening and display, not precise long term prediction. The origins and
+the massive bodies stay float64, so there is no error from the size of
+the universe, only from the distance to the frame origin.
+"""
+
+from array import array
+from math import sqrt
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+from utils import Vec2
+
+if TYPE_CHECKING:
+    from universe import UniverseModel
+    from spaceobject import SpaceObjectModel
+
+## Per object: x, y, vx, vy relative to its frame's origin
+FIELDS = 4
+## Per frame: origin x, y, vx, vy
+FRAME_FIELDS = 4
+## Frame primary handle for frames that don't follow a body
+NO_PRIMARY = -1
+
+State = Tuple[float, float, float, float]
+
+
+class CompactCatalog:
+    """
+    Coasting massless objects, stored as float32 relative to float64 frames,
+    and stepped like UniverseModel steps its massless objects
+
+    Objects are referred to by their index, which changes when the object
+    that was last is moved into the place of a removed one. They only feel
+    gravity; to thrust one, take it out with toObject and add that to the
+    universe instead.
+    """
+
+    def __init__(self) -> None:
+        self.states: array = array("f")
+        ## index of each object's frame
+        self.frameIndices: array = array("H")
+        self.origins: array = array("d")
+        ## handle of the massive object each frame follows, or NO_PRIMARY
+        self.primaries: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.frameIndices)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes used by the objects' and frames' state
+        """
+        return sum(
+            a.itemsize * len(a) for a in (self.states, self.frameIndices, self.origins)
+        )
+
+    def addFrame(
+        self,
+        primary: Optional["SpaceObjectModel"] = None,
+        origin: State = (0.0, 0.0, 0.0, 0.0),
+    ) -> int:
+        """
+        Add a frame, returning its index
+
+        primary: massive object, added to the universe, that the frame
+            follows, starting at its position and velocity
+        origin: position and velocity of the frame, if it has no primary
+        """
+        if len(self.primaries) > 0xFFFF:
+            raise ValueError("too many frames")
+        if primary is not None:
+            k = primary.kinematics
+            origin = (k.position.x, k.position.y, k.velocity.x, k.velocity.y)
+            self.primaries.append(primary.handle)
+        else:
+            self.primaries.append(NO_PRIMARY)
+        self.origins.extend(origin)
+        return len(self.primaries) - 1
+
+    def moveFrame(self, frame: int, origin: State) -> None:
+        """
+        Move the origin of frame, which has no primary, to origin, e.g. to
+        keep it near its objects, leaving the objects where they are
+        """
+        inFrame = [i for i in range(len(self)) if self.frameIndices[i] == frame]
+        states = [self.state(i) for i in inFrame]
+        f = frame * FRAME_FIELDS
+        self.origins[f : f + FRAME_FIELDS] = array("d", origin)
+        for i, state in zip(inFrame, states):
+            self.setState(i, *state)
+
+    def add(self, x: float, y: float, vx: float, vy: float, frame: int = 0) -> int:
+        """
+        Add an object with position x, y and velocity vx, vy, in universe
+        coordinates, stored relative to frame. Returns its index.
+        """
+        if frame >= len(self.primaries):
+            raise IndexError(f"no frame {frame}")
+        self.frameIndices.append(frame)
+        self.states.extend((0.0, 0.0, 0.0, 0.0))
+        i = len(self) - 1
+        self.setState(i, x, y, vx, vy)
+        return i
+
+    def addObject(self, obj: "SpaceObjectModel", frame: int = 0) -> int:
+        """
+        Add an object with obj's position and velocity, returning its index
+        """
+        k = obj.kinematics
+        return self.add(k.position.x, k.position.y, k.velocity.x, k.velocity.y, frame)
+
+    def remove(self, i: int) -> Optional[int]:
+        """
+        Remove object i, moving the last object into its place. Returns the
+        old index of the object that moved, if any.
+        """
+        last = len(self) - 1
+        moved = None
+        if i != last:
+            self.frameIndices[i] = self.frameIndices[last]
+            self.states[i * FIELDS : (i + 1) * FIELDS] = self.states[
+                last * FIELDS : (last + 1) * FIELDS
+            ]
+            moved = last
+        self.frameIndices.pop()
+        del self.states[last * FIELDS :]
+        return moved
+
+    def state(self, i: int) -> State:
+        """
+        Position and velocity of object i in universe coordinates
+        """
+        j = i * FIELDS
+        f = self.frameIndices[i] * FRAME_FIELDS
+        states = self.states
+        origins = self.origins
+        return (
+            origins[f] + states[j],
+            origins[f + 1] + states[j + 1],
+            origins[f + 2] + states[j + 2],
+            origins[f + 3] + states[j + 3],
+        )
+
+    def setState(self, i: int, x: float, y: float, vx: float, vy: float) -> None:
+        """
+        Set object i's position and velocity, in universe coordinates
+        """
+        j = i * FIELDS
+        f = self.frameIndices[i] * FRAME_FIELDS
+        origins = self.origins
+        self.states[j : j + FIELDS] = array(
+            "f",
+            (
+                x - origins[f],
+                y - origins[f + 1],
+                vx - origins[f + 2],
+                vy - origins[f + 3],
+            ),
+        )
+
+    def toObject(self, i: int) -> "SpaceObjectModel":
+        """
+        A new massless SpaceObjectModel with object i's position and velocity
+        """
+        from spaceobject import SpaceObjectModel
+
+        x, y, vx, vy = self.state(i)
+        obj = SpaceObjectModel(Vec2(x, y))
+        obj.kinematics.setPosVel(Vec2(x, y), Vec2(vx, vy))
+        return obj
+
+    def step(
+        self,
+        dt: float,
+        bodies: List[Tuple[float, float, float]],
+        universe: "UniverseModel",
+    ) -> None:
+        """
+        Step all of the objects by dt, in the gravity of bodies, (x, y,
+        G*mass) at the start of the step, and move the frames to follow
+        their primaries in universe, which has already been stepped
+
+        Does the same arithmetic as UniverseModel.getA and
+        ObjectKinematics.updatePosVel, in float64, before storing.
+        """
+        oldOrigins = array("d", self.origins)
+        for frame, handle in enumerate(self.primaries):
+            if handle == NO_PRIMARY:
+                continue
+            primary = universe.getObject(handle)
+            if primary is None:
+                ## The primary is gone, so the frame stays where it was
+                self.primaries[frame] = NO_PRIMARY
+                continue
+            k = primary.kinematics
+            f = frame * FRAME_FIELDS
+            self.origins[f : f + FRAME_FIELDS] = array(
+                "d", (k.position.x, k.position.y, k.velocity.x, k.velocity.y)
+            )
+        rPower = universe.rPower
+        states = self.states
+        frameIndices = self.frameIndices
+        origins = self.origins
+        for i in range(len(frameIndices)):
+            j = i * FIELDS
+            f = frameIndices[i] * FRAME_FIELDS
+            x = oldOrigins[f] + states[j]
+            y = oldOrigins[f + 1] + states[j + 1]
+            vx = oldOrigins[f + 2] + states[j + 2]
+            vy = oldOrigins[f + 3] + states[j + 3]
+            ax = 0.0
+            ay = 0.0
+            for bx, by, gm in bodies:
+                rx = bx - x
+                ry = by - y
+                r = sqrt(rx**2 + ry**2)
+                if r < 0.001:
+                    continue
+                accmag = gm * r**rPower
+                ax += rx / r * accmag
+                ay += ry / r * accmag
+            vx += ax * dt
+            vy += ay * dt
+            x += vx * dt
+            y += vy * dt
+            states[j] = x - origins[f]
+            states[j + 1] = y - origins[f + 1]
+            states[j + 2] = vx - origins[f + 2]
+            states[j + 3] = vy - origins[f + 3]
@@ -0,0 +1,328 @@
+"""
+A local API for external tools to query and control a UniverseModel
+
+Clients connect over TCP on localhost or a Unix socket and send one JSON
+object per line, {"id": ..., "method": ..., "params": {...}}, and get one
+back per request, {"id": ..., "result": ...} or {"id": ..., "error": ...}.
+Subscriptions also get {"event": "state", "subscription": ..., ...} lines,
+and one {"event": "error", "subscription": ..., "error": ...} line if one of
+their objects is removed, after which they're dropped.
+
+Methods, with objects referred to by their handles:
+    getStates {handles?}: states of the objects, or all of them
+    scheduleBurns {burns: [{handle, start, end, thrust}, ...]}: burns
+        starting and ending in model seconds from now, all or none of them
+    predict {times, handles?, selected?}: positions and burns of the
+        massless objects at each of times, as UniverseModel.getFuture
+    subscribe {every, handles?}: states every `every` model seconds
+    unsubscribe {subscription}
+"""
+
+import asyncio
+from concurrent.futures import Future
+import itertools
+import json
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from universe import UniverseModel
+    from spaceobject import SpaceObjectModel
+
+BurnFunction = Callable[["SpaceObjectModel", float, float, float], None]
+
+
+def objectState(obj: "SpaceObjectModel") -> Dict[str, Any]:
+    k = obj.kinematics
+    return {
+        "handle": obj.handle,
+        "mass": obj.mass,
+        "position": [k.position.x, k.position.y],
+        "velocity": [k.velocity.x, k.velocity.y],
+        "thrust": obj.thrust,
+        "burns": [list(burn) for burn in obj.burnSchedule],
+    }
+
+
+class _Subscription:
+    def __init__(
+        self,
+        writer: asyncio.StreamWriter,
+        every: float,
+        handles: Optional[List[int]],
+        nextTime: float,
+    ) -> None:
+        self.writer: asyncio.StreamWriter = writer
+        self.every: float = every
+        self.handles: Optional[List[int]] = handles
+        self.nextTime: float = nextTime
+
+
+class ControlServer:
+    """
+    Serves the API from an asyncio event loop on a background thread
+
+    Anything that reads or changes the model is queued and run by process,
+    which the simulation loop calls between steps, so the model is only
+    ever touched from the simulation thread and a request never waits on
+    more than one frame. Predictions only copy the model there, and are
+    stepped on a worker thread.
+    """
+
+    def __init__(
+        self,
+        model: "UniverseModel",
+        port: Optional[int] = 0,
+        path: Optional[str] = None,
+        scheduleBurn: Optional[BurnFunction] = None,
+        wake: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """
+        port: TCP port on localhost, or 0 for any free one; see address
+        path: Unix socket path to serve on instead
+        scheduleBurn: called to schedule a burn, by default
+            SpaceObjectModel.scheduleBurn
+        wake: called from the API thread when a command is queued, e.g. to
+            wake a simulation loop that's waiting for input
+        """
+        self.model: "UniverseModel" = model
+        self.scheduleBurn: Optional[BurnFunction] = scheduleBurn
+        self.wake: Optional[Callable[[], Any]] = wake
+        self.commands: "queue.Queue[Tuple[Callable[[], Any], Future]]" = queue.Queue()
+        self.subscriptions: Dict[int, _Subscription] = {}
+        self.subscriptionIds = itertools.count(1)
+        self.address: Any = None
+        self.loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        self.server: Optional[asyncio.AbstractServer] = None
+        started: Future = Future()
+        self.thread: threading.Thread = threading.Thread(
+            target=self._run, args=(port, path, started), daemon=True
+        )
+        self.thread.start()
+        started.result()
+
+    def _run(self, port: Optional[int], path: Optional[str], started: Future) -> None:
+        asyncio.set_event_loop(self.loop)
+        try:
+            if path is not None:
+                self.server = self.loop.run_until_complete(
+                    asyncio.start_unix_server(self._handleClient, path)
+                )
+                self.address = path
+            else:
+                self.server = self.loop.run_until_complete(
+                    asyncio.start_server(self._handleClient, "127.0.0.1", port)
+                )
+                self.address = self.server.sockets[0].getsockname()[:2]
+        except Exception as e:
+            started.set_exception(e)
+            return
+        started.set_result(None)
+        self.loop.run_forever()
+        self.loop.close()
+
+    def close(self) -> None:
+        """
+        Stop serving, and fail any commands still queued
+        """
+
+        async def shutdown() -> None:
+            if self.server is not None:
+                self.server.close()
+            ## Client connections and requests still waiting on the model
+            tasks = [
+                task
+                for task in asyncio.all_tasks()
+                if task is not asyncio.current_task()
+            ]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.server is not None:
+                await self.server.wait_closed()
+            self.loop.stop()
+
+        if self.thread.is_alive():
+            asyncio.run_coroutine_threadsafe(shutdown(), self.loop)
+            self.thread.join()
+        while not self.commands.empty():
+            function, future = self.commands.get_nowait()
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("control server closed"))
+
+    def process(self) -> int:
+        """
+        Run the queued commands and send subscriptions that are due, from
+        the simulation thread between steps. Returns how many commands ran.
+        """
+        nCommands = 0
+        while True:
+            try:
+                function, future = self.commands.get_nowait()
+            except queue.Empty:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function())
+            except Exception as e:
+                future.set_exception(e)
+            nCommands += 1
+        time = self.model.time
+        for subscriptionId, subscription in list(self.subscriptions.items()):
+            if time < subscription.nextTime:
+                continue
+            subscription.nextTime = time + subscription.every
+            try:
+                message = {
+                    "event": "state",
+                    "subscription": subscriptionId,
+                    "time": time,
+                    "states": self._getStates(subscription.handles),
+                }
+            except KeyError as e:
+                self.subscriptions.pop(subscriptionId, None)
+                message = {
+                    "event": "error",
+                    "subscription": subscriptionId,
+                    "error": f"{type(e).__name__}: {e}",
+                }
+            self.loop.call_soon_threadsafe(self._write, subscription.writer, message)
+        return nCommands
+
+    def _onSimThread(self, function: Callable[[], Any]) -> "asyncio.Future[Any]":
+        """
+        Queue function for process, returning a future of its result
+        """
+        future: Future = Future()
+        self.commands.put((function, future))
+        if self.wake is not None:
+            self.wake()
+        return asyncio.wrap_future(future)
+
+    def _write(self, writer: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+        if not writer.is_closing():
+            writer.write(json.dumps(message).encode() + b"\n")
+
+    async def _handleClient(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                ## Requests are handled concurrently, and answered by id
+                asyncio.ensure_future(self._handleRequest(line, writer))
+        finally:
+            for subscriptionId, subscription in list(self.subscriptions.items()):
+                if subscription.writer is writer:
+                    del self.subscriptions[subscriptionId]
+            writer.close()
+
+    async def _handleRequest(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        requestId = None
+        try:
+            request = json.loads(line)
+            requestId = request.get("id")
+            method = getattr(self, "api_" + request["method"], None)
+            if method is None:
+                raise ValueError(f"unknown method {request['method']}")
+            result = await method(writer, **request.get("params", {}))
+            response = {"id": requestId, "result": result}
+        except Exception as e:
+            response = {"id": requestId, "error": f"{type(e).__name__}: {e}"}
+        self._write(writer, response)
+        await writer.drain()
+
+    def _object(self, handle: int) -> "SpaceObjectModel":
+        obj = self.model.getObject(handle)
+        if obj is None:
+            raise KeyError(f"no object with handle {handle}")
+        return obj
+
+    def _getStates(self, handles: Optional[List[int]]) -> List[Dict[str, Any]]:
+        if handles is None:
+            objs = self.model.massiveObjects + self.model.masslessObjects
+        else:
+            objs = [self._object(handle) for handle in handles]
+        return [objectState(obj) for obj in objs]
+
+    async def api_getStates(
+        self, writer: asyncio.StreamWriter, handles: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        def getStates() -> Dict[str, Any]:
+            return {"time": self.model.time, "states": self._getStates(handles)}
+
+        return await self._onSimThread(getStates)
+
+    async def api_scheduleBurns(
+        self, writer: asyncio.StreamWriter, burns: List[Dict[str, Any]]
+    ) -> int:
+        def scheduleBurns() -> int:
+            ## Check them all first, so a bad one schedules none
+            entries = [
+                (self._object(b["handle"]), b["start"], b["end"], b["thrust"])
+                for b in burns
+            ]
+            for obj, start, end, thrust in entries:
+                if self.scheduleBurn is not None:
+                    self.scheduleBurn(obj, start, end, thrust)
+                else:
+                    obj.scheduleBurn(start, end, thrust)
+            return len(entries)
+
+        return await self._onSimThread(scheduleBurns)
+
+    async def api_predict(
+        self,
+        writer: asyncio.StreamWriter,
+        times: List[float],
+        handles: Optional[List[int]] = None,
+        selected: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        def copy() -> Tuple["UniverseModel", Optional["SpaceObjectModel"]]:
+            objects = None
+            if handles is not None:
+                objects = [self._object(handle) for handle in handles]
+            selectedObj = None if selected is None else self._object(selected)
+            futureUniverse, mlos = self.model.copyUniverse(objects=objects)
+            if selectedObj is not None:
+                selectedObj = futureUniverse.getObject(selectedObj.handle)
+            return futureUniverse, selectedObj
+
+        futureUniverse, selectedObj = await self._onSimThread(copy)
+
+        def predict() -> Dict[str, Any]:
+            paths, burns = futureUniverse.getFuture(times, selectedObj)
+            order = [obj.handle for obj in futureUniverse.masslessObjects]
+            if selectedObj is not None:
+                order.remove(selectedObj.handle)
+                order.insert(0, selectedObj.handle)
+            return {
+                "handles": order,
+                "paths": [[p.tuple() for p in path] for path in paths],
+                "burns": burns,
+            }
+
+        return await self.loop.run_in_executor(None, predict)
+
+    async def api_subscribe(
+        self,
+        writer: asyncio.StreamWriter,
+        every: float,
+        handles: Optional[List[int]] = None,
+    ) -> int:
+        if handles is not None:
+            await self._onSimThread(lambda: [self._object(h) for h in handles])
+        subscriptionId = next(self.subscriptionIds)
+        self.subscriptions[subscriptionId] = _Subscription(
+            writer, every, handles, self.model.time
+        )
+        return subscriptionId
+
+    async def api_unsubscribe(
+        self, writer: asyncio.StreamWriter, subscription: int
+    ) -> bool:
+        return self.subscriptions.pop(subscription, None) is not None
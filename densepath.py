@@ -0,0 +1,126 @@
+"""
+Dense output of a prediction: object states at every model step, for
+interpolating positions at any time
+"""
+
+from array import array
+from bisect import bisect_right
+from typing import List, Sequence, Tuple
+
+from utils import Vec2
+
+## x, y, vx, vy per object per step
+FIELDS_PER_STEP = 4
+GOLDEN = 0.6180339887498949
+
+
+class DensePath:
+    """
+    Positions and velocities of some objects after every model step of a
+    prediction, plus their burns, so positions can be found at any time in
+    it without stepping again
+
+    Within each step, semi-implicit Euler moves an object with constant
+    acceleration, from the difference of its velocities at either end, and
+    lands exactly where the step puts it. Positions between steps follow
+    that same quadratic, so they're as good as the steps themselves,
+    including where burns start and stop.
+    """
+
+    def __init__(self, nObjects: int) -> None:
+        self.nObjects: int = nObjects
+        ## model seconds since the start of the prediction of each step
+        self.times: array = array("d")
+        self.states: List[array] = [array("d") for i in range(nObjects)]
+        ## Burn thrust in effect for each object after each step
+        self.burns: List[array] = [array("d") for i in range(nObjects)]
+
+    @property
+    def duration(self) -> float:
+        return self.times[-1] if self.times else 0.0
+
+    def record(self, time: float, objects: Sequence, dtStep: float) -> None:
+        """
+        Record the states of objects (SpaceObjectModels) at time, right after
+        a model step of dtStep
+        """
+        self.times.append(time)
+        for obj, states, burns in zip(objects, self.states, self.burns):
+            k = obj.kinematics
+            states.extend([k.position.x, k.position.y, k.velocity.x, k.velocity.y])
+            burn = 0.0
+            for burnTime in obj.burnSchedule:
+                if burnTime[0] <= 0.0:
+                    burn += burnTime[2]
+            burns.append(burn)
+
+    def _segment(self, time: float) -> Tuple[int, float]:
+        """
+        The step that time is in, and how long after the step's start it is
+        """
+        if not self.times or not self.times[0] <= time <= self.times[-1]:
+            raise ValueError(f"time {time} outside of path 0 to {self.duration}")
+        iStep = max(min(bisect_right(self.times, time) - 1, len(self.times) - 2), 0)
+        return iStep, time - self.times[iStep]
+
+    def positionAt(self, iObject: int, time: float) -> Vec2:
+        """
+        Position of object iObject at time
+        """
+        iStep, tau = self._segment(time)
+        states = self.states[iObject]
+        i0 = iStep * FIELDS_PER_STEP
+        if time == self.times[-1]:
+            i0 = (len(self.times) - 1) * FIELDS_PER_STEP
+            return Vec2(states[i0], states[i0 + 1])
+        x0, y0, vx0, vy0, x1, y1, vx1, vy1 = states[i0 : i0 + 8]
+        h = self.times[iStep + 1] - self.times[iStep]
+        ax = (vx1 - vx0) / h
+        ay = (vy1 - vy0) / h
+        x = x0 + (vx1 - 0.5 * ax * h) * tau + 0.5 * ax * tau * tau
+        y = y0 + (vy1 - 0.5 * ay * h) * tau + 0.5 * ay * tau * tau
+        return Vec2(x, y)
+
+    def positionsAt(self, iObject: int, times: Sequence[float]) -> List[Vec2]:
+        """
+        Positions of object iObject at each of times
+        """
+        return [self.positionAt(iObject, t) for t in times]
+
+    def burnAt(self, iObject: int, time: float) -> float:
+        """
+        Burn thrust object iObject has at time
+        """
+        self._segment(time)
+        iStep = bisect_right(self.times, time) - 1
+        return self.burns[iObject][iStep]
+
+    def closestTime(
+        self,
+        iObject: int,
+        position: Vec2,
+        tStart: float,
+        tEnd: float,
+        tolerance: float = 1e-3,
+    ) -> float:
+        """
+        Time between tStart and tEnd when object iObject is closest to
+        position, found by golden-section search to within tolerance model
+        seconds
+        """
+        a = max(tStart, 0.0)
+        b = min(tEnd, self.duration)
+        c = b - GOLDEN * (b - a)
+        d = a + GOLDEN * (b - a)
+        dc = position.distance(self.positionAt(iObject, c))
+        dd = position.distance(self.positionAt(iObject, d))
+        while b - a > tolerance:
+            if dc < dd:
+                b, d, dd = d, c, dc
+                c = b - GOLDEN * (b - a)
+                dc = position.distance(self.positionAt(iObject, c))
+            else:
+                a, c, dc = c, d, dd
+                d = a + GOLDEN * (b - a)
+                dd = position.distance(self.positionAt(iObject, d))
+        return 0.5 * (a + b)
@@ -1,40 +1,113 @@
 #!/usr/bin/python
 
 from math import sqrt
+import argparse
+import os
 import pygame  # type: ignore
 from spaceobject import SpaceObjectCtrl
 from universe import UniverseCtrl
+from collisions import ConjunctionDetector
+from netsim import SimServer, serve
+
+
+def makeUniverse() -> UniverseCtrl:
+    """
+    Set up the game window and the objects in it
+    """
+    windowsize = (800, 600)
+    backgroundImageLoc = (
+        "backgroundExt/night-sky-milky-way-galaxy-astrophotography_0p25.jpg"
+    )
+    universe = UniverseCtrl(windowsize, backgroundImageLoc)
+
+    mEarth = 6.0e24  # kg
+    rVehicle = 3.5e7  # meters
+    G = 6.67e-11  # in mks
+    vVehicle = sqrt(G * mEarth / rVehicle)  # For circular orbit
+    earth = SpaceObjectCtrl(universe, "sprites/planet3.png", 0.5, 0.0, 0.0, mEarth)
+    earth.model.radius = 6.4e6  # meters
+    vehicle = SpaceObjectCtrl(
+        universe, "sprites/FighterLaser_springgreen.png", 1.0, rVehicle, 0.0
+    )
+    vehicle2 = SpaceObjectCtrl(
+        universe, "sprites/SatelliteBase16_red.png", 1.0, 0.0, rVehicle
+    )
+    vehicle3 = SpaceObjectCtrl(
+        universe, "sprites/FrigateMissile_cyan.png", 1.0, 0.0, -rVehicle
+    )
+    vehicle.model.kinematics.velocity.y = vVehicle
+    vehicle2.model.kinematics.velocity.x = vVehicle
+    vehicle3.model.kinematics.velocity.x = -vVehicle
+
+    universe.model.conjunctionDetector = ConjunctionDetector()
+    universe.enableTrails()
+    return universe
 
 
 class SpaceApplication:
-    def __init__(self):
+    def __init__(self, recordFilename=None, connectPort=None, controlPort=None):
         pygame.init()
-        windowsize = (800, 600)
-        backgroundImageLoc = (
-            "backgroundExt/night-sky-milky-way-galaxy-astrophotography_0p25.jpg"
-        )
-        universe = UniverseCtrl(windowsize, backgroundImageLoc)
-
-        mEarth = 6.0e24  # kg
-        rVehicle = 3.5e7  # meters
-        G = 6.67e-11  # in mks
-        vVehicle = sqrt(G * mEarth / rVehicle)  # For circular orbit
-        earth = SpaceObjectCtrl(universe, "sprites/planet3.png", 0.5, 0.0, 0.0, mEarth)
-        vehicle = SpaceObjectCtrl(
-            universe, "sprites/FighterLaser_springgreen.png", 1.0, rVehicle, 0.0
-        )
-        vehicle2 = SpaceObjectCtrl(
-            universe, "sprites/SatelliteBase16_red.png", 1.0, 0.0, rVehicle
-        )
-        vehicle3 = SpaceObjectCtrl(
-            universe, "sprites/FrigateMissile_cyan.png", 1.0, 0.0, -rVehicle
-        )
-        vehicle.model.kinematics.velocity.y = vVehicle
-        vehicle2.model.kinematics.velocity.x = vVehicle
-        vehicle3.model.kinematics.velocity.x = -vVehicle
+        universe = makeUniverse()
 
+        if recordFilename is not None:
+            universe.startRecording(recordFilename)
+        if connectPort is not None:
+            universe.connect("127.0.0.1", connectPort)
+        if controlPort is not None:
+            universe.enableControlApi(controlPort)
+            print("control API on {0}:{1}".format(*universe.controlServer.address))
         universe.run()
 
 
+def serveApplication(port):
+    """
+    Run the game's model headless, streaming it to clients started with
+    --connect
+    """
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pygame.init()
+    universe = makeUniverse()
+    server = SimServer(universe.model, port=port)
+    print("serving on {0}:{1}".format(*server.address))
+    try:
+        ## at the starting time warp
+        serve(server, universe.timeWarp.speedUpFactor / 60.0)
+    except KeyboardInterrupt:
+        pass
+    server.close()
+
+
 if __name__ == "__main__":
-    sa = SpaceApplication()
+    parser = argparse.ArgumentParser(description="Orbital Game")
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        help="record the session for replay with recorder.py",
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="PORT",
+        type=int,
+        help="run the model headless, for clients started with --connect",
+    )
+    parser.add_argument(
+        "--connect",
+        metavar="PORT",
+        type=int,
+        help="show the model of a local server started with --serve",
+    )
+    parser.add_argument(
+        "--control",
+        metavar="PORT",
+        type=int,
+        help="serve the control API (see controlapi.py) on a local port",
+    )
+    args = parser.parse_args()
+    if args.serve is not None:
+        serveApplication(args.serve)
+    else:
+        sa = SpaceApplication(
+            recordFilename=args.record,
+            connectPort=args.connect,
+            controlPort=args.control,
+        )
@@ -0,0 +1,187 @@
+"""
+Precomputed, interpolated trajectories (ephemerides) of massive bodies
+"""
+
+import struct
+from array import array
+from typing import Any, Dict, List, Tuple, TYPE_CHECKING
+
+from utils import Vec2, hermite
+from kinematics import ObjectKinematics
+
+if TYPE_CHECKING:
+    from universe import UniverseModel
+
+MAGIC = b"OGEPHEM1"
+
+## magic, nBodies, nSamples, t0, interval, dtStep
+_HEADER = struct.Struct("<8sIIddd")
+## x, y, vx, vy per body per sample
+FIELDS_PER_SAMPLE = 4
+
+
+class Ephemeris:
+    """
+    Trajectories of the massive bodies of a universe, sampled every interval
+    model seconds from t0 and interpolated between samples with cubic
+    Hermite segments (matching positions and velocities at each sample)
+
+    The tables don't change once made, so copies of a universe (e.g. for
+    getFuture) share them.
+
+    The integrator moves positions with the velocity at the end of each
+    step, so its velocities lead its positions by half a step, dtStep/2.
+    The samples hold velocities at the sample times, so that the Hermite
+    segments are smooth, and apply shifts them back by half a step.
+    """
+
+    def __init__(
+        self,
+        t0: float,
+        interval: float,
+        masses: List[float],
+        samples: List[array],
+        dtStep: float = 0.0,
+    ) -> None:
+        """
+        masses: the masses of the bodies, in the order of massiveObjects
+        samples: per body, x, y, vx, vy of each sample one after the other
+        dtStep: the model step size the samples were integrated with
+        """
+        self.t0: float = t0
+        self.interval: float = interval
+        self.dtStep: float = dtStep
+        self.masses: List[float] = masses
+        self.samples: List[array] = samples
+        self.nSamples: int = len(samples[0]) // FIELDS_PER_SAMPLE if samples else 0
+        self.tEnd: float = t0 + (self.nSamples - 1) * interval
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Ephemeris":
+        return self
+
+    @classmethod
+    def generate(
+        cls,
+        universe: "UniverseModel",
+        duration: float,
+        interval: float = 1e3,
+        dtStep: float = 1e2,
+    ) -> "Ephemeris":
+        """
+        Integrate the massive bodies of universe, on their own, for duration
+        model seconds from universe.time, in steps of at most dtStep
+        """
+        from universe import UniverseModel
+        from spaceobject import SpaceObjectModel
+
+        bodiesUniverse = UniverseModel(universe.G, universe.rPower)
+        bodiesUniverse.time = universe.time
+        for body in universe.massiveObjects:
+            copy = SpaceObjectModel(body.kinematics.getPosition(), body.mass)
+            copy.kinematics = ObjectKinematics(
+                body.kinematics.getPosition(),
+                body.kinematics.getVelocity(),
+                body.kinematics.getAcceleration(),
+            )
+            copy.thrustVec = body.thrustVec.copy()
+            copy.burnSchedule = [list(burn) for burn in body.burnSchedule]
+            bodiesUniverse.addObject(copy)
+        bodies = bodiesUniverse.massiveObjects
+
+        samples = [array("d") for body in bodies]
+        nIntervals = int(round(duration / interval))
+        t0 = universe.time
+        halfStep = 0.5 * dtStep
+        for iSample in range(nIntervals + 1):
+            sampleTime = t0 + iSample * interval
+            while bodiesUniverse.time < sampleTime:
+                step = min(dtStep, sampleTime - bodiesUniverse.time)
+                bodiesUniverse.update(step)
+                halfStep = 0.5 * step
+            for body, bodySamples in zip(bodies, samples):
+                k = body.kinematics
+                bodySamples.extend(
+                    [
+                        k.position.x,
+                        k.position.y,
+                        k.velocity.x + halfStep * k.acceleration.x,
+                        k.velocity.y + halfStep * k.acceleration.y,
+                    ]
+                )
+        return cls(t0, interval, [body.mass for body in bodies], samples, dtStep)
+
+    def covers(self, time: float) -> bool:
+        """
+        Whether time is within the ephemeris
+        """
+        return self.nSamples > 1 and self.t0 <= time <= self.tEnd
+
+    def stateAt(
+        self, iBody: int, time: float
+    ) -> Tuple[float, float, float, float, float, float]:
+        """
+        Position, velocity, and acceleration (x, y, vx, vy, ax, ay) of body
+        iBody at time
+        """
+        if not self.covers(time):
+            raise ValueError(
+                f"time {time} outside of ephemeris {self.t0} to {self.tEnd}"
+            )
+        iSample = min(int((time - self.t0) // self.interval), self.nSamples - 2)
+        s = (time - self.t0) / self.interval - iSample
+        i0 = iSample * FIELDS_PER_SAMPLE
+        x0, y0, vx0, vy0, x1, y1, vx1, vy1 = self.samples[iBody][i0 : i0 + 8]
+        x, vx, ax = hermite(x0, vx0, x1, vx1, self.interval, s)
+        y, vy, ay = hermite(y0, vy0, y1, vy1, self.interval, s)
+        return x, y, vx, vy, ax, ay
+
+    def apply(self, universe: "UniverseModel", time: float) -> None:
+        """
+        Put the massive bodies of universe where they are at time
+        """
+        halfStep = 0.5 * self.dtStep
+        for iBody, body in enumerate(universe.massiveObjects):
+            x, y, vx, vy, ax, ay = self.stateAt(iBody, time)
+            body.kinematics.setPosVel(
+                Vec2(x, y), Vec2(vx - halfStep * ax, vy - halfStep * ay)
+            )
+            body.kinematics.updateAcceleration(Vec2(ax, ay))
+
+    def matches(self, universe: "UniverseModel") -> bool:
+        """
+        Whether this ephemeris is for the massive bodies of universe
+        """
+        return self.masses == [body.mass for body in universe.massiveObjects]
+
+    def save(self, filename: str) -> None:
+        with open(filename, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    MAGIC,
+                    len(self.masses),
+                    self.nSamples,
+                    self.t0,
+                    self.interval,
+                    self.dtStep,
+                )
+            )
+            array("d", self.masses).tofile(f)
+            for bodySamples in self.samples:
+                bodySamples.tofile(f)
+
+    @classmethod
+    def load(cls, filename: str) -> "Ephemeris":
+        with open(filename, "rb") as f:
+            magic, nBodies, nSamples, t0, interval, dtStep = _HEADER.unpack(
+                f.read(_HEADER.size)
+            )
+            if magic != MAGIC:
+                raise ValueError(f"{filename} isn't an ephemeris file")
+            masses = array("d")
+            masses.fromfile(f, nBodies)
+            samples = []
+            for iBody in range(nBodies):
+                bodySamples = array("d")
+                bodySamples.fromfile(f, nSamples * FIELDS_PER_SAMPLE)
+                samples.append(bodySamples)
+        return cls(t0, interval, list(masses), samples, dtStep)
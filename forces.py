@@ -0,0 +1,421 @@
+"""
+The force model: terms of acceleration, each found for all of the stepped
+objects at once
+"""
+
+from array import array
+from math import exp, sqrt
+from typing import Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from utils import Vec2
+
+if TYPE_CHECKING:
+    from universe import UniverseModel
+    from spaceobject import SpaceObjectModel
+
+
+class ForceTerm:
+    """
+    A term of the acceleration on objects
+
+    Terms see the objects' positions and velocities as flat arrays, at the
+    start of the step, and add their accelerations to axs and ays, in one
+    loop over the arrays without a Vec2 or method call per object. The game
+    doesn't depend on numpy, so those loops are still interpreted Python,
+    one iteration per object; the arrays are what numpy would need to do
+    them in one operation.
+    """
+
+    def isActive(self, objects: Sequence["SpaceObjectModel"]) -> bool:
+        """
+        Whether this term could add anything to objects' accelerations
+        """
+        return True
+
+    def accumulate(
+        self,
+        universe: "UniverseModel",
+        objects: Sequence["SpaceObjectModel"],
+        xs: array,
+        ys: array,
+        vxs: array,
+        vys: array,
+        axs: array,
+        ays: array,
+    ) -> None:
+        raise NotImplementedError
+
+
+class PointMassGravity(ForceTerm):
+    """
+    Gravity of the universe's massive objects, G*mass*r^rPower, with the same
+    arithmetic as UniverseModel.getA
+    """
+
+    def accumulate(
+        self,
+        universe: "UniverseModel",
+        objects: Sequence["SpaceObjectModel"],
+        xs: array,
+        ys: array,
+        vxs: array,
+        vys: array,
+        axs: array,
+        ays: array,
+    ) -> None:
+        self.pull(universe, range(len(objects)), xs, ys, axs, ays)
+
+    def pull(
+        self,
+        universe: "UniverseModel",
+        indices: Sequence[int],
+        xs: array,
+        ys: array,
+        axs: array,
+        ays: array,
+    ) -> None:
+        """
+        Add the gravity of the massive objects to the objects at indices
+        """
+        rPower = universe.rPower
+        for body in universe.massiveObjects:
+            bx = body.kinematics.position.x
+            by = body.kinematics.position.y
+            gm = universe.G * body.mass
+            for i in indices:
+                rx = bx - xs[i]
+                ry = by - ys[i]
+                r = sqrt(rx**2 + ry**2)
+                if r < 0.001:
+                    continue
+                accmag = gm * r**rPower
+                axs[i] += rx / r * accmag
+                ays[i] += ry / r * accmag
+
+
+class SphereOfInfluenceGravity(PointMassGravity):
+    """
+    Gravity on massless objects from only their primary and the perturbers
+    of the universe's sphereOfInfluence, as UniverseModel.getAOn. Massive
+    objects, and all objects while sphereOfInfluence isn't set, get point
+    mass gravity.
+    """
+
+    def accumulate(
+        self,
+        universe: "UniverseModel",
+        objects: Sequence["SpaceObjectModel"],
+        xs: array,
+        ys: array,
+        vxs: array,
+        vys: array,
+        axs: array,
+        ays: array,
+    ) -> None:
+        soi = universe.sphereOfInfluence
+        if soi is None:
+            self.pull(universe, range(len(objects)), xs, ys, axs, ays)
+            return
+        massive = [i for i, obj in enumerate(objects) if obj.mass > 0.0]
+        if len(massive) == len(objects):
+            massless: Sequence[int] = []
+        elif not massive:
+            massless = range(len(objects))
+        else:
+            massless = [i for i, obj in enumerate(objects) if obj.mass == 0.0]
+        soi.accumulate(objects, massless, xs, ys, axs, ays)
+        if massive:
+            self.pull(universe, massive, xs, ys, axs, ays)
+
+
+class GridGravity(PointMassGravity):
+    """
+    Gravity on massless objects looked up in the universe's gravityGrid, all
+    of them in one batch, as UniverseModel.getA. Massive objects, and all
+    objects once the grid has been dropped, get point mass gravity.
+    """
+
+    def accumulate(
+        self,
+        universe: "UniverseModel",
+        objects: Sequence["SpaceObjectModel"],
+        xs: array,
+        ys: array,
+        vxs: array,
+        vys: array,
+        axs: array,
+        ays: array,
+    ) -> None:
+        grid = universe.gravityGrid
+        if grid is None:
+            self.pull(universe, range(len(objects)), xs, ys, axs, ays)
+            return
+        massless = [i for i, obj in enumerate(objects) if obj.mass == 0.0]
+        if len(massless) == len(objects):
+            gxs, gys = grid.accelerations(xs, ys)
+        else:
+            gxs, gys = grid.accelerations(
+                [xs[i] for i in massless], [ys[i] for i in massless]
+            )
+            massive = [i for i, obj in enumerate(objects) if obj.mass > 0.0]
+            self.pull(universe, massive, xs, ys, axs, ays)
+        for i, gx, gy in zip(massless, gxs, gys):
+            axs[i] += gx
+            ays[i] += gy
+
+
+class ProgradeThrust(ForceTerm):
+    """
+    Objects' thrustVec, along their velocity as found at the end of the last
+    step, only for objects that are thrusting
+    """
+
+    def isActive(self, objects: Sequence["SpaceObjectModel"]) -> bool:
+        return any(obj.thrustVec.x != 0.0 or obj.thrustVec.y != 0.0 for obj in objects)
+
+    def accumulate(
+        self,
+        universe: "UniverseModel",
+        objects: Sequence["SpaceObjectModel"],
+        xs: array,
+        ys: array,
+        vxs: array,
+        vys: array,
+        axs: array,
+        ays: array,
+    ) -> None:
+        for i, obj in enumerate(objects):
+            thrustVec = obj.thrustVec
+            if thrustVec.x != 0.0 or thrustVec.y != 0.0:
+                axs[i] += thrustVec.x
+                ays[i] += thrustVec.y
+
+
+class J2Oblateness(ForceTerm):
+    """
+    Extra pull towards an oblate body, in its equatorial plane, on massless
+    objects: 3/2 J2 G*mass radius^2 / r^4. For inverse-square gravity.
+    """
+
+    def __init__(self, body: "SpaceObjectModel", j2: float, radius: float) -> None:
+        """
+        body: the oblate massive object
+        j2: its second zonal harmonic, e.g. 1.083e-3 for Earth
+        radius: its equatorial radius in meters
+        """
+        self.body: "SpaceObjectModel" = body
+        self.j2: float = j2
+        self.radius: float = radius
+
+    def accumulate(
+        self,
+        universe: "UniverseModel",
+        objects: Sequence["SpaceObjectModel"],
+        xs: array,
+        ys: array,
+        vxs: array,
+        vys: array,
+        axs: array,
+        ays: array,
+    ) -> None:
+        bx = self.body.kinematics.position.x
+        by = self.body.kinematics.position.y
+        scale = 1.5 * self.j2 * universe.G * self.body.mass * self.radius**2
+        for i, obj in enumerate(objects):
+            if obj.mass > 0.0:
+                continue
+            rx = bx - xs[i]
+            ry = by - ys[i]
+            r = sqrt(rx**2 + ry**2)
+            if r < self.radius:
+                continue
+            accmag = scale / r**4
+            axs[i] += rx / r * accmag
+            ays[i] += ry / r * accmag
+
+
+class AtmosphericDrag(ForceTerm):
+    """
+    Drag on massless objects from a body's exponential atmosphere,
+    density0 * exp(-altitude / scaleHeight), against their velocity
+    relative to the body: density v^2 / (2 ballisticCoefficient)
+    """
+
+    def __init__(
+        self,
+        body: "SpaceObjectModel",
+        radius: float,
+        density0: float = 1.225,
+        scaleHeight: float = 8.5e3,
+        ballisticCoefficient: float = 100.0,
+        maxAltitude: float = 1e6,
+    ) -> None:
+        """
+        body: the massive object with the atmosphere
+        radius: its radius in meters, where the altitude is 0
+        density0: atmosphere density at altitude 0 in kg/m^3
+        scaleHeight: altitude in meters over which the density falls by e
+        ballisticCoefficient: mass / (drag coefficient * area) of the objects
+            in kg/m^2
+        maxAltitude: no drag above this altitude in meters
+        """
+        self.body: "SpaceObjectModel" = body
+        self.radius: float = radius
+        self.density0: float = density0
+        self.scaleHeight: float = scaleHeight
+        self.ballisticCoefficient: float = ballisticCoefficient
+        self.maxAltitude: float = maxAltitude
+
+    def accumulate(
+        self,
+        universe: "UniverseModel",
+        objects: Sequence["SpaceObjectModel"],
+        xs: array,
+        ys: array,
+        vxs: array,
+        vys: array,
+        axs: array,
+        ays: array,
+    ) -> None:
+        k = self.body.kinematics
+        bx = k.position.x
+        by = k.position.y
+        bvx = k.velocity.x
+        bvy = k.velocity.y
+        rMax = self.radius + self.maxAltitude
+        scale = 0.5 * self.density0 / self.ballisticCoefficient
+        for i, obj in enumerate(objects):
+            if obj.mass > 0.0:
+                continue
+            r = sqrt((xs[i] - bx) ** 2 + (ys[i] - by) ** 2)
+            if r > rMax:
+                continue
+            vx = vxs[i] - bvx
+            vy = vys[i] - bvy
+            v = sqrt(vx**2 + vy**2)
+            accmag = scale * exp((self.radius - r) / self.scaleHeight) * v
+            axs[i] -= vx * accmag
+            ays[i] -= vy * accmag
+
+
+class ForceModel:
+    """
+    The terms of the acceleration on stepped objects, and stepping objects
+    with them
+
+    Only active terms are evaluated, so e.g. thrust costs nothing while no
+    object is thrusting. Adding physics is adding a ForceTerm.
+    """
+
+    def __init__(self, terms: Optional[Iterable[ForceTerm]] = None) -> None:
+        """
+        terms: the terms, by default PointMassGravity and ProgradeThrust
+        """
+        if terms is None:
+            terms = [PointMassGravity(), ProgradeThrust()]
+        self.terms: List[ForceTerm] = list(terms)
+
+    def add(self, term: ForceTerm) -> None:
+        self.terms.append(term)
+
+    def remove(self, term: ForceTerm) -> None:
+        self.terms.remove(term)
+
+    def setGravity(self, term: PointMassGravity) -> None:
+        """
+        Replace the gravity term with term, or add it first if there isn't
+        one
+        """
+        for i, other in enumerate(self.terms):
+            if isinstance(other, PointMassGravity):
+                self.terms[i] = term
+                return
+        self.terms.insert(0, term)
+
+    def isGravityAndThrust(self) -> bool:
+        """
+        Whether the terms are only point mass gravity and thrust, as
+        assumed by analytic coasting
+        """
+        return all(
+            isinstance(term, (PointMassGravity, ProgradeThrust)) for term in self.terms
+        )
+
+    def accelerations(
+        self, universe: "UniverseModel", objects: Sequence["SpaceObjectModel"]
+    ) -> Tuple[array, array]:
+        """
+        The accelerations on objects, as arrays of x and y
+        """
+        xs, ys, vxs, vys = self._state(objects)
+        return self._accumulate(universe, objects, xs, ys, vxs, vys)
+
+    def _state(
+        self, objects: Sequence["SpaceObjectModel"]
+    ) -> Tuple[array, array, array, array]:
+        """
+        The positions and velocities of objects, as arrays of x and y
+        """
+        kinematics = [obj.kinematics for obj in objects]
+        xs = array("d", [k.position.x for k in kinematics])
+        ys = array("d", [k.position.y for k in kinematics])
+        vxs = array("d", [k.velocity.x for k in kinematics])
+        vys = array("d", [k.velocity.y for k in kinematics])
+        return xs, ys, vxs, vys
+
+    def _accumulate(
+        self,
+        universe: "UniverseModel",
+        objects: Sequence["SpaceObjectModel"],
+        xs: array,
+        ys: array,
+        vxs: array,
+        vys: array,
+    ) -> Tuple[array, array]:
+        n = len(objects)
+        axs = array("d", bytes(8 * n))
+        ays = array("d", bytes(8 * n))
+        for term in self.terms:
+            if term.isActive(objects):
+                term.accumulate(universe, objects, xs, ys, vxs, vys, axs, ays)
+        return axs, ays
+
+    def step(
+        self,
+        universe: "UniverseModel",
+        objects: Sequence["SpaceObjectModel"],
+        dt: float,
+    ) -> None:
+        """
+        Step objects by dt, like SpaceObjectModel.update1 and update2, but
+        with accelerations from the terms
+
+        Massive and massless objects are found separately, as the terms
+        treat them differently. Velocities and positions are then stepped
+        in the arrays the terms saw, and written back with the accelerations in one pass per object,
+        as objects keep their own kinematics. Thrust vectors are only made
+        for objects that are thrusting or have just stopped.
+        """
+        massive = [obj for obj in objects if obj.mass > 0.0]
+        massless = [obj for obj in objects if obj.mass == 0.0]
+        steps = []
+        for group in (massive, massless):
+            if not group:
+                continue
+            xs, ys, vxs, vys = self._state(group)
+            axs, ays = self._accumulate(universe, group, xs, ys, vxs, vys)
+            steps.append((group, xs, ys, vxs, vys, axs, ays))
+        for group, xs, ys, vxs, vys, axs, ays in steps:
+            for i, obj in enumerate(group):
+                ax = axs[i]
+                ay = ays[i]
+                vx = vxs[i] + ax * dt
+                vy = vys[i] + ay * dt
+                obj.kinematics.setState(
+                    xs[i] + vx * dt, ys[i] + vy * dt, vx, vy, ax, ay
+                )
+                obj.updateBurnSchedule(dt)
+                if obj.thrust != 0.0:
+                    obj.updateThrustVec()
+                elif obj.thrustVec.x != 0.0 or obj.thrustVec.y != 0.0:
+                    obj.thrustVec = Vec2(0.0, 0.0)
@@ -3,6 +3,8 @@ import math
 from dataclasses import dataclass
 from typing import Optional, Tuple, List, Any, TYPE_CHECKING, TypedDict
 
+from assetcache import font
+
 if TYPE_CHECKING:
     from universe import UniverseView
 
@@ -50,9 +52,8 @@ class FuturePathsView(pygame.sprite.Sprite):
 
         self.font: Optional[pygame.font.Font] = None
         self.selectedFont: Optional[pygame.font.Font] = None
-        if pygame.font:
-            self.font = pygame.font.Font(None, self.pathStyle.textsize)
-            self.selectedFont = pygame.font.Font(None, self.pathSelectedStyle.textsize)
+        self.font = font(self.pathStyle.textsize)
+        self.selectedFont = font(self.pathSelectedStyle.textsize)
         self.arrowImg, self.arrowImgSelected = self._prepareArrowImg()
 
     def addPath(
@@ -61,9 +62,12 @@ class FuturePathsView(pygame.sprite.Sprite):
         pointList: List[Tuple[int, int]],
         burnList: List[float],
         timeList: Optional[List[float]] = None,
+        linePoints: Optional[List[Tuple[int, int]]] = None,
     ) -> None:
         """
         Draw a path and burns for a single spaceobject
+
+        The line is drawn through linePoints, if given, else pointList
         """
         assert len(pointList) == len(pointList)
         style = self.pathStyle
@@ -72,8 +76,12 @@ class FuturePathsView(pygame.sprite.Sprite):
         color = style.color
         width = style.width
 
+        if linePoints is None:
+            linePoints = pointList
+
         ## draw the orbits right here
-        pygame.draw.lines(self.image, color, False, pointList, width)
+        if len(linePoints) > 1:
+            pygame.draw.lines(self.image, color, False, linePoints, width)
 
         self._drawBurnPaths(selected, pointList, burnList)
         self._drawTimes(selected, pointList, timeList)
@@ -0,0 +1,258 @@
+"""
+Precomputed gravitational acceleration grid for static massive bodies
+"""
+
+from array import array
+from math import frexp, sqrt
+from typing import Any, Dict, List, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from universe import UniverseModel
+
+
+class GravityGrid:
+    """
+    Acceleration field of a universe's massive bodies, sampled on nested
+    square grids and bilinearly interpolated, so that an acceleration costs
+    the same no matter how many bodies there are
+
+    The grids are centred on the most massive body. Level k covers points
+    whose larger coordinate offset from the centre is between rMin 2^k and
+    rMin 2^(k+1), with cellsPerSide cells across, so cells are always the
+    same size relative to the distance from the centre and the relative
+    error is the same at every level. Points nearer than rMin, beyond the
+    outermost level, or within exclusionCells cells of another body use the
+    analytic field.
+
+    With only the centre body, the field at level k is the field at level 0
+    scaled by 2^(k rPower), so only level 0 is computed, and by symmetry
+    the error only has to be measured on a quarter of it. More bodies mean
+    computing every level, which takes seconds in Python.
+
+    The grid is only right while the bodies stay where they were when it
+    was built; see matches. It's never changed once built, so copies of a
+    universe (e.g. for getFuture) share it.
+    """
+
+    def __init__(
+        self,
+        universe: "UniverseModel",
+        rMin: float = 1e6,
+        rMax: float = 1e9,
+        cellsPerSide: int = 128,
+        exclusionCells: float = 16.0,
+    ) -> None:
+        """
+        rMin: distance from the centre inside which the analytic field is used
+        rMax: distance from the centre the grids extend to, at least
+        cellsPerSide: grid cells across each level
+        exclusionCells: distance, in cells, from bodies other than the
+            centre one within which the analytic field is used
+        """
+        if not universe.massiveObjects:
+            raise ValueError("universe has no massive objects")
+        self.G: float = universe.G
+        self.rPower: float = universe.rPower
+        self.bodies: List[Tuple[float, float, float]] = [
+            (b.kinematics.position.x, b.kinematics.position.y, b.mass)
+            for b in universe.massiveObjects
+        ]
+        self.mus: List[float] = [self.G * mass for x, y, mass in self.bodies]
+        centre = max(self.bodies, key=lambda b: b[2])
+        self.cx: float = centre[0]
+        self.cy: float = centre[1]
+        ## offsets of the other bodies from the centre
+        self.others: List[Tuple[float, float]] = [
+            (x - self.cx, y - self.cy)
+            for x, y, mass in self.bodies
+            if (x, y, mass) != centre
+        ]
+        self.rMin: float = rMin
+        self.cellsPerSide: int = cellsPerSide
+        self.nLevels: int = max(1, frexp(rMax / rMin)[1])
+        self.halfWidths: List[float] = [
+            rMin * 2.0 ** (k + 1) for k in range(self.nLevels)
+        ]
+        self.cellSizes: List[float] = [2.0 * H / cellsPerSide for H in self.halfWidths]
+        self.exclusion2: List[float] = [
+            (exclusionCells * h) ** 2 for h in self.cellSizes
+        ]
+        self.axs: List[array] = []
+        self.ays: List[array] = []
+        self._fillLevel(0)
+        for k in range(1, self.nLevels):
+            if self.others:
+                self._fillLevel(k)
+            else:
+                scale = 2.0 ** (k * self.rPower)
+                self.axs.append(array("d", [a * scale for a in self.axs[0]]))
+                self.ays.append(array("d", [a * scale for a in self.ays[0]]))
+        ## largest error found, relative to the sum of the bodies' field
+        ## strengths
+        self.maxRelativeError: float = self._measureError()
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "GravityGrid":
+        return self
+
+    def matches(self, universe: "UniverseModel") -> bool:
+        """
+        Whether universe's massive bodies are still where (and what) they
+        were when the grid was built
+        """
+        if universe.G != self.G or universe.rPower != self.rPower:
+            return False
+        if len(universe.massiveObjects) != len(self.bodies):
+            return False
+        for b, (x, y, mass) in zip(universe.massiveObjects, self.bodies):
+            position = b.kinematics.position
+            if position.x != x or position.y != y or b.mass != mass:
+                return False
+        return True
+
+    def analytic(self, x: float, y: float) -> Tuple[float, float]:
+        """
+        The acceleration at x, y, summed over the bodies
+        """
+        halfPower = 0.5 * (self.rPower - 1.0)
+        ax = 0.0
+        ay = 0.0
+        for (bx, by, mass), mu in zip(self.bodies, self.mus):
+            dx = bx - x
+            dy = by - y
+            r2 = dx * dx + dy * dy
+            if r2 < 1e-6:
+                continue
+            f = mu * r2**halfPower
+            ax += f * dx
+            ay += f * dy
+        return ax, ay
+
+    def accelerationAt(self, x: float, y: float) -> Tuple[float, float]:
+        """
+        The acceleration at x, y
+        """
+        axs, ays = self.accelerations([x], [y])
+        return axs[0], ays[0]
+
+    def accelerations(
+        self, xs: Sequence[float], ys: Sequence[float]
+    ) -> Tuple[array, array]:
+        """
+        The accelerations at each of the points xs[i], ys[i], as arrays of
+        the x and y components
+        """
+        resultX = array("d", bytes(8 * len(xs)))
+        resultY = array("d", bytes(8 * len(xs)))
+        cx = self.cx
+        cy = self.cy
+        rMin = self.rMin
+        nLevels = self.nLevels
+        halfWidths = self.halfWidths
+        cellSizes = self.cellSizes
+        exclusion2 = self.exclusion2
+        others = self.others
+        allAxs = self.axs
+        allAys = self.ays
+        last = self.cellsPerSide - 1
+        stride = self.cellsPerSide + 1
+        for iPoint in range(len(xs)):
+            x = xs[iPoint]
+            y = ys[iPoint]
+            dx = x - cx
+            dy = y - cy
+            m = max(abs(dx), abs(dy))
+            k = frexp(m / rMin)[1] - 1
+            useGrid = m > rMin and k < nLevels
+            if useGrid:
+                for ox, oy in others:
+                    ex = dx - ox
+                    ey = dy - oy
+                    if ex * ex + ey * ey < exclusion2[k]:
+                        useGrid = False
+                        break
+            if not useGrid:
+                resultX[iPoint], resultY[iPoint] = self.analytic(x, y)
+                continue
+            H = halfWidths[k]
+            h = cellSizes[k]
+            u = (dx + H) / h
+            v = (dy + H) / h
+            i = min(int(u), last)
+            j = min(int(v), last)
+            fu = u - i
+            fv = v - j
+            idx = j * stride + i
+            w00 = (1.0 - fu) * (1.0 - fv)
+            w10 = fu * (1.0 - fv)
+            w01 = (1.0 - fu) * fv
+            w11 = fu * fv
+            axs = allAxs[k]
+            ays = allAys[k]
+            resultX[iPoint] = (
+                w00 * axs[idx]
+                + w10 * axs[idx + 1]
+                + w01 * axs[idx + stride]
+                + w11 * axs[idx + stride + 1]
+            )
+            resultY[iPoint] = (
+                w00 * ays[idx]
+                + w10 * ays[idx + 1]
+                + w01 * ays[idx + stride]
+                + w11 * ays[idx + stride + 1]
+            )
+        return resultX, resultY
+
+    def _fillLevel(self, k: int) -> None:
+        H = self.halfWidths[k]
+        h = self.cellSizes[k]
+        axs = array("d")
+        ays = array("d")
+        for j in range(self.cellsPerSide + 1):
+            y = self.cy - H + j * h
+            for i in range(self.cellsPerSide + 1):
+                ax, ay = self.analytic(self.cx - H + i * h, y)
+                axs.append(ax)
+                ays.append(ay)
+        self.axs.append(axs)
+        self.ays.append(ays)
+
+    def _fieldStrength(self, x: float, y: float) -> float:
+        result = 0.0
+        for bx, by, mass in self.bodies:
+            r = sqrt((bx - x) ** 2 + (by - y) ** 2)
+            if r > 0.0:
+                result += self.G * mass * r**self.rPower
+        return result
+
+    def _measureError(self) -> float:
+        """
+        Largest error at the cell centres and edge midpoints, where bilinear
+        interpolation is worst, relative to the summed field strength
+
+        With only the centre body, the field looks the same at every level,
+        relative to the cell size, so only the innermost level is checked,
+        and only the quarter of it with both offsets from the centre
+        positive, as the others are its mirror images.
+        """
+        result = 0.0
+        nLevels = self.nLevels if self.others else 1
+        start = 0 if self.others else self.cellsPerSide // 2
+        for k in range(nLevels):
+            H = self.halfWidths[k]
+            h = self.cellSizes[k]
+            xs: List[float] = []
+            ys: List[float] = []
+            for j in range(start, self.cellsPerSide):
+                for i in range(start, self.cellsPerSide):
+                    for fu, fv in [(0.5, 0.5), (0.5, 0.0), (0.0, 0.5)]:
+                        dx = -H + (i + fu) * h
+                        dy = -H + (j + fv) * h
+                        if max(abs(dx), abs(dy)) > 0.5 * H:
+                            xs.append(self.cx + dx)
+                            ys.append(self.cy + dy)
+            gridX, gridY = self.accelerations(xs, ys)
+            for x, y, gx, gy in zip(xs, ys, gridX, gridY):
+                ax, ay = self.analytic(x, y)
+                error = sqrt((gx - ax) ** 2 + (gy - ay) ** 2)
+                result = max(result, error / self._fieldStrength(x, y))
+        return result
@@ -0,0 +1,168 @@
+"""
+Analytic two-body (Keplerian) propagation
+"""
+
+from math import sqrt, sin, cos, sinh, cosh, log
+from typing import Tuple
+
+
+def stumpffS(z: float) -> float:
+    """
+    Stumpff function S(z)
+    """
+    if abs(z) < 1e-3:
+        return 1.0 / 6.0 - z / 120.0 + z * z / 5040.0 - z * z * z / 362880.0
+    if z > 0.0:
+        s = sqrt(z)
+        return (s - sin(s)) / (s * s * s)
+    s = sqrt(-z)
+    return (sinh(s) - s) / (s * s * s)
+
+
+def stumpffC(z: float) -> float:
+    """
+    Stumpff function C(z)
+    """
+    if abs(z) < 1e-3:
+        return 0.5 - z / 24.0 + z * z / 720.0 - z * z * z / 40320.0
+    if z > 0.0:
+        return (1.0 - cos(sqrt(z))) / z
+    return (cosh(sqrt(-z)) - 1.0) / (-z)
+
+
+class KeplerError(ValueError):
+    """
+    Raised when the universal Kepler equation can't be solved accurately
+    """
+
+
+def keplerResidual(
+    chi: float, alpha: float, r0: float, sigma0: float, target: float
+) -> Tuple[float, float]:
+    """
+    The universal Kepler equation's residual at chi, and its derivative,
+    which is the radius there, so the residual only ever increases with chi
+
+    sigma0 is r0 . v0 / sqrt(mu) and target is sqrt(mu) dt. Raises
+    OverflowError where chi is so far past the answer that sinh overflows.
+    """
+    chi2 = chi * chi
+    z = alpha * chi2
+    S = stumpffS(z)
+    C = stumpffC(z)
+    f = sigma0 * chi2 * C + (1.0 - alpha * r0) * chi2 * chi * S + r0 * chi - target
+    dfdchi = sigma0 * chi * (1.0 - z * S) + (1.0 - alpha * r0) * chi2 * C + r0
+    return f, dfdchi
+
+
+def propagateKepler(
+    mu: float,
+    x: float,
+    y: float,
+    vx: float,
+    vy: float,
+    dt: float,
+    tolerance: float = 1e-12,
+    maxIterations: int = 100,
+) -> Tuple[float, float, float, float]:
+    """
+    Propagate position (x, y) and velocity (vx, vy) relative to a point mass
+    with gravitational parameter mu = G*M by dt, on an inverse-square orbit
+
+    Works for elliptic, parabolic, and hyperbolic orbits, using universal
+    variables. Returns the new x, y, vx, vy. The Kepler equation is solved
+    by Newton's method from Vallado's starting guesses, falling back to
+    bisection whenever a step would leave the bracket around the root.
+    Raises KeplerError if that doesn't converge.
+    """
+    r0 = sqrt(x * x + y * y)
+    if r0 < 0.001 or dt == 0.0:
+        return x, y, vx, vy
+    sqrtMu = sqrt(mu)
+    sigma0 = (x * vx + y * vy) / sqrtMu
+    alpha = 2.0 / r0 - (vx * vx + vy * vy) / mu  # 1/semi-major axis
+    target = sqrtMu * dt
+    sign = 1.0 if dt > 0.0 else -1.0
+
+    ## Starting guess
+    if alpha * r0 > 1e-6:
+        chi = sqrtMu * alpha * dt
+    elif alpha * r0 < -1e-6:
+        a = 1.0 / alpha
+        denominator = sigma0 * sqrtMu + sign * sqrt(-mu * a) * (1.0 - alpha * r0)
+        ratio = -2.0 * mu * alpha * dt / denominator if denominator != 0.0 else 0.0
+        chi = sign * sqrt(-a) * log(ratio) if ratio > 1.0 else target / r0
+    else:
+        chi = target / r0
+    if chi * sign <= 0.0:
+        chi = target / r0
+
+    ## Bracket the root: the residual is -target at 0, and grows with chi
+    lo = min(chi, 0.0)
+    hi = max(chi, 0.0)
+    for i in range(2000):
+        try:
+            f = keplerResidual(chi, alpha, r0, sigma0, target)[0]
+        except OverflowError:
+            break
+        if f * sign >= 0.0:
+            break
+        if sign > 0.0:
+            lo = chi
+        else:
+            hi = chi
+        chi *= 2.0
+        if sign > 0.0:
+            hi = chi
+        else:
+            lo = chi
+    else:
+        raise KeplerError(f"Couldn't bracket the Kepler equation for dt={dt}")
+
+    ## Newton's method, kept inside the bracket
+    converged = False
+    for i in range(maxIterations):
+        try:
+            f, dfdchi = keplerResidual(chi, alpha, r0, sigma0, target)
+        except OverflowError:
+            ## far past the root
+            if chi > 0.0:
+                hi = chi
+            else:
+                lo = chi
+            chi = 0.5 * (lo + hi)
+            continue
+        if f < 0.0:
+            lo = chi
+        elif f > 0.0:
+            hi = chi
+        newChi = chi - f / dfdchi
+        if not lo <= newChi <= hi:
+            newChi = 0.5 * (lo + hi)
+        step = newChi - chi
+        chi = newChi
+        if abs(step) <= tolerance * max(abs(chi), 1.0) or hi - lo <= tolerance * max(
+            abs(chi), 1.0
+        ):
+            converged = True
+            break
+    try:
+        f, r = keplerResidual(chi, alpha, r0, sigma0, target)
+        if not converged or abs(f) > 1e-8 * (abs(target) + r0 * abs(chi)):
+            raise KeplerError(
+                f"Kepler equation didn't converge for dt={dt}, residual {f}"
+            )
+        chi2 = chi * chi
+        z = alpha * chi2
+        S = stumpffS(z)
+        C = stumpffC(z)
+    except OverflowError:
+        raise KeplerError(f"Kepler equation overflowed for dt={dt}")
+    f = 1.0 - chi2 / r0 * C
+    g = dt - chi2 * chi / sqrtMu * S
+    newX = f * x + g * vx
+    newY = f * y + g * vy
+    r = sqrt(newX * newX + newY * newY)
+    fDot = sqrtMu / (r * r0) * (z * chi * S - chi)
+    gDot = 1.0 - chi2 / r * C
+    return newX, newY, fDot * x + gDot * vx, fDot * y + gDot * vy
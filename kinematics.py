@@ -59,6 +59,29 @@ class ObjectKinematics:
         """
         self.acceleration = acceleration
 
+    def setPosVel(self, position: Vec2, velocity: Vec2) -> None:
+        """
+        Sets position and velocity directly, e.g. from analytic propagation
+        """
+        self.position = position
+        self.velocity = velocity
+        self._updateDirections()
+
+    def setState(
+        self, x: float, y: float, vx: float, vy: float, ax: float, ay: float
+    ) -> None:
+        """
+        Sets position, velocity and acceleration from their components, as
+        stepped by forces.ForceModel. Position and velocity are changed in
+        place, as in updatePosVel.
+        """
+        self.position.x = x
+        self.position.y = y
+        self.velocity.x = vx
+        self.velocity.y = vy
+        self.acceleration = Vec2(ax, ay)
+        self._updateDirections()
+
     def updatePosVel(self, dt: float) -> None:
         """
         Updates velocity using acceleration
@@ -0,0 +1,311 @@
+#!/usr/bin/python
+"""
+Build the game sprites in sprites/ from spritesOrig/ and spritesExt/
+
+Recoloring, shaving, and montages are done in-process with pygame, spread
+across a process pool. Outputs whose inputs and parameters haven't changed
+since the last build are skipped, using a content-hash manifest.
+"""
+
+import pygame  # type: ignore
+import argparse
+import glob
+import hashlib
+import json
+import os.path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Any
+
+from utils import main_dir, sprites_dir
+
+## Bump this whenever the pixel operations change, so everything gets rebuilt
+BUILDER_VERSION = 1
+
+MANIFEST_NAME = ".manifest.json"
+
+Color = Tuple[int, int, int]
+
+## The ImageMagick/SVG definitions of the color names we use
+COLORS: Dict[str, Color] = {
+    "white": (255, 255, 255),
+    "black": (0, 0, 0),
+    "blue": (0, 0, 255),
+    "green": (0, 128, 0),
+    "yellow": (255, 255, 0),
+    "red": (255, 0, 0),
+    "pink": (255, 192, 203),
+    "lightblue": (173, 216, 230),
+    "cyan": (0, 255, 255),
+    "magenta": (255, 0, 255),
+    "royalblue1": (72, 118, 255),
+    "deepskyblue": (0, 191, 255),
+    "springgreen": (0, 255, 127),
+    "lime": (0, 255, 0),
+    "firebrick1": (255, 48, 48),
+}
+
+LAND_COLORS = ["white", "blue", "green", "yellow", "red", "pink"]
+SPACE_COLORS = [
+    "white",
+    "lightblue",
+    "yellow",
+    "red",
+    "pink",
+    "cyan",
+    "magenta",
+    "royalblue1",
+    "deepskyblue",
+    "springgreen",
+    "lime",
+    "firebrick1",
+]
+
+FUZZ = 0.4
+SHAVE = (40, 40)
+
+## A job is (output filename, operation, input paths, parameters)
+Job = Tuple[str, str, List[str], Dict[str, Any]]
+
+
+def recolorPixels(data: bytes, target: Color, fill: Color, fuzz: float) -> bytes:
+    """
+    Replace the RGB of every RGBA pixel within fuzz of target with fill
+
+    fuzz is the allowed Euclidean RGB distance as a fraction of 255, like
+    ImageMagick's -fuzz. Alpha is left untouched, like -channel RGB.
+    """
+    limit2 = (fuzz * 255.0) ** 2
+    tr, tg, tb = target
+    fillBytes = bytes(fill)
+    result = bytearray(data)
+    for i in range(0, len(result), 4):
+        dr = result[i] - tr
+        dg = result[i + 1] - tg
+        db = result[i + 2] - tb
+        if dr * dr + dg * dg + db * db <= limit2:
+            result[i : i + 3] = fillBytes
+    return bytes(result)
+
+
+def recolorSurface(
+    surface: pygame.surface.Surface, target: Color, fill: Color, fuzz: float
+) -> pygame.surface.Surface:
+    """
+    Return a copy of surface recolored with recolorPixels
+    """
+    size = surface.get_size()
+    data = pygame.image.tobytes(surface, "RGBA")
+    data = recolorPixels(data, target, fill, fuzz)
+    return pygame.image.frombytes(data, size, "RGBA")
+
+
+def appendSurfaces(
+    surfaces: List[pygame.surface.Surface], vertical: bool = False
+) -> pygame.surface.Surface:
+    """
+    Put surfaces next to each other, aligned to the top/left, like
+    ImageMagick's +append (or -append if vertical). Gaps are transparent.
+    """
+    if vertical:
+        size = (
+            max(s.get_width() for s in surfaces),
+            sum(s.get_height() for s in surfaces),
+        )
+    else:
+        size = (
+            sum(s.get_width() for s in surfaces),
+            max(s.get_height() for s in surfaces),
+        )
+    result = pygame.Surface(size, pygame.SRCALPHA, 32)
+    result.fill((0, 0, 0, 0))
+    offset = 0
+    for s in surfaces:
+        if vertical:
+            result.blit(s, (0, offset))
+            offset += s.get_height()
+        else:
+            result.blit(s, (offset, 0))
+            offset += s.get_width()
+    return result
+
+
+def runJob(job: Job, outDir: str) -> str:
+    """
+    Build the output of a single job, returning its filename
+    """
+    outName, operation, inputs, params = job
+    images = [pygame.image.load(i) for i in inputs]
+    if operation == "recolor":
+        result = recolorSurface(
+            images[0],
+            COLORS[params["target"]],
+            COLORS[params["fill"]],
+            params["fuzz"],
+        )
+    elif operation == "shave":
+        w, h = params["shave"]
+        rect = images[0].get_rect().inflate(-2 * w, -2 * h)
+        result = images[0].subsurface(rect).copy()
+    elif operation == "montage":
+        rows = []
+        for color in params["fills"]:
+            row = [
+                recolorSurface(
+                    i, COLORS[params["target"]], COLORS[color], params["fuzz"]
+                )
+                for i in images
+            ]
+            rows.append(appendSurfaces(row))
+        result = appendSurfaces(rows, vertical=True)
+    else:
+        raise ValueError(f"Unknown sprite operation: {operation}")
+    pygame.image.save(result, os.path.join(outDir, outName))
+    return outName
+
+
+def _baseName(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def makeJobs(rootDir: str = main_dir) -> List[Job]:
+    """
+    List all of the sprite jobs, just like the old makeSprites.sh
+    """
+    origDir = os.path.join(rootDir, "spritesOrig")
+    allOrig = sorted(glob.glob(os.path.join(origDir, "*.png")))
+    land = [i for i in allOrig if os.path.basename(i).startswith("Sprite")]
+    space = [i for i in allOrig if i not in land]
+    planets = sorted(glob.glob(os.path.join(rootDir, "spritesExt", "nichol", "*.png")))
+
+    jobs: List[Job] = []
+    for i in land:
+        for color in LAND_COLORS:
+            params = {"target": "black", "fill": color, "fuzz": FUZZ}
+            jobs.append((f"{_baseName(i)}_{color}.png", "recolor", [i], params))
+    for i in space:
+        for color in SPACE_COLORS:
+            params = {"target": "white", "fill": color, "fuzz": FUZZ}
+            jobs.append((f"{_baseName(i)}_{color}.png", "recolor", [i], params))
+    for i in planets:
+        jobs.append((f"{_baseName(i)}.png", "shave", [i], {"shave": list(SHAVE)}))
+    ## montage rows are in alphabetical color order, like the shell glob was
+    jobs.append(
+        (
+            "montageLand.png",
+            "montage",
+            land,
+            {"target": "black", "fills": sorted(SPACE_COLORS), "fuzz": FUZZ},
+        )
+    )
+    jobs.append(
+        (
+            "montageSpace.png",
+            "montage",
+            space,
+            {"target": "white", "fills": sorted(LAND_COLORS), "fuzz": FUZZ},
+        )
+    )
+    return jobs
+
+
+def hashFile(path: str, cache: Optional[Dict[str, str]] = None) -> str:
+    """
+    sha256 of the contents of the file at path, memoized in cache
+    """
+    if cache is not None and path in cache:
+        return cache[path]
+    with open(path, "rb") as f:
+        result = hashlib.sha256(f.read()).hexdigest()
+    if cache is not None:
+        cache[path] = result
+    return result
+
+
+def jobKey(job: Job, fileHashes: Optional[Dict[str, str]] = None) -> str:
+    """
+    Content hash of everything that goes into a job's output
+    """
+    outName, operation, inputs, params = job
+    description = {
+        "version": BUILDER_VERSION,
+        "operation": operation,
+        "inputs": [hashFile(i, fileHashes) for i in inputs],
+        "params": params,
+    }
+    encoded = json.dumps(description, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def loadManifest(outDir: str) -> Dict[str, str]:
+    """
+    Load the map of output filename to job key from the last build
+    """
+    try:
+        with open(os.path.join(outDir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def saveManifest(outDir: str, manifest: Dict[str, str]) -> None:
+    path = os.path.join(outDir, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def staleJobs(jobs: List[Job], outDir: str) -> Tuple[List[Job], Dict[str, str]]:
+    """
+    Find the jobs that need to be rebuilt
+
+    Returns the stale jobs and the up-to-date keys of all jobs
+    """
+    manifest = loadManifest(outDir)
+    fileHashes: Dict[str, str] = {}
+    keys: Dict[str, str] = {}
+    stale: List[Job] = []
+    for job in jobs:
+        outName = job[0]
+        keys[outName] = jobKey(job, fileHashes)
+        upToDate = manifest.get(outName) == keys[outName] and os.path.exists(
+            os.path.join(outDir, outName)
+        )
+        if not upToDate:
+            stale.append(job)
+    return stale, keys
+
+
+def build(
+    outDir: str = sprites_dir,
+    rootDir: str = main_dir,
+    nProcesses: Optional[int] = None,
+    force: bool = False,
+) -> List[str]:
+    """
+    Build all stale sprites, returning the list of rebuilt filenames
+    """
+    os.makedirs(outDir, exist_ok=True)
+    jobs = makeJobs(rootDir)
+    stale, keys = staleJobs(jobs, outDir)
+    if force:
+        stale = jobs
+    built: List[str] = []
+    if stale:
+        with ProcessPoolExecutor(max_workers=nProcesses) as pool:
+            built = list(pool.map(runJob, stale, [outDir] * len(stale)))
+    ## Only keep entries for outputs that exist in this version of the jobs
+    saveManifest(outDir, keys)
+    return built
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="number of processes to use"
+    )
+    parser.add_argument(
+        "-f", "--force", action="store_true", help="rebuild even up-to-date sprites"
+    )
+    args = parser.parse_args()
+    built = build(nProcesses=args.jobs, force=args.force)
+    print(f"Built {len(built)} sprites")
@@ -0,0 +1,209 @@
+"""
+Watching how well a universe conserves energy and angular momentum, to tell
+when its steps are too big
+"""
+
+from math import log, sqrt
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from universe import UniverseModel
+    from spaceobject import SpaceObjectModel
+
+## Key for the massive objects, as a system, in the references
+SYSTEM = -1
+
+
+def potential(mu: float, r: float, rPower: float) -> float:
+    """
+    Potential energy per unit mass at distance r from a body of G*mass mu,
+    for gravity of G*mass*r^rPower
+    """
+    if rPower == -1.0:
+        return mu * log(r)
+    return mu * r ** (rPower + 1.0) / (rPower + 1.0)
+
+
+def conservedQuantities(
+    universe: "UniverseModel",
+) -> Dict[int, Tuple[float, float]]:
+    """
+    Energy and angular momentum of universe, by object handle
+
+    The massive objects are a system, under SYSTEM, with their total energy
+    and angular momentum about the origin. Massless objects each have their
+    energy and angular momentum per unit mass relative to the heaviest body,
+    in the field of all of the massive bodies.
+    """
+    G = universe.G
+    rPower = universe.rPower
+    bodies = [
+        (
+            b.kinematics.position.x,
+            b.kinematics.position.y,
+            b.kinematics.velocity.x,
+            b.kinematics.velocity.y,
+            G * b.mass,
+        )
+        for b in universe.massiveObjects
+    ]
+    result: Dict[int, Tuple[float, float]] = {}
+    if not bodies:
+        return result
+    energy = 0.0
+    angularMomentum = 0.0
+    for i, (x, y, vx, vy, mu) in enumerate(bodies):
+        mass = mu / G
+        energy += 0.5 * mass * (vx * vx + vy * vy)
+        angularMomentum += mass * (x * vy - y * vx)
+        for x2, y2, vx2, vy2, mu2 in bodies[i + 1 :]:
+            r = sqrt((x2 - x) ** 2 + (y2 - y) ** 2)
+            if r >= 0.001:
+                energy += mass * potential(mu2, r, rPower)
+    result[SYSTEM] = (energy, angularMomentum)
+    px, py, pvx, pvy, pmu = max(bodies, key=lambda b: b[4])
+    for obj in universe.masslessObjects:
+        k = obj.kinematics
+        x = k.position.x
+        y = k.position.y
+        energy = 0.5 * ((k.velocity.x - pvx) ** 2 + (k.velocity.y - pvy) ** 2)
+        for bx, by, bvx, bvy, mu in bodies:
+            r = sqrt((bx - x) ** 2 + (by - y) ** 2)
+            if r >= 0.001:
+                energy += potential(mu, r, rPower)
+        angularMomentum = (x - px) * (k.velocity.y - pvy) - (y - py) * (
+            k.velocity.x - pvx
+        )
+        result[obj.handle] = (energy, angularMomentum)
+    return result
+
+
+def _thrusting(obj: "SpaceObjectModel") -> bool:
+    return (
+        obj.thrust != 0.0
+        or obj.thrustVec.x != 0.0
+        or obj.thrustVec.y != 0.0
+        or len(obj.burnSchedule) > 0
+    )
+
+
+class ConservationMonitor:
+    """
+    Samples a universe's energy and angular momentum every few steps and
+    tracks how far they've drifted from when they were first sampled
+
+    Errors are relative to those first values, worst over the massive
+    system and each massless object. An object that's thrusting, or has
+    burns scheduled, gets new first values once it stops, so only drift from
+    the integration is counted. Thrust that starts and stops between two
+    samples isn't noticed.
+    """
+
+    def __init__(self, every: int = 10) -> None:
+        """
+        every: sample every this many steps
+        """
+        self.every: int = every
+        self.nSteps: int = 0
+        self.nSamples: int = 0
+        ## totals at the latest sample, with massless objects per unit mass
+        self.energy: float = 0.0
+        self.angularMomentum: float = 0.0
+        ## worst relative errors at the latest sample
+        self.energyError: float = 0.0
+        self.angularMomentumError: float = 0.0
+        ## worst relative errors per model second at the latest sample
+        self.energyDriftRate: float = 0.0
+        self.angularMomentumDriftRate: float = 0.0
+        ## worst relative errors seen since the last reset
+        self.maxEnergyError: float = 0.0
+        self.maxAngularMomentumError: float = 0.0
+        ## first values, and the time they were sampled, by object handle
+        self.references: Dict[int, Tuple[float, float, float]] = {}
+        ## objects that were thrusting at the latest sample
+        self.thrusting: List[int] = []
+
+    def reset(self) -> None:
+        """
+        Forget the first values, so the next sample starts afresh
+        """
+        self.references = {}
+        self.thrusting = []
+        self.maxEnergyError = 0.0
+        self.maxAngularMomentumError = 0.0
+
+    def afterStep(self, universe: "UniverseModel") -> None:
+        """
+        Count a step of universe, sampling it if it's time
+        """
+        self.nSteps += 1
+        if self.nSteps % self.every == 0:
+            self.sample(universe)
+
+    def sample(self, universe: "UniverseModel") -> None:
+        """
+        Find the energy and angular momentum of universe now, and their
+        errors
+        """
+        quantities = conservedQuantities(universe)
+        thrusting = [obj.handle for obj in universe.masslessObjects if _thrusting(obj)]
+        if any(_thrusting(obj) for obj in universe.massiveObjects):
+            thrusting.append(SYSTEM)
+        ## Start again for objects thrusting now or at the last sample
+        for handle in thrusting + self.thrusting:
+            self.references.pop(handle, None)
+        self.thrusting = thrusting
+        time = universe.time
+        self.nSamples += 1
+        self.energy = 0.0
+        self.angularMomentum = 0.0
+        self.energyError = 0.0
+        self.angularMomentumError = 0.0
+        self.energyDriftRate = 0.0
+        self.angularMomentumDriftRate = 0.0
+        for handle, (energy, angularMomentum) in quantities.items():
+            self.energy += energy
+            self.angularMomentum += angularMomentum
+            reference = self.references.get(handle)
+            if reference is None:
+                self.references[handle] = (energy, angularMomentum, time)
+                continue
+            energy0, angularMomentum0, time0 = reference
+            energyError = abs(energy - energy0) / max(abs(energy0), 1e-300)
+            angularMomentumError = abs(angularMomentum - angularMomentum0) / max(
+                abs(angularMomentum0), 1e-300
+            )
+            self.energyError = max(self.energyError, energyError)
+            self.angularMomentumError = max(
+                self.angularMomentumError, angularMomentumError
+            )
+            if time > time0:
+                self.energyDriftRate = max(
+                    self.energyDriftRate, energyError / (time - time0)
+                )
+                self.angularMomentumDriftRate = max(
+                    self.angularMomentumDriftRate,
+                    angularMomentumError / (time - time0),
+                )
+        ## Objects that are gone don't count any more
+        if len(self.references) > len(quantities):
+            for handle in list(self.references):
+                if handle not in quantities:
+                    del self.references[handle]
+        self.maxEnergyError = max(self.maxEnergyError, self.energyError)
+        self.maxAngularMomentumError = max(
+            self.maxAngularMomentumError, self.angularMomentumError
+        )
+
+    def __str__(self) -> str:
+        return (
+            "energy error: {0:.3g} (max {1:.3g}, {2:.3g}/s), "
+            "angular momentum error: {3:.3g} (max {4:.3g}, {5:.3g}/s)".format(
+                self.energyError,
+                self.maxEnergyError,
+                self.energyDriftRate,
+                self.angularMomentumError,
+                self.maxAngularMomentumError,
+                self.angularMomentumDriftRate,
+            )
+        )
@@ -0,0 +1,490 @@
+"""
+Running a UniverseModel on a headless server that streams its state to
+render clients over sockets
+
+Every message is a tag, a payload length and the payload. The server sends
+a hello with the model's constants, then a keyframe of the full state, as
+written by recorder.packKeyframe, then updates. An update only has the
+objects that moved, or changed thrust, more than a threshold since they
+were last sent, as the changes in their positions and velocities from the
+values last sent, quantized to 32 bit integers. An object whose changes
+would overflow, whose thrust isn't -1, 0 or 1, or that had burns scheduled
+is sent whole instead, as written by recorder.packObject. A new keyframe is
+sent when objects come or go, when a client joins, and every keyframeEvery
+model seconds, so that objects below the threshold get resynced. Objects
+are referred to by their handles in the server's model, in updates and in
+the thrust and burn commands clients send back.
+"""
+
+import selectors
+import socket
+import struct
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from recorder import (
+    allObjects,
+    keyframeHandles,
+    packKeyframe,
+    packObject,
+    unpackKeyframe,
+    unpackObject,
+)
+from spaceobject import SpaceObjectModel
+from universe import UniverseModel
+
+HELLO = b"H"
+KEYFRAME = b"K"
+UPDATE = b"U"
+OBJECT = b"O"
+THRUST = b"T"
+BURN = b"B"
+
+_FRAME = struct.Struct("<cI")  # tag, payload length
+_HELLO = struct.Struct("<5sHdd")  # magic, version, G, rPower
+_UPDATE = struct.Struct("<dI")  # model time, number of objects
+## object handle, quantized changes in x, y, vx, vy, and thrust
+_OBJECT = struct.Struct("<Qiiiib")
+_HANDLE = struct.Struct("<Q")
+_THRUST = struct.Struct("<Qd")  # object handle, thrust
+_BURN = struct.Struct("<Qddd")  # object handle, start, end, thrust
+
+MAGIC = b"OGNET"
+VERSION = 4
+INT32_MAX = 2**31 - 1
+
+
+def frame(tag: bytes, payload: bytes) -> bytes:
+    return _FRAME.pack(tag, len(payload)) + payload
+
+
+def splitFrames(buffer: bytearray) -> List[Tuple[bytes, bytes]]:
+    """
+    Take the complete messages off the front of buffer, returning their tags
+    and payloads
+    """
+    result: List[Tuple[bytes, bytes]] = []
+    offset = 0
+    while len(buffer) - offset >= _FRAME.size:
+        tag, length = _FRAME.unpack_from(buffer, offset)
+        end = offset + _FRAME.size + length
+        if len(buffer) < end:
+            break
+        result.append((tag, bytes(buffer[offset + _FRAME.size : end])))
+        offset = end
+    del buffer[:offset]
+    return result
+
+
+class _Connection:
+    """
+    A socket with buffers for what's still to be sent and what's been
+    received but not yet handled
+    """
+
+    def __init__(self, sock: socket.socket) -> None:
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock: socket.socket = sock
+        self.outgoing: bytearray = bytearray()
+        self.incoming: bytearray = bytearray()
+        self.closed: bool = False
+
+    def send(self, data: bytes) -> None:
+        self.outgoing += data
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Send as much of the outgoing buffer as the socket will take now
+        """
+        while self.outgoing and not self.closed:
+            try:
+                n = self.sock.send(self.outgoing)
+            except BlockingIOError:
+                return
+            except OSError:
+                self.closed = True
+                return
+            del self.outgoing[:n]
+
+    def receive(self) -> List[Tuple[bytes, bytes]]:
+        """
+        Read whatever has arrived, returning the complete messages
+        """
+        while not self.closed:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                data = b""
+            if not data:
+                self.closed = True
+                break
+            self.incoming += data
+        return splitFrames(self.incoming)
+
+    def close(self) -> None:
+        self.closed = True
+        self.sock.close()
+
+
+class SimServer:
+    """
+    Steps a UniverseModel and streams it to the clients connected to a
+    listening socket
+
+    Which objects to send is worked out once per tick against the values
+    last sent, the same for every client, and their changes are sent
+    against those, so every client ends up with exactly the values last
+    sent. A client joining gets a keyframe, and so do the others on the
+    next tick, to share them again. The bytes sent per tick go with how
+    many objects changed, not how many there are.
+    """
+
+    def __init__(
+        self,
+        model: UniverseModel,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        positionQuantum: float = 1.0,
+        velocityQuantum: float = 1e-3,
+        positionThreshold: float = 1e3,
+        velocityThreshold: float = 1.0,
+        keyframeEvery: float = 1e5,
+        maxBacklog: int = 1 << 24,
+    ) -> None:
+        """
+        port: port to listen on, or 0 for any free one; see address
+        positionQuantum, velocityQuantum: resolution of the values sent
+        positionThreshold, velocityThreshold: how much an object has to have
+            changed since it was last sent to be sent again
+        maxBacklog: bytes a client can fall behind by before it's dropped
+        """
+        self.model: UniverseModel = model
+        self.positionQuantum: float = positionQuantum
+        self.velocityQuantum: float = velocityQuantum
+        self.positionThreshold: float = positionThreshold
+        self.velocityThreshold: float = velocityThreshold
+        self.keyframeEvery: float = keyframeEvery
+        self.maxBacklog: int = maxBacklog
+        self.listener: socket.socket = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.address: Tuple[str, int] = self.listener.getsockname()[:2]
+        self.clients: List[_Connection] = []
+        self.selector: selectors.BaseSelector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        ## values last sent, by object index: x, y, vx, vy, thrust
+        self.sent: List[Tuple[float, float, float, float, float]] = []
+        self.sentHandles: List[int] = []
+        ## objects to send whole in the next update
+        self.resend: Set[int] = set()
+        self.lastKeyframeTime: float = 0.0
+        self.keyframeNeeded: bool = True
+        self.bytesSent: int = 0
+
+    def tick(self, dt: float, nSteps: int = 1) -> None:
+        """
+        Take in new clients and their commands, step the model nSteps times
+        by dt, and send the clients what changed
+        """
+        self.poll()
+        for i in range(nSteps):
+            self.model.update(dt)
+        self.broadcast()
+
+    def poll(self, timeout: float = 0.0) -> None:
+        """
+        Accept new clients and handle commands from all of them, waiting up
+        to timeout seconds for a client to connect or send something
+        """
+        for key, mask in self.selector.select(timeout):
+            if key.fileobj is self.listener:
+                self._accept()
+        for client in self.clients:
+            for tag, payload in client.receive():
+                if tag == THRUST:
+                    handle, thrust = _THRUST.unpack(payload)
+                    obj = self.model.getObject(handle)
+                    if obj is not None:
+                        obj.thrust = thrust
+                elif tag == BURN:
+                    handle, startTime, endTime, thrust = _BURN.unpack(payload)
+                    obj = self.model.getObject(handle)
+                    if obj is not None:
+                        obj.scheduleBurn(startTime, endTime, thrust)
+                        ## clients need the whole schedule to predict paths
+                        self.resend.add(handle)
+        self._dropClosed()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                sock, address = self.listener.accept()
+            except BlockingIOError:
+                return
+            client = _Connection(sock)
+            self.selector.register(sock, selectors.EVENT_READ, client)
+            model = self.model
+            client.send(
+                frame(HELLO, _HELLO.pack(MAGIC, VERSION, model.G, model.rPower))
+            )
+            client.send(frame(KEYFRAME, packKeyframe(model)))
+            self.clients.append(client)
+            ## updates are sent against what the other clients have
+            self.keyframeNeeded = True
+
+    def broadcast(self) -> None:
+        """
+        Send the clients a keyframe or an update of the objects that changed
+        """
+        objs = allObjects(self.model)
+        handles = [obj.handle for obj in objs]
+        if (
+            self.keyframeNeeded
+            or handles != self.sentHandles
+            or self.model.time - self.lastKeyframeTime >= self.keyframeEvery
+        ):
+            self._sendKeyframe(objs, handles)
+            return
+        pq = self.positionQuantum
+        vq = self.velocityQuantum
+        pThreshold = self.positionThreshold
+        vThreshold = self.velocityThreshold
+        records: List[bytes] = []
+        wholeObjects: List[bytes] = []
+        for i, obj in enumerate(objs):
+            k = obj.kinematics
+            x = k.position.x
+            y = k.position.y
+            vx = k.velocity.x
+            vy = k.velocity.y
+            sx, sy, svx, svy, sThrust = self.sent[i]
+            if (
+                abs(x - sx) < pThreshold
+                and abs(y - sy) < pThreshold
+                and abs(vx - svx) < vThreshold
+                and abs(vy - svy) < vThreshold
+                and obj.thrust == sThrust
+                and obj.handle not in self.resend
+            ):
+                continue
+            qs = (
+                round((x - sx) / pq),
+                round((y - sy) / pq),
+                round((vx - svx) / vq),
+                round((vy - svy) / vq),
+            )
+            if (
+                obj.handle in self.resend
+                or max(abs(q) for q in qs) > INT32_MAX
+                or obj.thrust not in (-1.0, 0.0, 1.0)
+            ):
+                wholeObjects.append(frame(OBJECT, packObject(obj)))
+                self.sent[i] = (x, y, vx, vy, obj.thrust)
+                continue
+            records.append(_OBJECT.pack(obj.handle, *qs, int(obj.thrust)))
+            ## what the clients will have, worked out the same way
+            self.sent[i] = (
+                sx + qs[0] * pq,
+                sy + qs[1] * pq,
+                svx + qs[2] * vq,
+                svy + qs[3] * vq,
+                obj.thrust,
+            )
+        self.resend.clear()
+        payload = _UPDATE.pack(self.model.time, len(records)) + b"".join(records)
+        self._sendAll(b"".join(wholeObjects) + frame(UPDATE, payload))
+
+    def _sendKeyframe(self, objs: List, handles: List[int]) -> None:
+        self._sendAll(frame(KEYFRAME, packKeyframe(self.model)))
+        self.sent = [
+            (
+                obj.kinematics.position.x,
+                obj.kinematics.position.y,
+                obj.kinematics.velocity.x,
+                obj.kinematics.velocity.y,
+                obj.thrust,
+            )
+            for obj in objs
+        ]
+        self.sentHandles = handles
+        self.lastKeyframeTime = self.model.time
+        self.keyframeNeeded = False
+        self.resend.clear()
+
+    def _sendAll(self, data: bytes) -> None:
+        for client in self.clients:
+            client.send(data)
+            self.bytesSent += len(data)
+            if len(client.outgoing) > self.maxBacklog:
+                client.closed = True
+        self._dropClosed()
+
+    def _dropClosed(self) -> None:
+        for client in self.clients:
+            if client.closed:
+                self.selector.unregister(client.sock)
+                client.close()
+        self.clients = [client for client in self.clients if not client.closed]
+
+    def close(self) -> None:
+        for client in self.clients:
+            client.closed = True
+        self._dropClosed()
+        self.selector.close()
+        self.listener.close()
+
+
+class SimClient:
+    """
+    Receives a SimServer's stream into a UniverseModel, and sends it
+    commands
+
+    If a model is given, keyframes are restored into it, so it must have the
+    same objects as the server's, e.g. set up by the same code, and poll
+    raises ValueError if they stop matching, e.g. when the server removes
+    one. Otherwise a new model is made from each keyframe with different
+    objects.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        model: Optional[UniverseModel] = None,
+        positionQuantum: float = 1.0,
+        velocityQuantum: float = 1e-3,
+    ) -> None:
+        """
+        positionQuantum, velocityQuantum: must be the same as the server's
+        """
+        self.connection: _Connection = _Connection(
+            socket.create_connection((host, port))
+        )
+        self.model: Optional[UniverseModel] = model
+        self.positionQuantum: float = positionQuantum
+        self.velocityQuantum: float = velocityQuantum
+        self.constants: Optional[Tuple[float, float]] = None
+        ## model's objects by their handles on the server, and back
+        self.objects: Dict[int, SpaceObjectModel] = {}
+        self.remoteHandles: Dict[int, int] = {}
+        ## server handles in the last keyframe
+        self.handles: Optional[List[int]] = None
+        self.modelGiven: bool = model is not None
+        self.bytesReceived: int = 0
+
+    @property
+    def closed(self) -> bool:
+        return self.connection.closed
+
+    def poll(self, timeout: float = 0.0) -> int:
+        """
+        Apply whatever the server has sent, waiting up to timeout seconds for
+        something to arrive. Returns the number of messages applied.
+        """
+        self.connection.flush()
+        if timeout > 0.0:
+            with selectors.DefaultSelector() as selector:
+                selector.register(self.connection.sock, selectors.EVENT_READ)
+                selector.select(timeout)
+        messages = self.connection.receive()
+        for tag, payload in messages:
+            self.bytesReceived += _FRAME.size + len(payload)
+            if tag == HELLO:
+                magic, version, G, rPower = _HELLO.unpack(payload)
+                if magic != MAGIC or version != VERSION:
+                    raise ValueError("not a compatible simulation server")
+                self.constants = (G, rPower)
+            elif tag == KEYFRAME:
+                self._applyKeyframe(payload)
+            elif tag == OBJECT:
+                self._applyObject(payload)
+            elif tag == UPDATE:
+                self._applyUpdate(payload)
+        return len(messages)
+
+    def _applyKeyframe(self, payload: bytes) -> None:
+        handles = keyframeHandles(payload, 0)
+        model = self.model
+        if model is not None and self.handles is not None and handles != self.handles:
+            if self.modelGiven:
+                raise ValueError(
+                    "The server's objects changed, so they no longer match the"
+                    " model given to SimClient"
+                )
+            model = None
+        model, offset, self.objects = unpackKeyframe(payload, 0, model)
+        self.handles = handles
+        self.remoteHandles = {
+            obj.handle: handle for handle, obj in self.objects.items()
+        }
+        if self.constants is not None:
+            model.G, model.rPower = self.constants
+        self.model = model
+
+    def _applyObject(self, payload: bytes) -> None:
+        obj = self.objects.get(_HANDLE.unpack_from(payload)[0])
+        if obj is not None:
+            unpackObject(payload, 0, obj)
+
+    def _applyUpdate(self, payload: bytes) -> None:
+        if self.model is None:
+            return
+        time, nRecords = _UPDATE.unpack_from(payload)
+        pq = self.positionQuantum
+        vq = self.velocityQuantum
+        for handle, x, y, vx, vy, thrust in _OBJECT.iter_unpack(
+            payload[_UPDATE.size :]
+        ):
+            obj = self.objects[handle]
+            k = obj.kinematics
+            k.position.x = k.position.x + x * pq
+            k.position.y = k.position.y + y * pq
+            k.velocity.x = k.velocity.x + vx * vq
+            k.velocity.y = k.velocity.y + vy * vq
+            obj.thrust = float(thrust)
+        self.model.time = time
+
+    def remoteHandle(self, obj: SpaceObjectModel) -> int:
+        """
+        Handle of obj, an object of model, on the server
+        """
+        return self.remoteHandles[obj.handle]
+
+    def sendThrust(self, handle: int, thrust: float) -> None:
+        """
+        Set the thrust of the object with handle on the server
+        """
+        self.connection.send(frame(THRUST, _THRUST.pack(handle, thrust)))
+
+    def sendBurn(
+        self, handle: int, startTime: float, endTime: float, thrust: float
+    ) -> None:
+        """
+        Schedule a burn for the object with handle on the server
+        """
+        self.connection.send(
+            frame(BURN, _BURN.pack(handle, startTime, endTime, thrust))
+        )
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def serve(
+    server: SimServer,
+    dt: float,
+    stepsPerTick: int = 1,
+    tickSeconds: float = 1.0 / 60.0,
+) -> None:
+    """
+    Run server forever, ticking every tickSeconds of wall-clock time
+    """
+    nextTick = time.perf_counter()
+    while True:
+        server.poll(max(nextTick - time.perf_counter(), 0.0))
+        if time.perf_counter() >= nextTick:
+            server.tick(dt, stepsPerTick)
+            nextTick += tickSeconds
@@ -0,0 +1,103 @@
+"""
+Storage for objects that come and go often, with stable handles
+"""
+
+from typing import Generic, Iterator, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+## Handles are generation * MAX_SLOTS + slot
+MAX_SLOTS = 1 << 32
+
+
+class ObjectPool(Generic[T]):
+    """
+    Slots holding objects, where a removed object's slot goes on a free
+    list and is reused by the next object added, so the slot list only grows
+    to the most objects there have been at once
+
+    Each object gets a handle, from its slot and the slot's generation, which
+    goes up whenever the slot is emptied. A handle keeps referring to the
+    same object until it's removed, after which get returns None for it,
+    even if its slot has been reused.
+    """
+
+    def __init__(self) -> None:
+        self.slots: List[Optional[T]] = []
+        self.generations: List[int] = []
+        self.free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.slots) - len(self.free)
+
+    def __iter__(self) -> Iterator[T]:
+        for obj in self.slots:
+            if obj is not None:
+                yield obj
+
+    def add(self, obj: T) -> int:
+        """
+        Put obj in a free slot, returning its handle
+        """
+        if self.free:
+            slot = self.free.pop()
+            self.slots[slot] = obj
+        else:
+            slot = len(self.slots)
+            if slot >= MAX_SLOTS:
+                raise OverflowError("object pool is full")
+            self.slots.append(obj)
+            self.generations.append(0)
+        return self.generations[slot] * MAX_SLOTS + slot
+
+    def get(self, handle: int) -> Optional[T]:
+        """
+        The object with handle, or None if it's been removed
+        """
+        generation, slot = divmod(handle, MAX_SLOTS)
+        if slot >= len(self.slots) or self.generations[slot] != generation:
+            return None
+        return self.slots[slot]
+
+    def remove(self, handle: int) -> T:
+        """
+        Remove the object with handle and return it, freeing its slot
+        """
+        obj = self.get(handle)
+        if obj is None:
+            raise KeyError(f"no object with handle {handle}")
+        slot = handle % MAX_SLOTS
+        self.slots[slot] = None
+        self.generations[slot] += 1
+        self.free.append(slot)
+        return obj
+
+    def subset(self, objects: Sequence[T]) -> "ObjectPool[T]":
+        """
+        A pool with only those of objects that are in this one, with the same
+        handles as here
+        """
+        wanted = set(id(obj) for obj in objects)
+        result: ObjectPool[T] = ObjectPool()
+        result.generations = list(self.generations)
+        for slot, obj in enumerate(self.slots):
+            if obj is not None and id(obj) in wanted:
+                result.slots.append(obj)
+            else:
+                result.slots.append(None)
+                result.generations[slot] += 1
+                result.free.append(slot)
+        return result
+
+
+def swapRemove(items: List[T], index: int) -> Optional[T]:
+    """
+    Remove items[index] in constant time by moving the last item into its
+    place, so the order of items changes. Returns the item that moved, if
+    any.
+    """
+    last = items.pop()
+    if index == len(items):
+        return None
+    items[index] = last
+    return last
@@ -0,0 +1,518 @@
+"""
+Stepping massless objects in parallel worker processes, keeping their state
+in shared memory
+"""
+
+import os
+import weakref
+from math import atan2, degrees, sqrt
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Connection
+from typing import Any, List, Optional, Tuple, TYPE_CHECKING
+
+from kinematics import ObjectKinematics
+from objectpool import swapRemove
+from utils import Vec2
+
+if TYPE_CHECKING:
+    from universe import UniverseModel
+    from spaceobject import SpaceObjectModel
+
+## Per massless object: x, y, vx, vy, ax, ay, thrust vector x and y,
+## thrust times maxThrust, and velocity direction in radians and degrees
+FIELDS = 11
+## Per massive body: x, y, G*mass
+BODY_FIELDS = 3
+
+
+def stepSlice(
+    objects: "memoryview[float]",
+    bodies: "memoryview[float]",
+    nBodies: int,
+    start: int,
+    end: int,
+    dt: float,
+    rPower: float,
+) -> None:
+    """
+    Step massless objects start to end-1 in objects by dt, in the gravity of
+    the first nBodies bodies
+
+    Does the same arithmetic, in the same order, as UniverseModel.getA,
+    SpaceObjectModel.update1 and update2, and ObjectKinematics.updatePosVel,
+    so the results are identical.
+    """
+    bodyList = [
+        (bodies[j], bodies[j + 1], bodies[j + 2])
+        for j in range(0, nBodies * BODY_FIELDS, BODY_FIELDS)
+    ]
+    for i in range(start * FIELDS, end * FIELDS, FIELDS):
+        x = objects[i]
+        y = objects[i + 1]
+        ax = 0.0
+        ay = 0.0
+        for bx, by, gm in bodyList:
+            rx = bx - x
+            ry = by - y
+            r = sqrt(rx**2 + ry**2)
+            if r < 0.001:
+                continue
+            accmag = gm * r**rPower
+            ax += rx / r * accmag
+            ay += ry / r * accmag
+        ax += objects[i + 6]
+        ay += objects[i + 7]
+        vx = objects[i + 2] + ax * dt
+        vy = objects[i + 3] + ay * dt
+        x += vx * dt
+        y += vy * dt
+        thrustScale = objects[i + 8]
+        vMag = sqrt(vx**2 + vy**2)
+        if vMag > 0.0:
+            nx = vx / vMag
+            ny = vy / vMag
+        else:
+            nx = 1.0
+            ny = 0.0
+        direction = atan2(-vy, vx)
+        objects[i] = x
+        objects[i + 1] = y
+        objects[i + 2] = vx
+        objects[i + 3] = vy
+        objects[i + 4] = ax
+        objects[i + 5] = ay
+        objects[i + 6] = nx * thrustScale
+        objects[i + 7] = ny * thrustScale
+        objects[i + 9] = direction
+        objects[i + 10] = degrees(direction)
+
+
+class SharedVec2(Vec2):
+    """
+    Vec2 whose coordinates are two doubles in a shared memory block
+
+    Copies and pickles of it are plain Vec2s.
+    """
+
+    def __init__(self, values: "memoryview[float]", offset: int) -> None:
+        self.values: "memoryview[float]" = values
+        self.offset: int = offset
+
+    @property
+    def x(self) -> float:
+        return self.values[self.offset]
+
+    @x.setter
+    def x(self, x: float) -> None:
+        self.values[self.offset] = x
+
+    @property
+    def y(self) -> float:
+        return self.values[self.offset + 1]
+
+    @y.setter
+    def y(self, y: float) -> None:
+        self.values[self.offset + 1] = y
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return Vec2, (self.x, self.y)
+
+
+class SharedKinematics(ObjectKinematics):
+    """
+    ObjectKinematics of a massless object, kept in a ParallelStepper's
+    shared memory block at offset, where the workers step it in place
+
+    Setting position, velocity or acceleration copies the values in, so
+    the vectors stay the ones in the block. Copies and pickles of it are
+    plain ObjectKinematics.
+    """
+
+    def __init__(
+        self, values: "memoryview[float]", offset: int, kinematics: ObjectKinematics
+    ) -> None:
+        self._position: SharedVec2 = SharedVec2(values, offset)
+        self._velocity: SharedVec2 = SharedVec2(values, offset + 2)
+        self._acceleration: SharedVec2 = SharedVec2(values, offset + 4)
+        self.rebind(values, offset)
+        self.position = kinematics.position
+        self.velocity = kinematics.velocity
+        self.acceleration = kinematics.acceleration
+        self.direction = kinematics.direction
+        self.directionDeg = kinematics.directionDeg
+
+    def rebind(self, values: "memoryview[float]", offset: int) -> None:
+        """
+        Point at offset in values instead, where the state must already be
+        """
+        self.values: "memoryview[float]" = values
+        self.offset: int = offset
+        for i, vector in enumerate(
+            (self._position, self._velocity, self._acceleration)
+        ):
+            vector.values = values
+            vector.offset = offset + 2 * i
+
+    @property
+    def position(self) -> Vec2:
+        return self._position
+
+    @position.setter
+    def position(self, position: Vec2) -> None:
+        self._position.x = position.x
+        self._position.y = position.y
+
+    @property
+    def velocity(self) -> Vec2:
+        return self._velocity
+
+    @velocity.setter
+    def velocity(self, velocity: Vec2) -> None:
+        self._velocity.x = velocity.x
+        self._velocity.y = velocity.y
+
+    @property
+    def acceleration(self) -> Vec2:
+        return self._acceleration
+
+    @acceleration.setter
+    def acceleration(self, acceleration: Vec2) -> None:
+        self._acceleration.x = acceleration.x
+        self._acceleration.y = acceleration.y
+
+    @property
+    def direction(self) -> float:
+        return self.values[self.offset + 9]
+
+    @direction.setter
+    def direction(self, direction: float) -> None:
+        self.values[self.offset + 9] = direction
+
+    @property
+    def directionDeg(self) -> float:
+        return self.values[self.offset + 10]
+
+    @directionDeg.setter
+    def directionDeg(self, directionDeg: float) -> None:
+        self.values[self.offset + 10] = directionDeg
+
+    def plain(self) -> ObjectKinematics:
+        """
+        A copy that isn't in the block
+        """
+        return ObjectKinematics(
+            self.getPosition(), self.getVelocity(), self.getAcceleration()
+        )
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return ObjectKinematics, (
+            self.getPosition(),
+            self.getVelocity(),
+            self.getAcceleration(),
+        )
+
+
+def _doubles(block: shared_memory.SharedMemory) -> "memoryview[float]":
+    """
+    The contents of block as an array of doubles
+    """
+    assert block.buf is not None
+    return block.buf.cast("d")
+
+
+def _worker(conn: Connection, rPower: float) -> None:
+    """
+    Worker process loop: runs the commands sent over conn until "stop"
+    """
+    blocks: List[shared_memory.SharedMemory] = []
+    objects: Optional["memoryview[float]"] = None
+    bodies: Optional["memoryview[float]"] = None
+    while True:
+        command = conn.recv()
+        if command[0] == "step":
+            assert objects is not None and bodies is not None
+            dt, nBodies, start, end = command[1:]
+            stepSlice(objects, bodies, nBodies, start, end, dt, rPower)
+            conn.send(True)
+            continue
+        if objects is not None and bodies is not None:
+            objects.release()
+            bodies.release()
+        for block in blocks:
+            block.close()
+        if command[0] == "attach":
+            objectsName, bodiesName = command[1:]
+            blocks = [
+                shared_memory.SharedMemory(name=objectsName),
+                shared_memory.SharedMemory(name=bodiesName),
+            ]
+            objects = _doubles(blocks[0])
+            bodies = _doubles(blocks[1])
+        else:
+            break
+
+
+class ParallelStepper:
+    """
+    Steps a universe's massless objects on a persistent pool of worker
+    processes, each taking a contiguous slice of them each step
+
+    Massless objects don't affect each other, so each worker only needs the
+    massive body positions, broadcast each step. Object and body states
+    live in shared memory blocks that the workers attach to once, so
+    nothing is pickled per step, only a short command. Each massless
+    object's kinematics is a SharedKinematics in the block, at its
+    listIndex, so the workers step the objects in place and nothing is
+    copied per object. Only the objects with burns or thrust are touched
+    in this process each step, as the burn schedules stay here. The
+    universe tells the stepper about objects coming and going, and the
+    blocks have room to spare, so that doesn't mean making new ones every
+    step.
+
+    Objects' kinematics can be changed as normal. Ones replaced outright
+    are picked up by resync, which start calls itself if the universe was
+    stepped some other way since the last step, or its stateVersion was
+    bumped, as restoring objects from a recording or stream does. Code that
+    replaces kinematics otherwise has to bump stateVersion or call resync.
+
+    The workers and shared memory are freed by close, or if that isn't
+    called, when the stepper is garbage collected or at exit. Objects'
+    kinematics are only moved out of the blocks by close.
+    """
+
+    def __init__(self, universe: "UniverseModel", nProcesses: Optional[int] = None):
+        """
+        nProcesses: number of workers, by default one per CPU
+        """
+        if nProcesses is None:
+            nProcesses = os.cpu_count() or 1
+        self.universe: "UniverseModel" = universe
+        self.rPower: float = universe.rPower
+        self.objectCapacity: int = 0
+        self.bodyCapacity: int = 0
+        self.blocks: List[shared_memory.SharedMemory] = []
+        self.objects: Optional["memoryview[float]"] = None
+        self.bodies: Optional["memoryview[float]"] = None
+        ## objects and bodies, for the finalizer to release
+        self.views: List["memoryview[float]"] = []
+        ## massless objects' kinematics, by listIndex
+        self.kinematics: List[SharedKinematics] = []
+        ## objects with burns or thrust in the step being taken
+        self.thrusting: List["SpaceObjectModel"] = []
+        ## model time at the end of the last step taken, and the universe's
+        ## stateVersion then
+        self.endTime: Optional[float] = None
+        self.stateVersion: int = universe.stateVersion
+        self.connections: List[Connection] = []
+        self.processes: List[multiprocessing.process.BaseProcess] = []
+        ## Make the workers share this process's resource tracker, which
+        ## unlinks the shared memory blocks if this process dies, rather
+        ## than each starting its own that would unlink them when it exits
+        resource_tracker.ensure_running()
+        for i in range(nProcesses):
+            parentConn, childConn = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker, args=(childConn, self.rPower), daemon=True
+            )
+            process.start()
+            childConn.close()
+            self.connections.append(parentConn)
+            self.processes.append(process)
+        ## The lists are only changed in place from here on, so the
+        ## finalizer sees the current workers and blocks
+        self._finalizer = weakref.finalize(
+            self, _shutdown, self.connections, self.processes, self.blocks, self.views
+        )
+        massless = universe.masslessObjects
+        self._allocate(len(massless), len(universe.massiveObjects))
+        for obj in massless:
+            self.add(obj)
+
+    def add(self, obj: "SpaceObjectModel") -> None:
+        """
+        Move the state of obj, just added to the universe's massless
+        objects, into the block
+        """
+        if len(self.kinematics) >= self.objectCapacity:
+            self._allocate(len(self.kinematics) + 1, self.bodyCapacity)
+        objects = self.objects
+        assert objects is not None
+        i = len(self.kinematics) * FIELDS
+        objects[i + 6] = obj.thrustVec.x
+        objects[i + 7] = obj.thrustVec.y
+        objects[i + 8] = 0.0
+        kinematics = SharedKinematics(objects, i, obj.kinematics)
+        obj.kinematics = kinematics
+        self.kinematics.append(kinematics)
+
+    def remove(self, obj: "SpaceObjectModel") -> None:
+        """
+        Move the state of obj, being removed from the universe, out of the
+        block, and the last object's into its place, as the universe does
+        """
+        kinematics = self.kinematics[obj.listIndex]
+        if obj.kinematics is kinematics:
+            obj.kinematics = kinematics.plain()
+        moved = swapRemove(self.kinematics, obj.listIndex)
+        if moved is not None:
+            objects = self.objects
+            assert objects is not None
+            i = obj.listIndex * FIELDS
+            objects[i : i + FIELDS] = objects[moved.offset : moved.offset + FIELDS]
+            moved.rebind(objects, i)
+
+    def resync(self) -> None:
+        """
+        Bring the block up to date with the objects: kinematics replaced
+        outright, and thrust vectors from steps taken in this process
+        """
+        objects = self.objects
+        assert objects is not None
+        for obj, kinematics in zip(self.universe.masslessObjects, self.kinematics):
+            if obj.kinematics is not kinematics:
+                replaced = obj.kinematics
+                kinematics.position = replaced.position
+                kinematics.velocity = replaced.velocity
+                kinematics.acceleration = replaced.acceleration
+                kinematics.direction = replaced.direction
+                kinematics.directionDeg = replaced.directionDeg
+                obj.kinematics = kinematics
+            i = kinematics.offset
+            objects[i + 6] = obj.thrustVec.x
+            objects[i + 7] = obj.thrustVec.y
+            objects[i + 8] = 0.0
+
+    def start(self, dt: float) -> None:
+        """
+        Start the massless objects' step of dt, after the massive objects'
+        update1 and before their update2
+        """
+        universe = self.universe
+        massless = universe.masslessObjects
+        massive = universe.massiveObjects
+        if len(massive) > self.bodyCapacity:
+            self._allocate(self.objectCapacity, len(massive))
+        if universe.time != self.endTime or universe.stateVersion != self.stateVersion:
+            self.resync()
+        self.endTime = universe.time + dt
+        self.stateVersion = universe.stateVersion
+        objects = self.objects
+        bodies = self.bodies
+        assert objects is not None and bodies is not None
+        j = 0
+        for body in massive:
+            position = body.kinematics.position
+            bodies[j] = position.x
+            bodies[j + 1] = position.y
+            bodies[j + 2] = universe.G * body.mass
+            j += BODY_FIELDS
+        ## Only these can have had thrust, or have it now; the others' thrust
+        ## vectors and scales in the block stay zero
+        self.thrusting = [obj for obj in massless if obj.burnSchedule or obj.thrust]
+        for obj in self.thrusting:
+            obj.updateBurnSchedule(dt)
+            i = obj.listIndex * FIELDS
+            objects[i + 6] = obj.thrustVec.x
+            objects[i + 7] = obj.thrustVec.y
+            objects[i + 8] = obj.thrust * obj.maxThrust
+        nObjects = len(massless)
+        perWorker = -(-nObjects // len(self.connections))
+        for iWorker, conn in enumerate(self.connections):
+            start = min(iWorker * perWorker, nObjects)
+            end = min(start + perWorker, nObjects)
+            conn.send(("step", dt, len(massive), start, end))
+
+    def finish(self) -> None:
+        """
+        Wait for the workers to finish the step, and update the thrust
+        vectors of the objects that had burns or thrust
+        """
+        for conn in self.connections:
+            conn.recv()
+        objects = self.objects
+        assert objects is not None
+        for obj in self.thrusting:
+            i = obj.listIndex * FIELDS
+            obj.thrustVec = Vec2(objects[i + 6], objects[i + 7])
+        self.thrusting = []
+
+    def close(self) -> None:
+        """
+        Stop the workers and free the shared memory, moving the objects'
+        state out of it
+        """
+        for obj, kinematics in zip(self.universe.masslessObjects, self.kinematics):
+            if obj.kinematics is kinematics:
+                obj.kinematics = kinematics.plain()
+        self.kinematics = []
+        self.objects = None
+        self.bodies = None
+        self._finalizer()
+
+    def _allocate(self, nObjects: int, nBodies: int) -> None:
+        """
+        Make shared memory blocks for at least nObjects and nBodies, move
+        the objects' state into them, and attach the workers to them
+        """
+        oldBlocks = list(self.blocks)
+        oldObjects = self.objects
+        oldBodies = self.bodies
+        self.objectCapacity = max(nObjects, 2 * self.objectCapacity, 1)
+        self.bodyCapacity = max(nBodies, 2 * self.bodyCapacity, 1)
+        self.blocks[:] = [
+            shared_memory.SharedMemory(
+                create=True, size=8 * FIELDS * self.objectCapacity
+            ),
+            shared_memory.SharedMemory(
+                create=True, size=8 * BODY_FIELDS * self.bodyCapacity
+            ),
+        ]
+        self.objects = _doubles(self.blocks[0])
+        self.bodies = _doubles(self.blocks[1])
+        self.views[:] = [self.objects, self.bodies]
+        if oldObjects is not None:
+            n = FIELDS * len(self.kinematics)
+            self.objects[:n] = oldObjects[:n]
+            for kinematics in self.kinematics:
+                kinematics.rebind(self.objects, kinematics.offset)
+        for view in [oldObjects, oldBodies]:
+            if view is not None:
+                view.release()
+        _freeBlocks(oldBlocks)
+        for conn in self.connections:
+            conn.send(("attach", self.blocks[0].name, self.blocks[1].name))
+
+
+def _freeBlocks(blocks: List[shared_memory.SharedMemory]) -> None:
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+def _shutdown(
+    connections: List[Connection],
+    processes: List[multiprocessing.process.BaseProcess],
+    blocks: List[shared_memory.SharedMemory],
+    views: List["memoryview[float]"],
+) -> None:
+    """
+    Stop the workers, release the views of the blocks and free them,
+    emptying the lists
+    """
+    for conn in connections:
+        try:
+            conn.send(("stop",))
+        except OSError:
+            pass
+    for process in processes:
+        process.join()
+    for conn in connections:
+        conn.close()
+    for view in views:
+        view.release()
+    _freeBlocks(blocks)
+    views.clear()
+    connections.clear()
+    processes.clear()
+    blocks.clear()
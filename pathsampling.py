@@ -0,0 +1,108 @@
+"""
+Choosing the points to draw a path through on screen
+"""
+
+from math import sqrt
+from typing import Callable, List, Optional, Sequence, Tuple
+
+Point = Tuple[float, float]
+
+
+def distanceToSegment(p: Point, a: Point, b: Point) -> float:
+    """
+    Distance from point p to the line segment from a to b
+    """
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    length2 = dx * dx + dy * dy
+    f = 0.0
+    if length2 > 0.0:
+        f = min(max(((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length2, 0.0), 1.0)
+    ex = a[0] + f * dx - p[0]
+    ey = a[1] + f * dy - p[1]
+    return sqrt(ex * ex + ey * ey)
+
+
+def _outside(
+    bounds: Optional[Tuple[float, float, float, float]], points: Sequence[Point]
+) -> bool:
+    """
+    Whether all of points are off the same side of bounds (xmin, ymin, xmax,
+    ymax)
+    """
+    if bounds is None:
+        return False
+    xmin, ymin, xmax, ymax = bounds
+    return (
+        all(p[0] < xmin for p in points)
+        or all(p[0] > xmax for p in points)
+        or all(p[1] < ymin for p in points)
+        or all(p[1] > ymax for p in points)
+    )
+
+
+def adaptiveSample(
+    positionAt: Callable[[float], Point],
+    times: Sequence[float],
+    tolerance: float = 0.5,
+    maxDepth: int = 10,
+    bounds: Optional[Tuple[float, float, float, float]] = None,
+) -> Tuple[List[float], List[Point]]:
+    """
+    Sample a path given by positionAt(time), in screen coordinates, finely
+    enough that straight lines between the samples are within about
+    tolerance pixels of it
+
+    Starts from times and halves each interval whose midpoint is more than
+    tolerance from the chord, up to maxDepth times, so tight turns get many
+    samples and gentle arcs few. Intervals entirely off one side of bounds
+    (xmin, ymin, xmax, ymax) aren't refined. Returns the times and
+    positions.
+    """
+    resultTimes = [times[0]]
+    resultPoints = [positionAt(times[0])]
+    for t1 in times[1:]:
+        ## intervals still to check, last one first
+        stack = [(resultTimes[-1], resultPoints[-1], t1, positionAt(t1), 0)]
+        while stack:
+            tA, pA, tB, pB, depth = stack.pop()
+            tM = 0.5 * (tA + tB)
+            pM = positionAt(tM)
+            if (
+                depth < maxDepth
+                and distanceToSegment(pM, pA, pB) > tolerance
+                and not _outside(bounds, [pA, pM, pB])
+            ):
+                stack.append((tM, pM, tB, pB, depth + 1))
+                stack.append((tA, pA, tM, pM, depth + 1))
+            else:
+                resultTimes.append(tB)
+                resultPoints.append(pB)
+    return resultTimes, resultPoints
+
+
+def simplify(points: Sequence[Point], tolerance: float = 0.5) -> List[int]:
+    """
+    Douglas-Peucker simplification: the indices of the fewest points that
+    keep the polyline through points within tolerance of the original
+    """
+    n = len(points)
+    if n < 3:
+        return list(range(n))
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        i0, i1 = stack.pop()
+        maxDistance = 0.0
+        iMax = 0
+        for i in range(i0 + 1, i1):
+            distance = distanceToSegment(points[i], points[i0], points[i1])
+            if distance > maxDistance:
+                maxDistance = distance
+                iMax = i
+        if maxDistance > tolerance:
+            keep[iMax] = True
+            stack.append((i0, iMax))
+            stack.append((iMax, i1))
+    return [i for i in range(n) if keep[i]]
@@ -0,0 +1,458 @@
+"""
+Deterministic recording and replay of UniverseModel sessions
+
+A recording is an append-only binary file: a header followed by records for
+every model step, thrust change, scheduled burn, object added or removed,
+and change of the analytic coasting mode, with periodic keyframes of the
+full model state. Replaying the same steps from a keyframe reproduces the
+model exactly, so a Replayer can seek to any time by restoring the nearest
+earlier keyframe and re-stepping from there.
+"""
+
+import mmap
+import struct
+from bisect import bisect_right
+from typing import BinaryIO, Dict, List, Optional, Tuple, Iterator, Union
+
+from utils import Vec2
+from kinematics import ObjectKinematics
+from spaceobject import SpaceObjectModel
+from universe import UniverseModel
+
+MAGIC = b"OGREC"
+VERSION = 4
+
+_HEADER = struct.Struct("<5sHdd")  # magic, version, G, rPower
+_TAG = struct.Struct("<c")
+_STEP = struct.Struct("<d")  # dt
+_THRUST = struct.Struct("<Qd")  # object handle, thrust
+_BURN = struct.Struct("<Qddd")  # object handle, start, end, thrust
+_MODE = struct.Struct("<?")  # analyticCoasting
+_DESPAWN = struct.Struct("<Q")  # object handle
+## model time, number of objects, analyticCoasting
+_KEYFRAME = struct.Struct("<dI?")
+## handle, mass, radius, maxThrust, thrust, position, velocity, acceleration,
+## thrustVec, nBurns
+_OBJECT = struct.Struct("<Q12dI")
+_BURNENTRY = struct.Struct("<3d")  # start, end, thrust
+
+STEP = b"D"
+THRUST = b"T"
+BURN = b"B"
+KEYFRAME = b"K"
+MODE = b"M"
+SPAWN = b"S"
+DESPAWN = b"X"
+
+
+def allObjects(model: UniverseModel) -> List[SpaceObjectModel]:
+    """
+    The objects of model in the order they're stored in keyframes
+    """
+    return model.massiveObjects + model.masslessObjects
+
+
+def packObject(obj: SpaceObjectModel) -> bytes:
+    """
+    Pack the full state of obj, with its handle, as stored in keyframes and
+    spawn records
+    """
+    k = obj.kinematics
+    result = [
+        _OBJECT.pack(
+            obj.handle,
+            obj.mass,
+            obj.radius,
+            obj.maxThrust,
+            obj.thrust,
+            k.position.x,
+            k.position.y,
+            k.velocity.x,
+            k.velocity.y,
+            k.acceleration.x,
+            k.acceleration.y,
+            obj.thrustVec.x,
+            obj.thrustVec.y,
+            len(obj.burnSchedule),
+        )
+    ]
+    for burn in obj.burnSchedule:
+        result.append(_BURNENTRY.pack(*burn))
+    return b"".join(result)
+
+
+def unpackObject(
+    buffer: Union[bytes, mmap.mmap],
+    offset: int,
+    obj: Optional[SpaceObjectModel] = None,
+) -> Tuple[SpaceObjectModel, int, int]:
+    """
+    Restore the object packed at offset in buffer into obj, or a new object
+    if obj is None. Returns the object, the handle it was packed with, and
+    the offset after it. obj's kinematics are replaced, so its universe's
+    stateVersion is bumped.
+    """
+    (
+        handle,
+        mass,
+        radius,
+        maxThrust,
+        thrust,
+        x,
+        y,
+        vx,
+        vy,
+        ax,
+        ay,
+        tvx,
+        tvy,
+        nBurns,
+    ) = _OBJECT.unpack_from(buffer, offset)
+    offset += _OBJECT.size
+    if obj is None:
+        obj = SpaceObjectModel(Vec2(x, y), mass)
+    obj.radius = radius
+    obj.maxThrust = maxThrust
+    obj.thrust = thrust
+    obj.kinematics = ObjectKinematics(Vec2(x, y), Vec2(vx, vy), Vec2(ax, ay))
+    obj.thrustVec = Vec2(tvx, tvy)
+    obj.burnSchedule = []
+    if obj.universe is not None:
+        obj.universe.stateVersion += 1
+    for iBurn in range(nBurns):
+        obj.burnSchedule.append(list(_BURNENTRY.unpack_from(buffer, offset)))
+        offset += _BURNENTRY.size
+    return obj, handle, offset
+
+
+def objectSize(buffer: Union[bytes, mmap.mmap], offset: int) -> int:
+    """
+    Size of the object packed at offset in buffer
+    """
+    nBurns = _OBJECT.unpack_from(buffer, offset)[-1]
+    return _OBJECT.size + nBurns * _BURNENTRY.size
+
+
+def keyframeHandles(buffer: Union[bytes, mmap.mmap], offset: int) -> List[int]:
+    """
+    Handles the objects in the keyframe payload at offset in buffer were
+    recorded with, in order
+    """
+    nObjects = _KEYFRAME.unpack_from(buffer, offset)[1]
+    offset += _KEYFRAME.size
+    handles: List[int] = []
+    for iObj in range(nObjects):
+        handles.append(_OBJECT.unpack_from(buffer, offset)[0])
+        offset += objectSize(buffer, offset)
+    return handles
+
+
+def packKeyframe(model: UniverseModel) -> bytes:
+    """
+    Pack the full state of model into a keyframe record payload
+    """
+    objs = allObjects(model)
+    result = [_KEYFRAME.pack(model.time, len(objs), model.analyticCoasting)]
+    for obj in objs:
+        result.append(packObject(obj))
+    return b"".join(result)
+
+
+def unpackKeyframe(
+    buffer: Union[bytes, mmap.mmap], offset: int, model: Optional[UniverseModel] = None
+) -> Tuple[UniverseModel, int, Dict[int, SpaceObjectModel]]:
+    """
+    Restore the keyframe payload at offset in buffer into model
+
+    If model is None, make a new UniverseModel with new objects. Otherwise
+    model must have the same objects, in the same order, as when the
+    keyframe was recorded. Returns the model, the offset after the keyframe,
+    and the objects by the handles they had when recorded.
+    """
+    time, nObjects, analyticCoasting = _KEYFRAME.unpack_from(buffer, offset)
+    offset += _KEYFRAME.size
+    objs: List[SpaceObjectModel] = []
+    if model is not None:
+        objs = allObjects(model)
+        if len(objs) != nObjects:
+            raise ValueError(
+                f"Keyframe has {nObjects} objects but model has {len(objs)}"
+            )
+    byHandle: Dict[int, SpaceObjectModel] = {}
+    for iObj in range(nObjects):
+        obj, handle, offset = unpackObject(
+            buffer, offset, None if model is None else objs[iObj]
+        )
+        if model is None:
+            objs.append(obj)
+        byHandle[handle] = obj
+    if model is None:
+        model = UniverseModel()
+        for obj in objs:
+            model.addObject(obj)
+    model.time = time
+    model.analyticCoasting = analyticCoasting
+    return model, offset, byHandle
+
+
+class Recorder:
+    """
+    Records the steps and inputs of a UniverseModel to a file
+
+    Call recordStep before every model update, recordThrust and recordBurn
+    whenever the inputs change, recordSpawn after an object is added and
+    recordDespawn before one is removed. Objects are referred to by their
+    handles, so records stay right however the model reorders its lists.
+    Changes to the model's analyticCoasting are picked up by recordStep. A
+    keyframe is written every keyframeEvery seconds of model time. The file
+    is flushed with every step, so a Replayer can read what's been recorded
+    so far while recording goes on, and a crash loses at most one step.
+    """
+
+    def __init__(
+        self, filename: str, model: UniverseModel, keyframeEvery: float = 1e5
+    ) -> None:
+        self.model: UniverseModel = model
+        self.keyframeEvery: float = keyframeEvery
+        self.file: BinaryIO = open(filename, "wb")
+        self.file.write(_HEADER.pack(MAGIC, VERSION, model.G, model.rPower))
+        self.lastKeyframeTime: float = 0.0
+        ## analyticCoasting as of the last keyframe or mode record
+        self.analyticCoasting: bool = model.analyticCoasting
+        self.writeKeyframe()
+        self.file.flush()
+
+    def writeKeyframe(self) -> None:
+        """
+        Write the current model state
+        """
+        self.file.write(KEYFRAME + packKeyframe(self.model))
+        self.lastKeyframeTime = self.model.time
+        self.analyticCoasting = self.model.analyticCoasting
+
+    def recordStep(self, dt: float) -> None:
+        """
+        Record that the model is about to be updated by dt
+        """
+        if self.model.time - self.lastKeyframeTime >= self.keyframeEvery:
+            self.writeKeyframe()
+        elif self.model.analyticCoasting != self.analyticCoasting:
+            self.analyticCoasting = self.model.analyticCoasting
+            self.file.write(MODE + _MODE.pack(self.analyticCoasting))
+        self.file.write(STEP + _STEP.pack(dt))
+        self.file.flush()
+
+    def recordThrust(self, obj: SpaceObjectModel, thrust: float) -> None:
+        """
+        Record that obj.thrust is being set to thrust
+        """
+        self.file.write(THRUST + _THRUST.pack(obj.handle, thrust))
+
+    def recordBurn(
+        self, obj: SpaceObjectModel, startTime: float, endTime: float, thrust: float
+    ) -> None:
+        """
+        Record that a burn is being scheduled for obj
+        """
+        record = _BURN.pack(obj.handle, startTime, endTime, thrust)
+        self.file.write(BURN + record)
+
+    def recordSpawn(self, obj: SpaceObjectModel) -> None:
+        """
+        Record that obj has just been added to the model
+        """
+        self.file.write(SPAWN + packObject(obj))
+
+    def recordDespawn(self, obj: SpaceObjectModel) -> None:
+        """
+        Record that obj is about to be removed from the model
+        """
+        self.file.write(DESPAWN + _DESPAWN.pack(obj.handle))
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class Replayer:
+    """
+    Replays a recording made by Recorder into a UniverseModel
+
+    Recordings only store G and rPower, not the rest of the model's
+    configuration: its force terms, sphere of influence, ephemeris, gravity
+    grid and so on. To replay with those, pass a model set up the same way
+    as the recorded one, with the objects it had when recording started, in
+    the same order. Keyframes are restored into it, adding and removing
+    objects that came and went. Without a model, restoring a keyframe, when
+    seeking back, makes a new plain UniverseModel.
+    """
+
+    def __init__(self, filename: str, model: Optional[UniverseModel] = None) -> None:
+        with open(filename, "rb") as f:
+            self.buffer: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, G, rPower = _HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{filename} isn't a version {VERSION} recording")
+        self.G: float = G
+        self.rPower: float = rPower
+        self.keyframeTimes: List[float] = []
+        self.keyframeOffsets: List[int] = []
+        for tag, offset, nextOffset in self._records(_HEADER.size):
+            if tag == KEYFRAME:
+                self.keyframeTimes.append(_KEYFRAME.unpack_from(self.buffer, offset)[0])
+                self.keyframeOffsets.append(offset)
+        if not self.keyframeOffsets:
+            raise ValueError(f"{filename} has no keyframes")
+        self.model: UniverseModel
+        self.offset: int
+        ## the model's objects by their handles in the recording
+        self.objects: Dict[int, SpaceObjectModel] = {}
+        self.modelGiven: bool = model is not None
+        if model is not None:
+            handles = keyframeHandles(self.buffer, self.keyframeOffsets[0])
+            objs = allObjects(model)
+            if len(objs) != len(handles):
+                raise ValueError(
+                    f"Recording starts with {len(handles)} objects but model has"
+                    f" {len(objs)}"
+                )
+            self.model = model
+            self.objects = dict(zip(handles, objs))
+        self._restore(0)
+
+    def _restore(self, iKeyframe: int) -> None:
+        offset = self.keyframeOffsets[iKeyframe]
+        if not self.modelGiven:
+            self.model, self.offset, self.objects = unpackKeyframe(self.buffer, offset)
+        else:
+            self._restoreInPlace(offset)
+        self.model.G = self.G
+        self.model.rPower = self.rPower
+
+    def _restoreInPlace(self, offset: int) -> None:
+        """
+        Restore the keyframe at offset into the given model, matching its
+        objects by handle
+        """
+        model = self.model
+        handles = keyframeHandles(self.buffer, offset)
+        for handle in set(self.objects) - set(handles):
+            model.removeObject(self.objects.pop(handle))
+        time, nObjects, analyticCoasting = _KEYFRAME.unpack_from(self.buffer, offset)
+        offset += _KEYFRAME.size
+        for handle in handles:
+            obj, handle, offset = unpackObject(
+                self.buffer, offset, self.objects.get(handle)
+            )
+            if handle not in self.objects:
+                model.addObject(obj)
+                self.objects[handle] = obj
+        model.time = time
+        model.analyticCoasting = analyticCoasting
+        self.offset = offset
+
+    def _records(self, offset: int) -> Iterator[Tuple[bytes, int, int]]:
+        """
+        Iterate over the records starting at offset
+
+        Yields the tag, the payload offset, and the offset of the next record
+        """
+        while offset < len(self.buffer):
+            tag = self.buffer[offset : offset + 1]
+            payloadOffset = offset + _TAG.size
+            offset = payloadOffset
+            if tag == STEP:
+                offset += _STEP.size
+            elif tag == THRUST:
+                offset += _THRUST.size
+            elif tag == BURN:
+                offset += _BURN.size
+            elif tag == MODE:
+                offset += _MODE.size
+            elif tag == SPAWN:
+                offset += objectSize(self.buffer, offset)
+            elif tag == DESPAWN:
+                offset += _DESPAWN.size
+            elif tag == KEYFRAME:
+                nObjects = _KEYFRAME.unpack_from(self.buffer, offset)[1]
+                offset += _KEYFRAME.size
+                for i in range(nObjects):
+                    offset += objectSize(self.buffer, offset)
+            else:
+                raise ValueError(f"Corrupt recording: unknown record {tag!r}")
+            yield tag, payloadOffset, offset
+
+    def _apply(self, tag: bytes, offset: int) -> None:
+        if tag == STEP:
+            self.model.update(_STEP.unpack_from(self.buffer, offset)[0])
+        elif tag == THRUST:
+            handle, thrust = _THRUST.unpack_from(self.buffer, offset)
+            self.objects[handle].thrust = thrust
+        elif tag == BURN:
+            handle, startTime, endTime, thrust = _BURN.unpack_from(self.buffer, offset)
+            self.objects[handle].scheduleBurn(startTime, endTime, thrust)
+        elif tag == MODE:
+            self.model.analyticCoasting = _MODE.unpack_from(self.buffer, offset)[0]
+        elif tag == SPAWN:
+            obj, handle, offset = unpackObject(self.buffer, offset)
+            self.model.addObject(obj)
+            self.objects[handle] = obj
+        elif tag == DESPAWN:
+            handle = _DESPAWN.unpack_from(self.buffer, offset)[0]
+            self.model.removeObject(self.objects.pop(handle))
+        elif tag == KEYFRAME:
+            ## The state is already the same, but the mode may have changed
+            self.model.analyticCoasting = _KEYFRAME.unpack_from(self.buffer, offset)[2]
+
+    def seek(self, time: float) -> UniverseModel:
+        """
+        Bring the model to the last recorded step that doesn't go past time
+
+        Restores the nearest keyframe before time and re-steps from there.
+        """
+        iKeyframe = max(bisect_right(self.keyframeTimes, time) - 1, 0)
+        keyframeTime = self.keyframeTimes[iKeyframe]
+        ## Going forward past the nearest keyframe, we can just keep stepping
+        if not (keyframeTime <= self.model.time <= time):
+            self._restore(iKeyframe)
+        for tag, offset, nextOffset in self._records(self.offset):
+            if tag == STEP:
+                dt = _STEP.unpack_from(self.buffer, offset)[0]
+                if self.model.time + dt > time:
+                    break
+            self._apply(tag, offset)
+            self.offset = nextOffset
+        return self.model
+
+    def play(self) -> Iterator[UniverseModel]:
+        """
+        Replay the rest of the recording, yielding the model after each step
+        """
+        for tag, offset, nextOffset in self._records(self.offset):
+            self._apply(tag, offset)
+            self.offset = nextOffset
+            if tag == STEP:
+                yield self.model
+
+    def close(self) -> None:
+        self.buffer.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Replay an orbitalGame recording")
+    parser.add_argument("filename")
+    parser.add_argument(
+        "--seek", type=float, default=None, help="print the model at this model time"
+    )
+    args = parser.parse_args()
+    replayer = Replayer(args.filename)
+    if args.seek is not None:
+        print(replayer.seek(args.seek))
+    else:
+        startTime = time.perf_counter()
+        nSteps = sum(1 for model in replayer.play())
+        elapsed = time.perf_counter() - startTime
+        print(f"Replayed {nSteps} steps in {elapsed:.3f}s")
+        print(replayer.model)
@@ -0,0 +1,111 @@
+"""
+Drawing all of the sprites on screen in one batch, with selection borders and
+thrust flames as shared overlays
+"""
+
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+import pygame  # type: ignore
+
+from utils import Vec2
+
+if TYPE_CHECKING:
+    from spaceobject import SpaceObjectView
+
+## Draw order: borders under sprites, flames over them
+BORDER_LAYER = 0
+SPRITE_LAYER = 1
+FLAME_LAYER = 2
+
+BORDER_COLOR = (255, 255, 255, 255)
+BORDER_WIDTH = 2
+FLAME_COLOR = (255, 200, 0, 255)
+FLAME_SIZE = (12, 12)
+
+
+class SpriteRenderer:
+    """
+    Draws sprites with a single Surface.blits call per frame
+
+    The draw list is sorted by layer and then by image, so sprites sharing an
+    image are blitted one after another. Borders and flames aren't drawn on
+    the sprites' images, but blitted over them from overlays made once per
+    sprite size, and per whole degree of rotation for flames.
+    """
+
+    def __init__(self) -> None:
+        self.borders: Dict[Tuple[int, int], pygame.surface.Surface] = {}
+        self.flames: Dict[Tuple[int, int, int], pygame.surface.Surface] = {}
+        ## where sprites were drawn last time, to be redrawn without them
+        self.drawnRects: List[pygame.rect.Rect] = []
+
+    def border(self, size: Tuple[int, int]) -> pygame.surface.Surface:
+        """
+        Overlay with a border around the edge of a sprite of size
+        """
+        result = self.borders.get(size)
+        if result is None:
+            result = pygame.Surface(size, pygame.SRCALPHA)
+            pygame.draw.rect(result, BORDER_COLOR, result.get_rect(), BORDER_WIDTH)
+            self.borders[size] = result
+        return result
+
+    def flame(self, size: Tuple[int, int], rotation: float) -> pygame.surface.Surface:
+        """
+        Overlay with a little flame at the edge of a sprite of size, pointing
+        rotation degrees from the x axis
+        """
+        degrees = int(round(rotation)) % 360
+        key = (size[0], size[1], degrees)
+        result = self.flames.get(key)
+        if result is None:
+            result = pygame.Surface(size, pygame.SRCALPHA)
+            w2 = FLAME_SIZE[0] / 2
+            l2 = FLAME_SIZE[1] / 2
+            ## Drawing a triangle
+            points = [Vec2(w2, l2), Vec2(w2, -l2), Vec2(-w2, 0)]
+            position = Vec2(size[0] / 2 - w2, 0).rotated(degrees) + Vec2(
+                size[0] / 2, size[1] / 2
+            )
+            for point in points:
+                point.rotate(degrees)
+                point += position
+            pygame.draw.polygon(result, FLAME_COLOR, [p.tuple() for p in points])
+            self.flames[key] = result
+        return result
+
+    def drawList(
+        self, sprites: Iterable["SpaceObjectView"]
+    ) -> List[Tuple[pygame.surface.Surface, pygame.rect.Rect]]:
+        """
+        What to blit for sprites, in order
+        """
+        entries: List[Tuple[int, int, pygame.surface.Surface, pygame.rect.Rect]] = []
+        for sprite in sprites:
+            rect = sprite.rect
+            image = sprite.image
+            entries.append((SPRITE_LAYER, id(image), image, rect))
+            if sprite.selected:
+                border = self.border(rect.size)
+                entries.append((BORDER_LAYER, id(border), border, rect))
+            flame: Optional[pygame.surface.Surface] = sprite.flame
+            if flame is not None:
+                entries.append((FLAME_LAYER, id(flame), flame, rect))
+        entries.sort(key=itemgetter(0, 1))
+        return [(image, rect) for layer, imageId, image, rect in entries]
+
+    def draw(
+        self, surface: pygame.surface.Surface, sprites: Iterable["SpaceObjectView"]
+    ) -> List[pygame.rect.Rect]:
+        """
+        Draw sprites on surface, returning the rects that need updating on
+        the display: where they're drawn now, and where they were drawn last
+        time
+        """
+        sprites = list(sprites)
+        surface.blits(self.drawList(sprites), doreturn=False)
+        drawn = [sprite.rect.copy() for sprite in sprites]
+        result = drawn + self.drawnRects
+        self.drawnRects = drawn
+        return result
@@ -0,0 +1,221 @@
+"""
+Sphere-of-influence hierarchy of massive bodies for patched-conic gravity
+"""
+
+from typing import Dict, List, MutableSequence, Sequence, Tuple, TYPE_CHECKING
+
+from utils import Vec2
+
+if TYPE_CHECKING:
+    from spaceobject import SpaceObjectModel
+    from universe import UniverseModel
+
+
+class SphereOfInfluenceTree:
+    """
+    Assigns each massless object to the massive body whose sphere of
+    influence (SOI) it is in, so only that body (plus any perturbers) has to
+    be evaluated for its gravity
+
+    Each body's parent is the body whose SOI it was in when the tree was
+    built, and its SOI radius is a (m/M)^(2/5), with a the distance to the
+    parent of mass M. The most massive body is the root with an infinite SOI.
+    An object in a non-root body's SOI also moves with that body, i.e. it
+    gets the body's own acceleration added, so e.g. craft around a moon
+    follow the moon around its planet. That's the gravity on the body from
+    all of the others where they are now, not what it was last stepped
+    with, so the order objects are stepped in doesn't matter, and thrust on
+    the body isn't passed on.
+
+    Each object remembers its primary in its soiPrimary attribute, so
+    reassigning it when it crosses a boundary only checks the current
+    primary, its ancestors, and its children.
+    """
+
+    def __init__(
+        self,
+        universe: "UniverseModel",
+        perturbers: Sequence["SpaceObjectModel"] = (),
+    ) -> None:
+        """
+        perturbers are massive bodies whose tidal pull is always included,
+            in addition to an object's primary
+        """
+        self.universe: "UniverseModel" = universe
+        self.bodies: List["SpaceObjectModel"] = []
+        self.parents: List[int] = []
+        self.children: List[List[int]] = []
+        self.positions: List[Tuple[float, float]] = []
+        self.radii2: List[float] = []
+        self.perturbers: List["SpaceObjectModel"] = list(perturbers)
+        self.perturberIndices: List[int] = []
+        self.build()
+
+    def build(self) -> None:
+        """
+        (Re)build the hierarchy from the current massive bodies and positions
+        """
+        self.bodies = sorted(
+            self.universe.massiveObjects, key=lambda b: b.mass, reverse=True
+        )
+        nBodies = len(self.bodies)
+        self.parents = [-1] * nBodies
+        self.children = [[] for i in range(nBodies)]
+        self.positions = [b.kinematics.position.tuple() for b in self.bodies]
+        self.radii2 = [float("inf")] * nBodies
+        for i in range(1, nBodies):
+            parent = self._deepestContaining(self.positions[i], 0, i)
+            self.parents[i] = parent
+            self.children[parent].append(i)
+            self.radii2[i] = self._radius2(i)
+        self.perturberIndices = [
+            i for i in range(nBodies) if self.bodies[i] in self.perturbers
+        ]
+        for obj in self.universe.masslessObjects:
+            obj.soiPrimary = -1
+
+    def update(self) -> None:
+        """
+        Update the SOI radii to the current body positions, once per step
+        """
+        self.positions = [b.kinematics.position.tuple() for b in self.bodies]
+        for i in range(1, len(self.bodies)):
+            self.radii2[i] = self._radius2(i)
+
+    def _radius2(self, i: int) -> float:
+        """
+        Square of the SOI radius of body i
+        """
+        parent = self.parents[i]
+        a2 = self._distance2(self.positions[i], parent)
+        return a2 * (self.bodies[i].mass / self.bodies[parent].mass) ** 0.8
+
+    def _distance2(self, position: Tuple[float, float], i: int) -> float:
+        dx = position[0] - self.positions[i][0]
+        dy = position[1] - self.positions[i][1]
+        return dx * dx + dy * dy
+
+    def _deepestContaining(
+        self, position: Tuple[float, float], start: int, nBodies: int
+    ) -> int:
+        """
+        Descend from body start to the deepest body whose SOI contains
+        position, only considering the first nBodies bodies
+        """
+        i = start
+        descended = True
+        while descended:
+            descended = False
+            for child in self.children[i]:
+                if child < nBodies and (
+                    self._distance2(position, child) < self.radii2[child]
+                ):
+                    i = child
+                    descended = True
+                    break
+        return i
+
+    def primaryOf(self, obj: "SpaceObjectModel") -> "SpaceObjectModel":
+        """
+        The body whose SOI obj is in
+        """
+        return self.bodies[self._primaryIndex(obj, obj.kinematics.position.tuple())]
+
+    def _primaryIndex(
+        self, obj: "SpaceObjectModel", position: Tuple[float, float]
+    ) -> int:
+        i = obj.soiPrimary
+        if not (0 <= i < len(self.bodies)):
+            i = 0
+        while i > 0 and self._distance2(position, i) >= self.radii2[i]:
+            i = self.parents[i]
+        i = self._deepestContaining(position, i, len(self.bodies))
+        obj.soiPrimary = i
+        return i
+
+    def _pull(self, i: int, x: float, y: float) -> Tuple[float, float]:
+        """
+        Gravitational acceleration from body i at (x, y)
+        """
+        dx = self.positions[i][0] - x
+        dy = self.positions[i][1] - y
+        r = (dx * dx + dy * dy) ** 0.5
+        if r < 0.001:
+            return 0.0, 0.0
+        universe = self.universe
+        accmag = universe.G * self.bodies[i].mass * r ** (universe.rPower)
+        return accmag * (dx / r), accmag * (dy / r)
+
+    def getA(self, obj: "SpaceObjectModel") -> Vec2:
+        """
+        Get the gravitational acceleration on massless obj from its primary
+        and the perturbers
+        """
+        x, y = obj.kinematics.position.tuple()
+        axs = [0.0]
+        ays = [0.0]
+        self.accumulate([obj], [0], [x], [y], axs, ays)
+        return Vec2(axs[0], ays[0])
+
+    def accumulate(
+        self,
+        objects: Sequence["SpaceObjectModel"],
+        indices: Sequence[int],
+        xs: Sequence[float],
+        ys: Sequence[float],
+        axs: MutableSequence[float],
+        ays: MutableSequence[float],
+    ) -> None:
+        """
+        Add getA of the massless objects at indices, at positions xs and ys,
+        to axs and ays
+
+        What only depends on the primary, its own acceleration and the
+        perturbers' pull on it, is found once per primary rather than once
+        per object.
+        """
+        if not self.bodies:
+            return
+        ## (ax, ay, [(j, tidal offset x, y) for each perturber j]) by primary
+        frames: Dict[int, Tuple[float, float, List[Tuple[int, float, float]]]] = {}
+        for iObj in indices:
+            x = xs[iObj]
+            y = ys[iObj]
+            i = self._primaryIndex(objects[iObj], (x, y))
+            frame = frames.get(i)
+            if frame is None:
+                frame = frames[i] = self._frame(i)
+            ax, ay = self._pull(i, x, y)
+            ax += frame[0]
+            ay += frame[1]
+            for j, bx, by in frame[2]:
+                px, py = self._pull(j, x, y)
+                ## only the tidal part, since the primary's acceleration is
+                ## included
+                ax += px - bx
+                ay += py - by
+            axs[iObj] += ax
+            ays[iObj] += ay
+
+    def _frame(self, i: int) -> Tuple[float, float, List[Tuple[int, float, float]]]:
+        """
+        Gravitational acceleration of body i from all of the other bodies,
+        where they are now, and the pull of each perturber on it, which
+        objects in its SOI feel as well
+        """
+        ax = ay = 0.0
+        if i > 0:
+            for j in range(len(self.bodies)):
+                if j != i:
+                    px, py = self._pull(j, *self.positions[i])
+                    ax += px
+                    ay += py
+        perturbers: List[Tuple[int, float, float]] = []
+        for j in self.perturberIndices:
+            if j == i:
+                continue
+            bx = by = 0.0
+            if i > 0:
+                bx, by = self._pull(j, *self.positions[i])
+            perturbers.append((j, bx, by))
+        return ax, ay, perturbers
@@ -4,11 +4,13 @@ SpaceObjects include planets and spacecraft
 
 import pygame  # type: ignore
 from math import sqrt
-from utils import load_image, Vec2
+from utils import Vec2
 import math
+from functools import lru_cache
 from typing import Optional, List, Any, Tuple, TYPE_CHECKING
 
 from kinematics import ObjectKinematics
+from assetcache import defaultCache
 
 if TYPE_CHECKING:
     from universe import UniverseModel, UniverseView, UniverseCtrl
@@ -31,24 +33,35 @@ class SpaceObjectModel:
         )
         self.thrustVec: Vec2 = Vec2(0.0, 0.0)
         self.mass: float = mass
+        self.radius: float = 0.0  # meters, used for collision detection
         self.universe: Optional[UniverseModel] = None
+        self.soiPrimary: int = -1  # cached by soi.SphereOfInfluenceTree
+        self.handle: int = -1  # set by UniverseModel.addObject
+        ## index in the universe's massiveObjects or masslessObjects
+        self.listIndex: int = -1
 
-        self.burnSchedule: List[
-            List[float]
-        ] = []  # Each entry is a list [startTime,endTime,thrust]
+        self.burnSchedule: List[List[float]] = (
+            []
+        )  # Each entry is a list [startTime,endTime,thrust]
 
-    def update1(self, dt: float) -> None:
+    def update1(self, dt: float, gravity: Optional[Vec2] = None) -> None:
         """
         Updates the acceleration and some of thrust
+
+        gravity is the gravitational acceleration on self, if it's already
+        been found, otherwise it's asked of the universe
         """
         if self.universe is None:
             raise ValueError("self.universe hasn't yet been assigned")
-        currentPos = self.kinematics.getPosition()
-        newA = self.universe.getA(currentPos)
+        newA = self.universe.getAOn(self) if gravity is None else gravity
         newA += self.thrustVec
         self.kinematics.updateAcceleration(newA)
+        self.updateBurnSchedule(dt)
 
-        # Update Thrust Control
+    def updateBurnSchedule(self, dt: float) -> None:
+        """
+        Advance the burn schedule by dt and set thrust from it
+        """
         self.thrust = 0.0
         for iEntry in reversed(list(range(len(self.burnSchedule)))):
             self.burnSchedule[iEntry][0] -= dt
@@ -63,13 +76,29 @@ class SpaceObjectModel:
         updates the position, velocity, and the rest of thrust
         """
         self.kinematics.updatePosVel(dt)
-        # Update Actual Thrust
+        self.updateThrustVec()
+
+    def updateThrustVec(self) -> None:
+        """
+        Update the actual thrust, along the velocity
+        """
         vNorm = Vec2(1.0, 0.0)  # in case velocity is 0.
         vMag = self.kinematics.getVelocity().magnitude()
         if vMag > 0.0:
             vNorm = self.kinematics.getVelocity().normalized()
         self.thrustVec = self.thrust * self.maxThrust * vNorm
 
+    def isCoasting(self, dt: float) -> bool:
+        """
+        True if this object won't thrust at all during the next step of dt
+        """
+        if self.thrust != 0.0 or self.thrustVec.x != 0.0 or self.thrustVec.y != 0.0:
+            return False
+        for burn in self.burnSchedule:
+            if burn[0] <= dt:
+                return False
+        return True
+
     def scheduleBurn(
         self, startTime: float, endTime: float, thrustDirection: float
     ) -> None:
@@ -83,7 +112,7 @@ class SpaceObjectModel:
         m = 0.0
         if self.mass != None:
             m = self.mass
-        result = "SpaceObjectModel: m: {0:9.2e} {}\n"
+        result = "SpaceObjectModel: m: {0:9.2e} {1}\n"
         result = result.format(m, self.kinematics)
         for i in self.burnSchedule:
             result += "  burn start: {0:10.2e}s, end: {1:10.2e}s, direction: {2:5.2f}\n".format(
@@ -94,8 +123,10 @@ class SpaceObjectModel:
 
 class SpaceObjectView(pygame.sprite.Sprite):
     """
-    Handles the actual sprite in the game window, as well
-    as drawing a flame while thrusting
+    Handles the actual sprite in the game window. Its image is shared with
+    the other sprites of the same image file and scale, and never drawn
+    on; the selection border and thrust flame are overlays drawn by the
+    UniverseView's renderer.SpriteRenderer
     """
 
     # These are the main variables pygame sees
@@ -103,10 +134,14 @@ class SpaceObjectView(pygame.sprite.Sprite):
     rect: pygame.rect.Rect
     directionDeg: float
     thrust: float
-    thrustDrawn: bool
-    imageOrig: pygame.surface.Surface
     selected: bool
     universe: Optional["UniverseView"]
+    ## thrust flame overlay, if thrusting
+    flame: Optional[pygame.surface.Surface]
+    ## thrust and direction the flame was last found for
+    flameDrawn: Optional[Tuple[float, float]]
+    ## image file and scale, for reusing this sprite
+    imageKey: Tuple[str, float]
 
     def __init__(self, img: str, scaleImg: float, x: int, y: int) -> None:
         """
@@ -115,39 +150,23 @@ class SpaceObjectView(pygame.sprite.Sprite):
         x, y: initial x, y position in pixel coordinates
         """
         pygame.sprite.Sprite.__init__(self)
-        self.image, self.rect = self._setup_sprite(img, scaleImg, x, y)
+        self.image = spriteImage(img, scaleImg)
+        self.rect = self.image.get_rect()
+        self.imageKey = (img, scaleImg)
+        self.reset(x, y)
+
+    def reset(self, x: int, y: int) -> None:
+        """
+        Put this sprite back the way it was made, at pixel x, y, for reuse
+        """
         self.setXY(x, y)
         self.directionDeg = 0.0
         self.thrust = 0.0
-        self.thrustDrawn = False
-        self.imageOrig = self.image.copy()
+        self.flame = None
+        self.flameDrawn = None
         self.selected = False
         self.universe = None
 
-    def _setup_sprite(
-        self, img: str, scaleImg: float, x: float, y: float
-    ) -> Tuple[pygame.surface.Surface, pygame.rect.Rect]:
-        """
-        Loads image into a surface and rect
-        The image is scaled up by scale factor scaleImage
-            and a border is expanded so a box can be drawn when selected
-        """
-        loadedImage, loadedRect = load_image(img)
-        loadedRect.w = int(loadedRect.w * scaleImg)
-        loadedRect.h = int(loadedRect.h * scaleImg)
-        loadedImage = pygame.transform.smoothscale(loadedImage, loadedRect.size)
-        ## Inflate the size of the rect so that a border can be drawn around the object
-        rect = pygame.Rect(loadedRect)
-        rect.inflate_ip(loadedRect.w // 3, loadedRect.h // 3)
-        rect.x = 0
-        rect.y = 0
-        loadedRect.centerx = rect.centerx
-        loadedRect.centery = rect.centery
-        image = pygame.Surface(rect.size).convert_alpha()
-        image.fill((255, 255, 255, 0))
-        image.blit(loadedImage, loadedRect)
-        return image, rect
-
     def setUniverse(self, universe: "UniverseView") -> None:
         """
         Set the UniverseView containing this SpaceObjectView
@@ -169,66 +188,56 @@ class SpaceObjectView(pygame.sprite.Sprite):
 
     def select(self) -> None:
         """
-        Set this object as selected, and draw a border around it to show that
+        Set this object as selected, so a border is drawn around it
         """
         if self.universe is None:
             raise ValueError("self.universe hasn't yet been assigned")
         self.selected = True
         self.universe.selected.add(self)
-        self.image.fill((255, 255, 255, 255))
-        innerRect = pygame.Rect(self.rect)
-        innerRect.w = innerRect.w - 4
-        innerRect.h = innerRect.h - 4
-        innerRect.centerx = self.rect.w // 2
-        innerRect.centery = self.rect.h // 2
-        self.image.fill((255, 255, 255, 0), innerRect)
-        self.image.blit(self.imageOrig, (0, 0))
-
-    def drawThrustFlame(self) -> None:
-        """
-        Draws a little flame indicating an object is thrusting and in which direction
-        """
-        flameSize = (12, 12)
-        flameColor = (255, 200, 0, 255)
-        w2 = flameSize[0] / 2
-        l2 = flameSize[1] / 2
-        rotation = self.directionDeg
-        if self.thrust > 0.0:
-            rotation += 180.0
-        ## Drawing a triangle
-        points = [
-            Vec2(w2, l2),
-            Vec2(w2, -l2),
-            Vec2(-w2, 0),
-        ]
-        position = Vec2(self.rect.w / 2 - flameSize[0] / 2, 0).rotated(rotation) + Vec2(
-            self.rect.w / 2, self.rect.h / 2
-        )
-        for i in range(len(points)):
-            points[i].rotate(rotation)
-            points[i] += position
-        pygame.draw.polygon(self.image, flameColor, [i.tuple() for i in points])
 
     def deSelect(self) -> None:
         """
-        Make sure this object isn't selected and remove and selected mark
+        Make sure this object isn't selected
         """
         self.selected = False
-        self.image = self.imageOrig.copy()
 
     def update(self, *args: Any, **kwargs: Any) -> None:
         """
-        Update this image by drawing thrust cone
-        """
-        if self.thrust != 0.0:
-            self.image.fill((0, 0, 0, 0))
-            self.image.blit(self.imageOrig, (0, 0))
-            self.drawThrustFlame()
-            self.thrustDrawn = True
-        elif self.thrustDrawn:
-            self.image.fill((0, 0, 0, 0))
-            self.image.blit(self.imageOrig, (0, 0))
-            self.thrustDrawn = False
+        Find the thrust flame overlay, if it's changed
+        """
+        if self.thrust == 0.0:
+            self.flame = None
+            self.flameDrawn = None
+        elif self.flameDrawn != (self.thrust, self.directionDeg):
+            if self.universe is None:
+                raise ValueError("self.universe hasn't yet been assigned")
+            rotation = self.directionDeg
+            if self.thrust > 0.0:
+                rotation += 180.0
+            self.flame = self.universe.renderer.flame(self.rect.size, rotation)
+            self.flameDrawn = (self.thrust, self.directionDeg)
+
+
+@lru_cache(maxsize=None)
+def spriteImage(img: str, scaleImg: float) -> pygame.surface.Surface:
+    """
+    The image in file img, scaled up by scaleImg through the asset cache,
+    with a border expanded so a box can be drawn around it when selected.
+    Made once and shared by all of the sprites using it.
+    """
+    loadedImage = defaultCache().scaledSprite(img, scaleImg).convert_alpha()
+    loadedRect = loadedImage.get_rect()
+    ## Inflate the size of the rect so that a border can be drawn around the object
+    rect = pygame.Rect(loadedRect)
+    rect.inflate_ip(loadedRect.w // 3, loadedRect.h // 3)
+    rect.x = 0
+    rect.y = 0
+    loadedRect.centerx = rect.centerx
+    loadedRect.centery = rect.centery
+    image = pygame.Surface(rect.size).convert_alpha()
+    image.fill((255, 255, 255, 0))
+    image.blit(loadedImage, loadedRect)
+    return image
 
 
 class SpaceObjectCtrl:
@@ -248,23 +257,95 @@ class SpaceObjectCtrl:
         self.x: float = x
         self.y: float = y
         viewX, viewY = self.universe.convertCoordsModel2View(x, y)
-        self.view: SpaceObjectView = SpaceObjectView(
+        self.view: SpaceObjectView = self.universe.view.newSprite(
             image_filename, scaleImg, viewX, viewY
         )
+        ## pixel position the view was last synced to
+        self.viewXY: Tuple[int, int] = (viewX, viewY)
         self.model: SpaceObjectModel = SpaceObjectModel(Vec2(x, y), mass)
+        ## index in the universe's objects
+        self.listIndex: int = -1
         self.universe.addObject(self)
         self.selected: bool = False
+        ## model position before the latest model step, for interpolation
+        self.previousPosition: Optional[Tuple[float, float]] = None
+        ## whether the universe has stopped syncing the view while the
+        ## object can't reach the screen; see viewSleepTime
+        self.viewAsleep: bool = False
 
-    def updateViewToModel(self) -> None:
+    def savePreviousPosition(self) -> None:
         """
-        Update the view to match the model
+        Remember the model position, before the model is stepped
         """
-        viewX, viewY = self.universe.convertCoordsModel2View(
-            *self.model.kinematics.getPosition().tuple()
+        self.previousPosition = self.model.kinematics.position.tuple()
+
+    def updateViewToModel(self, alpha: float = 1.0) -> bool:
+        """
+        Update the view to match the model, returning whether it changed
+
+        alpha interpolates the position between the previous (0) and
+        current (1) model step. The view is left alone if its pixel position
+        and thrust flame would look the same, or if it's off screen and
+        stays off screen.
+        """
+        x, y = self.model.kinematics.position.tuple()
+        if self.previousPosition is not None and alpha != 1.0:
+            x = self.previousPosition[0] + alpha * (x - self.previousPosition[0])
+            y = self.previousPosition[1] + alpha * (y - self.previousPosition[1])
+        viewXY = self.universe.convertCoordsModel2View(x, y)
+        view = self.view
+        thrust = self.model.thrust
+        directionDeg = view.directionDeg
+        if thrust != 0.0:
+            directionDeg = self.model.kinematics.getDirectionDeg()
+        if (
+            viewXY == self.viewXY
+            and thrust == view.thrust
+            and directionDeg == view.directionDeg
+        ):
+            return False
+        universeView = self.universe.view
+        if not (
+            view in universeView.visible
+            or universeView.isOnScreen(viewXY, view.rect.size)
+        ):
+            ## Synced when it comes back on screen
+            self.viewXY = viewXY
+            return False
+        if viewXY != self.viewXY:
+            view.setXY(*viewXY)
+            self.viewXY = viewXY
+        view.directionDeg = directionDeg
+        view.thrust = thrust
+        return True
+
+    def viewSleepTime(self) -> float:
+        """
+        Model seconds the object can't reach the screen in, so its view
+        needn't be synced, or 0 if it's on screen or about to be
+
+        Found from how far it is off screen, less its latest step, as its
+        view is interpolated from before that, its speed, and four times its
+        gravity plus its greatest thrust as a bound on its acceleration. That's only an estimate for objects falling towards a
+        body, so the universe also limits it.
+        """
+        universe = self.universe
+        position = self.model.kinematics.position
+        x, y = universe.convertCoordsModel2ViewExact(*position.tuple())
+        width, height = universe.view.window.size
+        w, h = self.view.rect.size
+        ## pixels off screen, less one for rounding
+        outside = max(
+            -0.5 * w - x, x - width - 0.5 * w, -0.5 * h - y, y - height - 0.5 * h
         )
-        self.view.setXY(viewX, viewY)
-        self.view.directionDeg = self.model.kinematics.getDirectionDeg()
-        self.view.thrust = self.model.thrust
+        margin = (outside - 1.0) * universe.meterPerPixel
+        if self.previousPosition is not None:
+            margin -= position.distance(Vec2(*self.previousPosition))
+        if margin <= 0.0:
+            return 0.0
+        speed = self.model.kinematics.velocity.magnitude()
+        aMax = 4.0 * universe.model.getA(position).magnitude() + self.model.maxThrust
+        return 2.0 * margin / (speed + sqrt(speed * speed + 2.0 * aMax * margin))
 
     def select(self) -> None:
         """
@@ -278,5 +359,5 @@ class SpaceObjectCtrl:
         """
         Add an entry to the burn schedule
         """
-        self.model.scheduleBurn(startTime, endTime, thrust)
+        self.universe.scheduleBurn(self.model, startTime, endTime, thrust)
         self.universe.showPaths()
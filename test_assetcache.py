@@ -0,0 +1,63 @@
+import os
+
+import pygame
+import pytest
+
+import assetcache
+from assetcache import AssetCache
+
+
+def makeImage(path, color):
+    image = pygame.Surface((40, 20), pygame.SRCALPHA)
+    image.fill(color)
+    pygame.image.save(image, str(path))
+
+
+class Test_AssetCache:
+    def test_scaledImage(self, tmp_path, monkeypatch):
+        source = tmp_path / "image.png"
+        makeImage(source, (255, 0, 0, 255))
+        cacheDir = str(tmp_path / "cache")
+        image = AssetCache(cacheDir).scaledImage(str(source), (20, 10))
+        assert image.get_size() == (20, 10)
+        assert image.get_at((5, 5))[:3] == (255, 0, 0)
+        assert len(os.listdir(cacheDir)) == 1
+
+        ## A new cache, e.g. in the next launch, doesn't decode the image
+        def noLoad(filename):
+            raise AssertionError("decoded " + filename)
+
+        monkeypatch.setattr(assetcache, "_load", noLoad)
+        cached = AssetCache(cacheDir).scaledImage(str(source), (20, 10))
+        assert pygame.image.tobytes(cached, "RGB") == pygame.image.tobytes(image, "RGB")
+        monkeypatch.undo()
+
+        ## but does if the source changes
+        makeImage(source, (0, 0, 255, 255))
+        os.utime(source, ns=(0, 0))
+        changed = AssetCache(cacheDir).scaledImage(str(source), (20, 10))
+        assert changed.get_at((5, 5))[:3] == (0, 0, 255)
+        assert len(os.listdir(cacheDir)) == 2
+
+    def test_scaledSprite(self, tmp_path):
+        source = tmp_path / "sprite.png"
+        makeImage(source, (0, 255, 0, 128))
+        cache = AssetCache(str(tmp_path))
+        sprite = cache.scaledSprite(str(source), 0.5)
+        assert cache.scaledSprite(str(source), 0.5) is sprite
+        sprite = AssetCache(str(tmp_path)).scaledSprite(str(source), 0.5)
+        assert sprite.get_size() == (20, 10)
+        assert sprite.get_at((5, 5)) == (0, 255, 0, 128)
+
+    def test_unwritable(self, tmp_path):
+        source = tmp_path / "image.png"
+        makeImage(source, (255, 0, 0, 255))
+        ## a file where the directory should be
+        notADir = tmp_path / "file"
+        notADir.write_bytes(b"")
+        image = AssetCache(str(notADir)).scaledImage(str(source), (4, 4))
+        assert image.get_size() == (4, 4)
+
+    def test_background(self):
+        future = assetcache.loadInBackground(sum, [1, 2, 3])
+        assert future.result() == 6
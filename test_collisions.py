@@ -0,0 +1,110 @@
+import random
+from math import sqrt
+
+from utils import Vec2
+from spaceobject import SpaceObjectModel
+from universe import UniverseModel
+from collisions import ConjunctionDetector
+
+
+def makeObject(x, y, vx, vy, radius=0.0):
+    obj = SpaceObjectModel(Vec2(x, y))
+    obj.kinematics.velocity = Vec2(vx, vy)
+    obj.radius = radius
+    return obj
+
+
+def assertBroadPhase(detector, start, end, padding):
+    """
+    The broad phase finds each overlapping pair of boxes once, and only those
+    """
+    candidates = detector.candidatePairs(start, end, padding)
+    pairs = {tuple(sorted(p)) for p in candidates}
+    assert len(pairs) == len(candidates)
+    expected = set()
+    n = len(start)
+    for i in range(n):
+        for j in range(i + 1, n):
+            overlap = True
+            for axis in [0, 1]:
+                loI = min(start[i][axis], end[i][axis]) - padding[i]
+                hiI = max(start[i][axis], end[i][axis]) + padding[i]
+                loJ = min(start[j][axis], end[j][axis]) - padding[j]
+                hiJ = max(start[j][axis], end[j][axis]) + padding[j]
+                overlap = overlap and loI <= hiJ and loJ <= hiI
+            if overlap:
+                expected.add((i, j))
+    assert pairs == expected
+
+
+class Test_ConjunctionDetector:
+    def test_head_on(self):
+        universe = UniverseModel()
+        universe.conjunctionDetector = ConjunctionDetector(threshold=10.0)
+        a = makeObject(-1000.0, 0.0, 10.0, 0.0, radius=1.0)
+        b = makeObject(1000.0, 5.0, -10.0, 0.0, radius=2.0)
+        c = makeObject(1000.0, 500.0, -10.0, 0.0)
+        for obj in [a, b, c]:
+            universe.addObject(obj)
+        for i in range(30):
+            universe.update(7.0)
+        assert len(universe.conjunctions) == 1
+        conjunction = universe.conjunctions[0]
+        assert {id(conjunction.objA), id(conjunction.objB)} == {id(a), id(b)}
+        assert abs(conjunction.time - 100.0) < 1e-9
+        assert abs(conjunction.distance - 5.0) < 1e-9
+
+    def test_miss(self):
+        universe = UniverseModel()
+        universe.conjunctionDetector = ConjunctionDetector(threshold=10.0)
+        universe.addObject(makeObject(-1000.0, 0.0, 10.0, 0.0, radius=1.0))
+        universe.addObject(makeObject(1000.0, 20.0, -10.0, 0.0, radius=2.0))
+        for i in range(30):
+            universe.update(7.0)
+        assert universe.conjunctions == []
+
+    def test_broad_phase_matches_brute_force(self):
+        rng = random.Random(42)
+        detector = ConjunctionDetector()
+        n = 300
+        start = [(rng.uniform(0, 1e4), rng.uniform(0, 1e4)) for i in range(n)]
+        end = [(x + rng.uniform(-50, 50), y + rng.uniform(-50, 50)) for x, y in start]
+        padding = [rng.uniform(0, 100) for i in range(n)]
+        ## some that sweep across many cells, and some that don't move
+        for i in range(0, 30, 3):
+            end[i] = (rng.uniform(0, 1e4), rng.uniform(0, 1e4))
+            end[i + 1] = start[i + 1]
+            padding[i + 1] = 0.0
+        assertBroadPhase(detector, start, end, padding)
+
+    def test_broad_phase_large_boxes(self):
+        """
+        Many boxes that sweep across many cells aren't each checked against
+        every box
+        """
+        rng = random.Random(7)
+        detector = ConjunctionDetector()
+        n = 1000
+        start = [(rng.uniform(0, 1e5), rng.uniform(0, 1e5)) for i in range(n)]
+        end = [(x + rng.uniform(-50, 50), y + rng.uniform(-50, 50)) for x, y in start]
+        padding = [0.0] * n
+        for i in range(0, n, 10):
+            x, y = start[i]
+            end[i] = (x + rng.uniform(-5e3, 5e3), y + rng.uniform(-5e3, 5e3))
+        assertBroadPhase(detector, start, end, padding)
+        ## the 100 large boxes against all 1000 would be 1e5 tests
+        assert detector.nBoxTests < 1e4
+
+    def test_future(self):
+        universe = UniverseModel()
+        universe.conjunctionDetector = ConjunctionDetector(threshold=10.0)
+        universe.addObject(makeObject(-1000.0, 0.0, 10.0, 0.0))
+        universe.addObject(makeObject(1000.0, 0.0, -10.0, 0.0))
+        samples = list(
+            universe.iterFuture(
+                [i * 50.0 for i in range(10)], stopCondition=lambda s: s.conjunctions
+            )
+        )
+        assert samples[-1].time == 100.0
+        assert len(samples[-1].conjunctions) == 1
+        assert universe.conjunctions == []
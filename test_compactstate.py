@@ -0,0 +1,129 @@
+from math import sqrt
+
+import pytest
+
+from utils import Vec2
+from spaceobject import SpaceObjectModel
+from universe import UniverseModel
+from compactstate import NO_PRIMARY
+from testhelpers import mEarth
+
+r = 3.5e7
+## most a stored coordinate at r is rounded by
+rounding = r * 2.0**-24
+
+
+def errorBounds(universe, nSteps, dt):
+    """
+    Most, and typical, position error after nSteps of dt for a circular
+    orbit at r, as in compactstate's docstring
+    """
+    v = sqrt(universe.G * mEarth / r)
+    perSecond = 2.0 * v * 2.0**-24
+    mostError = nSteps * rounding + 1.5 * nSteps**2 * dt * perSecond
+    return mostError * sqrt(2.0), nSteps**1.5 * dt * perSecond
+
+
+def makeMovingEarth(earthPosition=(0.0, 0.0)):
+    universe = UniverseModel()
+    earth = SpaceObjectModel(Vec2(*earthPosition), mEarth)
+    earth.kinematics.velocity = Vec2(1e3, 0.0)
+    universe.addObject(earth)
+    return universe, earth
+
+
+def orbit(earth, universe, angle=0.0):
+    """
+    Position and velocity of a circular orbit at r around earth
+    """
+    v = sqrt(universe.G * mEarth / r)
+    p = Vec2(r, 0.0).rotated(angle) + earth.kinematics.position
+    u = Vec2(0.0, v).rotated(angle) + earth.kinematics.velocity
+    return p.x, p.y, u.x, u.y
+
+
+class Test_compactstate:
+    def test_roundTrip(self):
+        ## far from the origin, but stored relative to earth
+        universe, earth = makeMovingEarth((1e12, -3e11))
+        catalog = universe.enableCompactCatalog()
+        state = orbit(earth, universe, 30.0)
+        i = catalog.add(*state)
+        assert catalog.state(i) == pytest.approx(state, abs=rounding)
+        assert catalog.nbytes == 18 + 32
+
+    def stepBoth(self, nSteps):
+        """
+        Step objects in a universe and its catalog together, returning the
+        distances between them after nSteps
+        """
+        universe, earth = makeMovingEarth((1e12, 0.0))
+        catalog = universe.enableCompactCatalog()
+        objs = []
+        for angle in [0.0, 100.0, 200.0]:
+            x, y, vx, vy = orbit(earth, universe, angle)
+            obj = SpaceObjectModel(Vec2(x, y))
+            obj.kinematics.velocity = Vec2(vx, vy)
+            universe.addObject(obj)
+            catalog.addObject(obj)
+            objs.append(obj)
+        for i in range(nSteps):
+            universe.update(100.0)
+        errors = []
+        for i, obj in enumerate(objs):
+            x, y, vx, vy = catalog.state(i)
+            errors.append(obj.kinematics.position.distance(Vec2(x, y)))
+        return universe, errors
+
+    def test_stepMatchesModel(self):
+        universe, errors = self.stepBoth(500)
+        mostError, typicalError = errorBounds(universe, 500, 100.0)
+        for error in errors:
+            assert 0.0 < error < mostError
+
+    def test_longHorizon(self):
+        """
+        The along orbit drift grows faster than the rounding alone
+        """
+        nSteps = 20000
+        universe, errors = self.stepBoth(nSteps)
+        mostError, typicalError = errorBounds(universe, nSteps, 100.0)
+        assert max(errors) > nSteps * rounding * sqrt(2.0)
+        for error in errors:
+            assert error < mostError
+            assert error < typicalError
+
+    def test_remove(self):
+        universe, earth = makeMovingEarth()
+        catalog = universe.enableCompactCatalog()
+        states = [orbit(earth, universe, angle) for angle in [0.0, 90.0, 180.0]]
+        for state in states:
+            catalog.add(*state)
+        assert catalog.remove(0) == 2
+        assert len(catalog) == 2
+        assert catalog.state(0) == pytest.approx(states[2], abs=rounding)
+        assert catalog.remove(1) is None
+        assert catalog.state(0) == pytest.approx(states[2], abs=rounding)
+
+    def test_frames(self):
+        universe, earth = makeMovingEarth()
+        catalog = universe.enableCompactCatalog()
+        free = catalog.addFrame(origin=(r, 0.0, 0.0, 0.0))
+        state = orbit(earth, universe)
+        i = catalog.add(*state, frame=free)
+        catalog.moveFrame(free, (0.0, 0.0, 1e3, 0.0))
+        assert catalog.state(i) == pytest.approx(state, abs=rounding)
+        ## a frame stops following its primary once it's gone
+        catalog.add(*state)
+        universe.update(1.0)
+        origin = catalog.origins[0:4].tolist()
+        universe.removeObject(earth)
+        universe.update(1.0)
+        assert catalog.primaries == [NO_PRIMARY, NO_PRIMARY]
+        assert catalog.origins[0:4].tolist() == origin
+
+    def test_notCopied(self):
+        universe, earth = makeMovingEarth()
+        universe.enableCompactCatalog().add(*orbit(earth, universe))
+        futureUniverse, mlos = universe.copyUniverse()
+        assert futureUniverse.catalog is None
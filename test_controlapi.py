@@ -0,0 +1,166 @@
+import gc
+import json
+import os
+import socket
+import tempfile
+import time
+
+import pytest
+
+from controlapi import ControlServer
+from testhelpers import makeUniverse
+
+
+class Client:
+    """
+    Talks to a ControlServer, running its commands as the simulation loop
+    would while waiting for answers
+    """
+
+    def __init__(self, server, sock):
+        self.server = server
+        self.sock = sock
+        self.sock.settimeout(0.01)
+        self.buffer = b""
+        ## messages received while waiting for others
+        self.messages = []
+        self.nextId = 0
+
+    def send(self, method, **params):
+        self.nextId += 1
+        request = {"id": self.nextId, "method": method, "params": params}
+        self.sock.sendall(json.dumps(request).encode() + b"\n")
+        return self.nextId
+
+    def receive(self, condition):
+        for i in range(500):
+            self.server.process()
+            while b"\n" in self.buffer:
+                line, self.buffer = self.buffer.split(b"\n", 1)
+                self.messages.append(json.loads(line))
+            for message in self.messages:
+                if condition(message):
+                    self.messages.remove(message)
+                    return message
+            try:
+                self.buffer += self.sock.recv(65536)
+            except socket.timeout:
+                pass
+        raise AssertionError("timed out")
+
+    def call(self, method, **params):
+        requestId = self.send(method, **params)
+        return self.receive(lambda message: message.get("id") == requestId)
+
+
+@pytest.fixture
+def served():
+    universe = makeUniverse(nOrbiting=2)
+    handles = [obj.handle for obj in universe.masslessObjects]
+    server = ControlServer(universe)
+    sock = socket.create_connection(server.address)
+    yield universe, handles, Client(server, sock)
+    sock.close()
+    server.close()
+
+
+class Test_controlapi:
+    def test_getStates(self, served):
+        universe, handles, client = served
+        result = client.call("getStates")["result"]
+        assert result["time"] == 0.0
+        assert [s["handle"] for s in result["states"]] == [
+            universe.massiveObjects[0].handle
+        ] + handles
+        result = client.call("getStates", handles=handles[1:])["result"]
+        assert result["states"][0]["position"] == [0.0, 3.5e7]
+        assert "KeyError" in client.call("getStates", handles=[12345])["error"]
+        assert "unknown method" in client.call("fly")["error"]
+
+    def test_scheduleBurns(self, served):
+        universe, handles, client = served
+        burns = [
+            {"handle": handle, "start": 1e2, "end": 2e2, "thrust": 0.5}
+            for handle in handles
+        ]
+        assert client.call("scheduleBurns", burns=burns)["result"] == 2
+        for handle in handles:
+            assert universe.getObject(handle).burnSchedule == [[1e2, 2e2, 0.5]]
+        ## none are scheduled if any is bad
+        burns.append({"handle": 12345, "start": 0.0, "end": 1.0, "thrust": 0.0})
+        assert "error" in client.call("scheduleBurns", burns=burns)
+        assert len(universe.getObject(handles[0]).burnSchedule) == 1
+
+    def test_predict(self, served):
+        universe, handles, client = served
+        times = [1e3, 2e3]
+        result = client.call("predict", times=times, selected=handles[1])["result"]
+        paths, burns = universe.getFuture(times, universe.getObject(handles[1]))
+        assert result["handles"] == [handles[1], handles[0]]
+        assert result["paths"] == [[list(p.tuple()) for p in path] for path in paths]
+        assert result["burns"] == burns
+        ## predicting doesn't change the model
+        assert universe.time == 0.0
+
+    def test_subscribe(self, served):
+        universe, handles, client = served
+        subscription = client.call("subscribe", every=250.0, handles=handles[:1])
+        subscription = subscription["result"]
+        times = []
+        for i in range(6):
+            universe.update(100.0)
+            client.server.process()
+        while len(times) < 3:
+            message = client.receive(lambda message: "event" in message)
+            assert message["subscription"] == subscription
+            assert len(message["states"]) == 1
+            times.append(message["time"])
+        assert times == pytest.approx([0.0, 300.0, 600.0])
+        assert client.call("unsubscribe", subscription=subscription)["result"]
+        assert not client.server.subscriptions
+
+    def test_subscriptionObjectRemoved(self, served):
+        universe, handles, client = served
+        subscription = client.call("subscribe", every=100.0, handles=handles)
+        subscription = subscription["result"]
+        universe.removeObject(universe.getObject(handles[1]))
+        universe.update(100.0)
+        message = client.receive(lambda message: message.get("event") == "error")
+        assert message["subscription"] == subscription
+        assert "KeyError" in message["error"]
+        assert not client.server.subscriptions
+        ## and the server keeps going
+        assert len(client.call("getStates")["result"]["states"]) == 2
+
+    def test_closeWithPendingRequest(self, caplog):
+        universe = makeUniverse(nOrbiting=2)
+        server = ControlServer(universe)
+        sock = socket.create_connection(server.address)
+        try:
+            client = Client(server, sock)
+            client.call("getStates")
+            ## never processed, so still waiting on the simulation thread
+            client.send("getStates")
+            while server.commands.empty():
+                time.sleep(0.001)
+        finally:
+            server.close()
+            sock.close()
+        gc.collect()
+        assert not server.thread.is_alive()
+        assert "destroyed but it is pending" not in caplog.text
+
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="no Unix sockets")
+    def test_unixSocket(self):
+        universe = makeUniverse(nOrbiting=2)
+        path = os.path.join(tempfile.mkdtemp(), "control")
+        server = ControlServer(universe, path=path)
+        sock = socket.socket(socket.AF_UNIX)
+        sock.connect(path)
+        try:
+            client = Client(server, sock)
+            states = client.call("getStates")["result"]["states"]
+            assert len(states) == 3
+        finally:
+            sock.close()
+            server.close()
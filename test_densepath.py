@@ -0,0 +1,47 @@
+import pytest
+
+from utils import Vec2
+from spaceobject import SpaceObjectModel
+from universe import UniverseModel
+from test_universe import makeUniverse
+
+
+class Test_DensePath:
+    def test_matches_getFuture(self):
+        universe = makeUniverse()
+        universe.masslessObjects[1].scheduleBurn(1000.0, 3000.0, 1.0)
+        timePoints = [i * 1e3 for i in range(10)]
+        paths, burns = universe.getFuture(timePoints)
+        densePath = universe.getDensePath(9e3)
+        assert densePath.nObjects == 3
+        assert densePath.duration == 9e3
+        for iObject in range(3):
+            assert densePath.positionsAt(iObject, timePoints) == paths[iObject]
+            assert [densePath.burnAt(iObject, t) for t in timePoints] == burns[iObject]
+        with pytest.raises(ValueError):
+            densePath.positionAt(0, 9.1e3)
+
+    def test_between_steps(self):
+        ## With constant thrust in a straight line, the path between steps is
+        ## exactly the quadratic through them
+        universe = UniverseModel()
+        obj = SpaceObjectModel(Vec2(0.0, 0.0))
+        obj.kinematics.velocity = Vec2(10.0, 0.0)
+        obj.scheduleBurn(0.0, 1e9, 1.0)
+        universe.addObject(obj)
+        densePath = universe.getDensePath(1e3, dtStepSize=1e2)
+        a = obj.maxThrust
+        for t in [0.0, 12.5, 100.0, 123.4, 550.0, 987.6]:
+            ## No thrust in the first step, which sets the thrust direction
+            expected = 10.0 * t
+            if t > 100.0:
+                t1 = t - 100.0
+                expected = 1e3 + (10.0 + a * 50.0) * t1 + 0.5 * a * t1 * t1
+            position = densePath.positionAt(0, t)
+            assert position.isClose(Vec2(expected, 0.0), 1e-9 * max(expected, 1.0))
+
+    def test_closestTime(self):
+        universe = makeUniverse()
+        densePath = universe.getDensePath(2e4, selectedObj=universe.masslessObjects[1])
+        target = densePath.positionAt(0, 12345.6)
+        assert abs(densePath.closestTime(0, target, 11e3, 14e3) - 12345.6) < 1e-2
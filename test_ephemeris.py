@@ -0,0 +1,81 @@
+from copy import deepcopy
+import os
+
+import pytest
+
+from utils import Vec2
+from ephemeris import Ephemeris
+from testhelpers import makeUniverse, mEarth
+
+
+class Test_Ephemeris:
+    def test_samples(self):
+        universe = makeUniverse(nOrbiting=1, moon=True)
+        ephemeris = Ephemeris.generate(universe, 1e5, interval=1e3, dtStep=1e2)
+        assert ephemeris.nSamples == 101
+        assert ephemeris.tEnd == 1e5
+        integrated = deepcopy(universe)
+        for i in range(200):
+            integrated.update(1e2)
+        moon = integrated.massiveObjects[1].kinematics
+        x, y, vx, vy, ax, ay = ephemeris.stateAt(1, 2e4)
+        assert Vec2(x, y) == moon.position
+        ## velocities at the sample time, half a step after the integrator's
+        assert Vec2(vx, vy).isClose(moon.velocity + moon.acceleration * 50.0, 1e-9)
+        ## Between samples, it's close
+        for i in range(3):
+            integrated.update(1e2)
+        x, y, vx, vy, ax, ay = ephemeris.stateAt(1, 2.03e4)
+        assert Vec2(x, y).isClose(moon.position, 1e-2)
+        assert Vec2(ax, ay).isClose(
+            moon.acceleration, 1e-3 * moon.acceleration.magnitude()
+        )
+        ## and apply puts it back in the integrator's convention
+        ephemeris.apply(integrated, 2.03e4)
+        assert moon.velocity.isClose(
+            integrated.massiveObjects[1].kinematics.velocity, 1e-4
+        )
+
+        with pytest.raises(ValueError):
+            ephemeris.stateAt(1, 1.1e5)
+
+    def test_universe(self):
+        universe = makeUniverse(nOrbiting=1, moon=True)
+        integrated = deepcopy(universe)
+        universe.useEphemeris(Ephemeris.generate(universe, 1e4))
+        for i in range(150):
+            universe.update(1e2)
+            integrated.update(1e2)
+        ## Past the end of the ephemeris, bodies are integrated again
+        assert universe.time > universe.ephemeris.tEnd
+        for obj, integratedObj in zip(
+            universe.massiveObjects + universe.masslessObjects,
+            integrated.massiveObjects + integrated.masslessObjects,
+        ):
+            position = obj.kinematics.getPosition()
+            integratedPosition = integratedObj.kinematics.getPosition()
+            assert position.isClose(integratedPosition, 1.0)
+
+        with pytest.raises(ValueError):
+            makeUniverse(nOrbiting=1, moon=True).useEphemeris(
+                Ephemeris(0.0, 1e3, [mEarth], [])
+            )
+
+    def test_copies_share(self):
+        universe = makeUniverse(nOrbiting=1, moon=True)
+        universe.useEphemeris(Ephemeris.generate(universe, 1e4))
+        copy = deepcopy(universe)
+        assert copy.ephemeris is universe.ephemeris
+
+    def test_save_load(self, tmp_path):
+        universe = makeUniverse(nOrbiting=1, moon=True)
+        ephemeris = Ephemeris.generate(universe, 1e4)
+        filename = os.path.join(str(tmp_path), "bodies.ephem")
+        ephemeris.save(filename)
+        loaded = Ephemeris.load(filename)
+        assert loaded.t0 == ephemeris.t0
+        assert loaded.interval == ephemeris.interval
+        assert loaded.dtStep == ephemeris.dtStep
+        assert loaded.masses == ephemeris.masses
+        assert loaded.samples == ephemeris.samples
+        assert loaded.matches(universe)
@@ -0,0 +1,133 @@
+from math import exp
+
+import pytest
+
+from utils import Vec2
+from forces import (
+    AtmosphericDrag,
+    ForceModel,
+    J2Oblateness,
+    PointMassGravity,
+    ProgradeThrust,
+)
+from testhelpers import makeUniverse, Push, mEarth
+
+rEarth = 6.4e6
+
+
+class CountingThrust(ProgradeThrust):
+    def __init__(self):
+        self.nCalls = 0
+
+    def accumulate(self, *args):
+        self.nCalls += 1
+        super().accumulate(*args)
+
+
+class Test_forces:
+    def test_matchesGetA(self):
+        universe = makeUniverse(nOrbiting=2, moon=True)
+        obj = universe.masslessObjects[0]
+        obj.thrustVec = Vec2(0.01, -0.02)
+        objects = universe.massiveObjects + universe.masslessObjects
+        axs, ays = ForceModel().accelerations(universe, objects)
+        for obj, ax, ay in zip(objects, axs, ays):
+            a = universe.getA(obj.kinematics.position) + obj.thrustVec
+            assert (ax, ay) == a.tuple()
+
+    def test_stepMatchesUpdate(self):
+        universe = makeUniverse(nOrbiting=2, moon=True)
+        universe.masslessObjects[0].scheduleBurn(0.0, 500.0, 1.0)
+        other = makeUniverse(nOrbiting=2, moon=True)
+        other.masslessObjects[0].scheduleBurn(0.0, 500.0, 1.0)
+        for i in range(20):
+            universe.update(100.0)
+            for obj in other.massiveObjects + other.masslessObjects:
+                obj.update1(100.0)
+            for obj in other.massiveObjects + other.masslessObjects:
+                obj.update2(100.0)
+        for obj, otherObj in zip(
+            universe.massiveObjects + universe.masslessObjects,
+            other.massiveObjects + other.masslessObjects,
+        ):
+            assert obj.kinematics == otherObj.kinematics
+            assert obj.thrustVec == otherObj.thrustVec
+
+    def test_activeTermsOnly(self):
+        universe = makeUniverse(nOrbiting=2, moon=True)
+        thrust = CountingThrust()
+        universe.forceModel = ForceModel([PointMassGravity(), thrust])
+        universe.update(100.0)
+        assert thrust.nCalls == 0
+        universe.masslessObjects[0].scheduleBurn(0.0, 500.0, 1.0)
+        ## thrust starts the step after the burn does
+        universe.update(100.0)
+        universe.update(100.0)
+        assert thrust.nCalls == 1
+
+    def test_J2(self):
+        universe = makeUniverse(nOrbiting=0, radii=[2 * rEarth])
+        earth = universe.massiveObjects[0]
+        j2 = 1.083e-3
+        objects = universe.masslessObjects
+        axs, ays = ForceModel([J2Oblateness(earth, j2, rEarth)]).accelerations(
+            universe, objects
+        )
+        expected = 1.5 * j2 * universe.G * mEarth * rEarth**2 / (2 * rEarth) ** 4
+        assert axs[0] == pytest.approx(-expected)
+        assert ays[0] == 0.0
+
+    def test_drag(self):
+        universe = makeUniverse(nOrbiting=0, radii=[rEarth + 2e5, rEarth + 2e6])
+        earth = universe.massiveObjects[0]
+        drag = AtmosphericDrag(earth, rEarth, maxAltitude=1e6)
+        objects = universe.masslessObjects
+        axs, ays = ForceModel([drag]).accelerations(universe, objects)
+        ## against the velocity, and none above maxAltitude
+        assert axs[0] == 0.0
+        assert ays[0] < 0.0
+        assert (axs[1], ays[1]) == (0.0, 0.0)
+        v = objects[0].kinematics.velocity.y
+        density = 1.225 * exp(-2e5 / 8.5e3)
+        assert -ays[0] == pytest.approx(density * v**2 / 2.0 / 100.0)
+
+    def test_extraTerms(self):
+        universe = makeUniverse(nOrbiting=2, moon=True)
+        other = makeUniverse(nOrbiting=2, moon=True)
+        ## which would otherwise be propagated analytically
+        universe.analyticCoasting = True
+        universe.forceModel.add(Push())
+        universe.update(1.0)
+        other.update(1.0)
+        for obj, otherObj in zip(universe.masslessObjects, other.masslessObjects):
+            dv = obj.kinematics.velocity.x - otherObj.kinematics.velocity.x
+            assert dv == pytest.approx(1.0)
+
+    def test_sphereOfInfluence(self):
+        universe = makeUniverse(nOrbiting=2, moon=True)
+        universe.enableSphereOfInfluence()
+        other = makeUniverse(nOrbiting=2, moon=True)
+        other.enableSphereOfInfluence()
+        pushed = makeUniverse(nOrbiting=2, moon=True)
+        pushed.enableSphereOfInfluence()
+        pushed.forceModel.add(Push())
+        for i in range(20):
+            universe.update(100.0)
+            pushed.update(100.0)
+            other.sphereOfInfluence.update()
+            for obj in other.massiveObjects + other.masslessObjects:
+                obj.update1(100.0)
+            for obj in other.massiveObjects + other.masslessObjects:
+                obj.update2(100.0)
+            other.time += 100.0
+        for obj, otherObj in zip(
+            universe.massiveObjects + universe.masslessObjects,
+            other.massiveObjects + other.masslessObjects,
+        ):
+            assert obj.kinematics == otherObj.kinematics
+        ## other terms still apply
+        for obj, pushedObj in zip(universe.masslessObjects, pushed.masslessObjects):
+            dv = pushedObj.kinematics.velocity.x - obj.kinematics.velocity.x
+            assert dv == pytest.approx(20 * 100.0)
+        universe.disableSphereOfInfluence()
+        assert type(universe.forceModel.terms[0]) is PointMassGravity
@@ -0,0 +1,104 @@
+from copy import deepcopy
+import random
+
+import pytest
+
+from utils import Vec2
+from spaceobject import SpaceObjectModel
+from gravitygrid import GravityGrid
+from forces import GridGravity, PointMassGravity
+from testhelpers import makeUniverse, Push, mMoon, rMoon
+
+
+def fieldStrength(universe, x, y):
+    result = 0.0
+    for body in universe.massiveObjects:
+        r = body.kinematics.position.distance(Vec2(x, y))
+        result += universe.G * body.mass * r**universe.rPower
+    return result
+
+
+class Test_GravityGrid:
+    @pytest.mark.parametrize("withMoon", [False, True])
+    def test_error(self, withMoon):
+        universe = makeUniverse(moon=withMoon)
+        grid = GravityGrid(universe, rMin=6.4e6, rMax=1e9, cellsPerSide=64)
+        assert grid.maxRelativeError < 3e-3
+        rng = random.Random(1234)
+        xs = [rng.uniform(-1e9, 1e9) for i in range(2000)]
+        ys = [rng.uniform(-1e9, 1e9) for i in range(2000)]
+        axs, ays = grid.accelerations(xs, ys)
+        for x, y, ax, ay in zip(xs, ys, axs, ays):
+            exact = universe.getA(Vec2(x, y))
+            error = Vec2(ax, ay).distance(exact)
+            assert error <= 1.01 * grid.maxRelativeError * fieldStrength(universe, x, y)
+            assert (ax, ay) == grid.accelerationAt(x, y)
+        ## Near the centre, it's analytic
+        ax, ay = grid.accelerationAt(1e6, 0.0)
+        assert Vec2(ax, ay).isClose(universe.getA(Vec2(1e6, 0.0)), 1e-12)
+
+    def test_universe(self):
+        universe = makeUniverse()
+        analytic = deepcopy(universe)
+        universe.enableGravityGrid(rMin=6.4e6)
+        assert deepcopy(universe).gravityGrid is universe.gravityGrid
+        for i in range(100):
+            universe.update(100.0)
+            analytic.update(100.0)
+        assert universe.gravityGrid is not None
+        for obj, analyticObj in zip(universe.masslessObjects, analytic.masslessObjects):
+            position = obj.kinematics.getPosition()
+            assert position.isClose(analyticObj.kinematics.getPosition(), 1e4)
+
+    def test_forceTerm(self):
+        universe = makeUniverse()
+        universe.enableGravityGrid(rMin=6.4e6)
+        assert isinstance(universe.forceModel.terms[0], GridGravity)
+        other = deepcopy(universe)
+        pushed = deepcopy(universe)
+        pushed.forceModel.add(Push())
+        grid = universe.gravityGrid
+        for i in range(10):
+            universe.update(100.0)
+            pushed.update(100.0)
+            objects = other.massiveObjects + other.masslessObjects
+            for obj in objects:
+                gravity = None
+                if obj.mass == 0.0:
+                    gravity = Vec2(
+                        *grid.accelerationAt(*obj.kinematics.position.tuple())
+                    )
+                obj.update1(100.0, gravity)
+            for obj in objects:
+                obj.update2(100.0)
+        for obj, otherObj, pushedObj in zip(
+            universe.masslessObjects, other.masslessObjects, pushed.masslessObjects
+        ):
+            assert obj.kinematics == otherObj.kinematics
+            dv = pushedObj.kinematics.velocity.x - obj.kinematics.velocity.x
+            assert dv == pytest.approx(10 * 100.0, abs=1.0)
+        universe.disableGravityGrid()
+        assert type(universe.forceModel.terms[0]) is PointMassGravity
+
+    def test_invalidated(self):
+        universe = makeUniverse()
+        universe.enableGravityGrid(rMin=6.4e6)
+        universe.update(100.0)
+        assert universe.gravityGrid is not None
+        universe.massiveObjects[0].kinematics.velocity = Vec2(1.0, 0.0)
+        universe.update(100.0)
+        universe.update(100.0)
+        assert universe.gravityGrid is None
+        assert type(universe.forceModel.terms[0]) is PointMassGravity
+
+        ## A moving body isn't accepted in the first place
+        with pytest.raises(ValueError):
+            universe.enableGravityGrid(rMin=6.4e6)
+        universe.massiveObjects[0].kinematics.velocity = Vec2(0.0, 0.0)
+        universe.enableGravityGrid(rMin=6.4e6)
+        universe.addObject(SpaceObjectModel(Vec2(rMoon, 0.0), mMoon))
+        assert universe.gravityGrid is None
+        assert type(universe.forceModel.terms[0]) is PointMassGravity
+        with pytest.raises(ValueError):
+            universe.enableGravityGrid(rMin=6.4e6)
+        assert universe.gravityGrid is None
@@ -0,0 +1,82 @@
+from math import sqrt, pi
+
+import pytest
+
+from kepler import KeplerError, propagateKepler, stumpffS, stumpffC
+
+mu = 6.67e-11 * 6.0e24
+r = 3.5e7
+vCirc = sqrt(mu / r)
+
+
+def leapfrog(x, y, vx, vy, dt, h):
+    def acc(x, y):
+        r3 = (x * x + y * y) ** 1.5
+        return -mu * x / r3, -mu * y / r3
+
+    ax, ay = acc(x, y)
+    for i in range(int(round(dt / h))):
+        vx += 0.5 * ax * h
+        vy += 0.5 * ay * h
+        x += vx * h
+        y += vy * h
+        ax, ay = acc(x, y)
+        vx += 0.5 * ax * h
+        vy += 0.5 * ay * h
+    return x, y, vx, vy
+
+
+class Test_propagateKepler:
+    def test_stumpff_continuous(self):
+        for z in [1e-3, -1e-3]:
+            ## z is on the closed-form side, z * (1 - 1e-9) on the series side
+            assert abs(stumpffS(z) - stumpffS(z * (1 - 1e-9))) < 1e-11
+            assert abs(stumpffC(z) - stumpffC(z * (1 - 1e-9))) < 1e-11
+
+    def test_circular(self):
+        period = 2 * pi * sqrt(r**3 / mu)
+        x, y, vx, vy = propagateKepler(mu, r, 0.0, 0.0, vCirc, period)
+        assert abs(x - r) < 1e-3 and abs(y) < 1e-3
+        assert abs(vx) < 1e-9 and abs(vy - vCirc) < 1e-9
+        x, y, vx, vy = propagateKepler(mu, r, 0.0, 0.0, vCirc, period / 4)
+        assert abs(x) < 1e-3 and abs(y - r) < 1e-3
+        assert abs(vx + vCirc) < 1e-9 and abs(vy) < 1e-9
+
+    def test_elliptic_and_hyperbolic(self):
+        for speed in [0.7 * vCirc, 1.2 * vCirc, 1.6 * vCirc]:
+            expected = leapfrog(r, 0.0, 0.0, speed, 2e4, 1.0)
+            result = propagateKepler(mu, r, 0.0, 0.0, speed, 2e4)
+            for e, res in zip(expected[:2], result[:2]):
+                assert abs(e - res) < 10.0
+            for e, res in zip(expected[2:], result[2:]):
+                assert abs(e - res) < 1e-3
+
+    def test_zero(self):
+        assert propagateKepler(mu, r, 0.0, 0.0, vCirc, 0.0) == (r, 0.0, 0.0, vCirc)
+
+    def test_large_steps(self):
+        """
+        Hyperbolic and near parabolic orbits over steps as long as the time
+        warp takes, or much longer, conserve energy and angular momentum,
+        and agree with taking the step in two halves
+        """
+        cases = [(mu, speed, dt) for speed in [2.5, 1.2, 0.7] for dt in [1e5, 1e6]]
+        cases += [
+            (mu, sqrt(2.0) * (1 + d), dt)
+            for d in [-1e-9, 0.0, 1e-9]
+            for dt in [1e5, 1e6]
+        ]
+        cases += [(4e14, 3.0, dt) for dt in [1e5, 1e6, 1e8, -1e6]]
+        for m, speed, dt in cases:
+            v = speed * sqrt(m / r)
+            x, y, vx, vy = propagateKepler(m, r, 0.0, 0.0, v, dt)
+            energy = (vx * vx + vy * vy) / 2.0 - m / sqrt(x * x + y * y)
+            assert abs(energy - (v * v / 2.0 - m / r)) < 1e-8 * m / r
+            assert abs(x * vy - y * vx - r * v) < 1e-12 * r * v
+            half = propagateKepler(m, r, 0.0, 0.0, v, dt / 2.0)
+            for a, b in zip(propagateKepler(m, *half, dt / 2.0), (x, y, vx, vy)):
+                assert abs(a - b) <= 1e-9 * max(abs(b), 1.0)
+
+    def test_no_convergence(self):
+        with pytest.raises(KeplerError):
+            propagateKepler(mu, r, 0.0, 0.0, 3.0 * vCirc, 1e5, maxIterations=1)
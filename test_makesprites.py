@@ -0,0 +1,58 @@
+import pygame  # type: ignore
+import os.path
+
+from makesprites import recolorPixels, appendSurfaces, staleJobs, jobKey, saveManifest
+
+
+class Test_recolorPixels:
+    def test_replaces_close_colors(self):
+        data = bytes([0, 0, 0, 255, 50, 50, 50, 128, 200, 200, 200, 255])
+        result = recolorPixels(data, (0, 0, 0), (255, 0, 0), 0.4)
+        assert result == bytes([255, 0, 0, 255, 255, 0, 0, 128, 200, 200, 200, 255])
+
+    def test_keeps_alpha(self):
+        data = bytes([255, 255, 255, 0])
+        result = recolorPixels(data, (255, 255, 255), (0, 255, 255), 0.4)
+        assert result == bytes([0, 255, 255, 0])
+
+    def test_fuzz(self):
+        data = bytes([100, 0, 0, 255])
+        assert recolorPixels(data, (0, 0, 0), (1, 2, 3), 0.5) == bytes([1, 2, 3, 255])
+        assert recolorPixels(data, (0, 0, 0), (1, 2, 3), 0.3) == data
+
+
+class Test_appendSurfaces:
+    def test_sizes(self):
+        a = pygame.Surface((4, 2), pygame.SRCALPHA, 32)
+        b = pygame.Surface((3, 5), pygame.SRCALPHA, 32)
+        assert appendSurfaces([a, b]).get_size() == (7, 5)
+        assert appendSurfaces([a, b], vertical=True).get_size() == (4, 7)
+
+
+class Test_staleJobs:
+    def test_manifest(self, tmp_path):
+        src = tmp_path / "in.png"
+        src.write_bytes(b"abc")
+        out = tmp_path / "out"
+        out.mkdir()
+        job = ("out.png", "shave", [str(src)], {"shave": [1, 1]})
+        stale, keys = staleJobs([job], str(out))
+        assert stale == [job]
+
+        (out / "out.png").write_bytes(b"")
+        saveManifest(str(out), keys)
+        stale, keys2 = staleJobs([job], str(out))
+        assert stale == []
+        assert keys2 == keys
+
+        src.write_bytes(b"abcd")
+        stale, keys3 = staleJobs([job], str(out))
+        assert stale == [job]
+        assert keys3 != keys
+
+    def test_params_change_key(self, tmp_path):
+        src = tmp_path / "in.png"
+        src.write_bytes(b"abc")
+        job1 = ("out.png", "shave", [str(src)], {"shave": [1, 1]})
+        job2 = ("out.png", "shave", [str(src)], {"shave": [2, 1]})
+        assert jobKey(job1) != jobKey(job2)
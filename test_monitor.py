@@ -0,0 +1,89 @@
+from math import sqrt
+
+import pytest
+
+from utils import Vec2
+from spaceobject import SpaceObjectModel
+from universe import UniverseModel
+from monitor import potential, conservedQuantities, SYSTEM
+from testhelpers import mEarth
+
+
+def makeScaledUniverse(rPower=-2.0):
+    universe = UniverseModel(rPower=rPower)
+    ## Same gravity at 3.5e7 m whatever rPower is
+    mass = mEarth * 3.5e7 ** (-2.0 - rPower)
+    universe.addObject(SpaceObjectModel(Vec2(0.0, 0.0), mass))
+    for r in [3.5e7, 5e7]:
+        obj = SpaceObjectModel(Vec2(r, 0.0))
+        ## circular speed is sqrt(r a)
+        obj.kinematics.velocity = Vec2(0.0, sqrt(universe.G * mass * r ** (rPower + 1)))
+        universe.addObject(obj)
+    return universe
+
+
+def maxErrors(dt, nSteps=200, rPower=-2.0):
+    universe = makeScaledUniverse(rPower)
+    universe.enableConservationMonitor(every=10)
+    for i in range(nSteps):
+        universe.update(dt)
+    monitor = universe.conservationMonitor
+    return monitor.maxEnergyError, monitor.maxAngularMomentumError
+
+
+class Test_potential:
+    @pytest.mark.parametrize("rPower", [-2.0, -1.0, -3.0])
+    def test_gradient(self, rPower):
+        mu = 3.0
+        r = 2.0
+        dr = 1e-6
+        force = -(potential(mu, r + dr, rPower) - potential(mu, r - dr, rPower)) / (
+            2 * dr
+        )
+        assert force == pytest.approx(-mu * r**rPower, rel=1e-6)
+
+
+class Test_ConservationMonitor:
+    @pytest.mark.parametrize("rPower", [-2.0, -1.0])
+    def test_step_size(self, rPower):
+        smallEnergy, smallAngular = maxErrors(10.0, 2000, rPower)
+        bigEnergy, bigAngular = maxErrors(100.0, 200, rPower)
+        ## for circular orbits, the energy error goes as the step size squared
+        assert bigEnergy / smallEnergy == pytest.approx(100.0, rel=0.2)
+        ## and around a single body, angular momentum is conserved exactly
+        assert smallAngular < 1e-12 and bigAngular < 1e-12
+
+    def test_thrust(self):
+        universe = makeScaledUniverse()
+        universe.enableConservationMonitor(every=5)
+        universe.masslessObjects[0].scheduleBurn(1e3, 2e3, 1.0)
+        for i in range(100):
+            universe.update(100.0)
+        monitor = universe.conservationMonitor
+        assert monitor.nSamples == 20
+        assert monitor.maxEnergyError < 0.05
+        assert monitor.energyDriftRate == pytest.approx(
+            monitor.energyError / 1e4, rel=0.5
+        )
+        assert "energy error" in str(universe)
+
+        universe.removeObject(universe.massiveObjects[0])
+        universe.update(100.0)
+        assert monitor.maxEnergyError == 0.0
+
+    def test_quantities(self):
+        universe = makeScaledUniverse()
+        moon = SpaceObjectModel(Vec2(3.84e8, 0.0), 7.35e22)
+        moon.kinematics.velocity = Vec2(0.0, 1.0e3)
+        universe.addObject(moon)
+        quantities = conservedQuantities(universe)
+        assert len(quantities) == 3
+        energy, angularMomentum = quantities[SYSTEM]
+        assert angularMomentum == pytest.approx(7.35e22 * 3.84e8 * 1.0e3)
+        assert energy == pytest.approx(
+            0.5 * 7.35e22 * 1e6 - universe.G * mEarth * 7.35e22 / 3.84e8
+        )
+        ## Predictions aren't monitored
+        universe.enableConservationMonitor()
+        copy, mlos = universe.copyUniverse()
+        assert copy.conservationMonitor is None
@@ -0,0 +1,167 @@
+import pytest
+
+from utils import Vec2
+from spaceobject import SpaceObjectModel
+from netsim import SimServer, SimClient, splitFrames, frame
+from testhelpers import makeUniverse
+
+
+def waitFor(server, clients, condition):
+    for i in range(200):
+        server.poll(0.001)
+        for client in clients:
+            client.poll(0.001)
+        if condition():
+            return
+    raise AssertionError("timed out")
+
+
+def assertMatches(serverModel, clientModel, tolerance):
+    serverObjs = serverModel.massiveObjects + serverModel.masslessObjects
+    clientObjs = clientModel.massiveObjects + clientModel.masslessObjects
+    assert len(serverObjs) == len(clientObjs)
+    for obj, clientObj in zip(serverObjs, clientObjs):
+        assert obj.kinematics.position.isClose(clientObj.kinematics.position, tolerance)
+    assert clientModel.time == serverModel.time
+
+
+class Test_netsim:
+    def test_splitFrames(self):
+        data = frame(b"A", b"12") + frame(b"B", b"")
+        buffer = bytearray(data[:-2])
+        assert splitFrames(buffer) == [(b"A", b"12")]
+        buffer += data[-2:]
+        assert splitFrames(buffer) == [(b"B", b"")]
+        assert buffer == bytearray()
+
+    def test_loopback(self):
+        server = SimServer(makeUniverse(nOrbiting=2, nParked=1000), keyframeEvery=1e9)
+        try:
+            first = SimClient(*server.address)
+            waitFor(server, [first], lambda: first.model is not None)
+            for i in range(20):
+                server.tick(100.0)
+            waitFor(server, [first], lambda: first.model.time == server.model.time)
+            assertMatches(server.model, first.model, 2e3)
+
+            ## Only the two moving objects are in the updates
+            before = server.bytesSent
+            server.tick(100.0)
+            assert server.bytesSent - before < 100
+
+            ## A client joining later starts from a keyframe
+            second = SimClient(*server.address)
+            waitFor(server, [second], lambda: second.model is not None)
+            server.tick(100.0)
+            clients = [first, second]
+            waitFor(
+                server,
+                clients,
+                lambda: all(c.model.time == server.model.time for c in clients),
+            )
+            for client in clients:
+                assertMatches(server.model, client.model, 2e3)
+
+            ## Commands from clients reach the server, and burns come back in
+            ## a keyframe
+            secondShip = second.model.masslessObjects[0]
+            second.sendBurn(second.remoteHandle(secondShip), 0.0, 1e3, 1.0)
+            first.sendThrust(first.remoteHandle(first.model.masslessObjects[1]), -1.0)
+            ship = server.model.masslessObjects[0]
+            waitFor(server, clients, lambda: len(ship.burnSchedule) == 1)
+            assert server.model.masslessObjects[1].thrust == -1.0
+            server.tick(100.0)
+            waitFor(
+                server,
+                clients,
+                lambda: all(
+                    len(c.model.masslessObjects[0].burnSchedule) == 1 for c in clients
+                ),
+            )
+            second.close()
+            waitFor(server, [first], lambda: len(server.clients) == 1)
+        finally:
+            server.close()
+        first.poll(0.01)
+        assert first.closed
+
+    def test_model_in_place(self):
+        server = SimServer(makeUniverse(nOrbiting=2))
+        try:
+            model = makeUniverse(nOrbiting=2)
+            ship = model.masslessObjects[0]
+            client = SimClient(*server.address, model=model)
+            for i in range(5):
+                server.tick(100.0)
+            waitFor(server, [client], lambda: model.time == server.model.time)
+            assert client.model is model
+            assert model.masslessObjects[0] is ship
+            assertMatches(server.model, model, 2e3)
+            ## it can't follow the server's objects changing
+            server.model.removeObject(server.model.masslessObjects[0])
+            server.tick(100.0)
+            with pytest.raises(ValueError):
+                waitFor(server, [client], lambda: False)
+        finally:
+            server.close()
+            client.close()
+
+    def test_objectRemoved(self):
+        """
+        Removing an object reorders the server's massless objects, but
+        commands still reach the object they were sent for
+        """
+        server = SimServer(makeUniverse(nOrbiting=2, nParked=3))
+        try:
+            client = SimClient(*server.address)
+            waitFor(server, [client], lambda: client.model is not None)
+            last = client.model.masslessObjects[-1]
+            handle = client.remoteHandle(last)
+            server.model.removeObject(server.model.masslessObjects[0])
+            server.tick(100.0)
+            waitFor(
+                server,
+                [client],
+                lambda: len(client.model.masslessObjects) == 4,
+            )
+            last = client.objects[handle]
+            client.sendThrust(client.remoteHandle(last), -1.0)
+            waitFor(server, [client], lambda: server.model.getObject(handle).thrust)
+            assert server.model.getObject(handle).thrust == -1.0
+            assert server.model.masslessObjects[0].handle == handle
+            assertMatches(server.model, client.model, 2e3)
+        finally:
+            server.close()
+            client.close()
+
+    def test_farAway(self):
+        """
+        Objects beyond what 32 bit integers reach in quanta are sent as
+        changes, and only one that jumps too far is sent whole
+        """
+        universe = makeUniverse(nOrbiting=2)
+        for x in [5e9, -1e12]:
+            obj = SpaceObjectModel(Vec2(x, 3e9))
+            obj.kinematics.velocity = Vec2(1e4, -1e4)
+            universe.addObject(obj)
+        server = SimServer(universe, keyframeEvery=1e9)
+        try:
+            client = SimClient(*server.address)
+            waitFor(server, [client], lambda: client.model is not None)
+            server.tick(100.0)
+            waitFor(server, [client], lambda: client.model.time == universe.time)
+            for i in range(20):
+                before = server.bytesSent
+                server.tick(100.0)
+                assert server.bytesSent - before < 150
+            waitFor(server, [client], lambda: client.model.time == universe.time)
+            assertMatches(universe, client.model, 1.0)
+            before = server.bytesSent
+            universe.masslessObjects[-1].kinematics.position.x += 1e10
+            server.tick(100.0)
+            assert server.bytesSent - before < 300
+            waitFor(server, [client], lambda: client.model.time == universe.time)
+            assertMatches(universe, client.model, 1.0)
+        finally:
+            server.close()
+            client.close()
@@ -0,0 +1,49 @@
+from objectpool import ObjectPool, swapRemove
+
+
+class Test_ObjectPool:
+    def test_handles(self):
+        pool = ObjectPool()
+        handles = [pool.add(name) for name in "abc"]
+        assert [pool.get(h) for h in handles] == ["a", "b", "c"]
+        assert pool.remove(handles[1]) == "b"
+        assert pool.get(handles[1]) is None
+        assert len(pool) == 2 and list(pool) == ["a", "c"]
+        handleD = pool.add("d")
+        assert len(pool.slots) == 3
+        assert pool.get(handleD) == "d" and pool.get(handles[1]) is None
+        try:
+            pool.remove(handles[1])
+        except KeyError:
+            pass
+        else:
+            assert False
+
+    def test_churn(self):
+        pool = ObjectPool()
+        live = []
+        for i in range(1000):
+            live.append((pool.add(i), i))
+            if len(live) > 10:
+                handle, obj = live.pop(i % 7)
+                assert pool.remove(handle) == obj
+        assert len(pool.slots) == 11
+        for handle, obj in live:
+            assert pool.get(handle) == obj
+
+    def test_subset(self):
+        pool = ObjectPool()
+        a, b, c = object(), object(), object()
+        handles = [pool.add(obj) for obj in [a, b, c]]
+        subset = pool.subset([c, a])
+        assert [subset.get(h) for h in handles] == [a, None, c]
+        assert pool.get(handles[1]) is b
+
+
+class Test_swapRemove:
+    def test_swapRemove(self):
+        items = [1, 2, 3, 4]
+        assert swapRemove(items, 1) == 4
+        assert items == [1, 4, 3]
+        assert swapRemove(items, 2) is None
+        assert items == [1, 4]
@@ -0,0 +1,136 @@
+import gc
+from copy import deepcopy
+from multiprocessing import shared_memory
+
+import pytest
+
+from utils import Vec2
+from kinematics import ObjectKinematics
+from spaceobject import SpaceObjectModel
+from parallelstep import SharedKinematics
+from recorder import packObject, unpackObject
+from testhelpers import makeUniverse
+
+
+def makeUniverseWithBurns():
+    radii = [3.5e7 + i * 1e6 for i in range(20)]
+    universe = makeUniverse(nOrbiting=0, radii=radii, moon=True)
+    universe.masslessObjects[3].scheduleBurn(1e3, 3e3, 1.0)
+    universe.masslessObjects[7].scheduleBurn(0.0, 2e3, -1.0)
+    return universe
+
+
+class Test_ParallelStepper:
+    def test_matches_serial(self):
+        universe = makeUniverseWithBurns()
+        serial = deepcopy(universe)
+        universe.enableParallelStepping(3)
+        try:
+            assert universe.copyUniverse()[0].parallelStepper is None
+            for i in range(50):
+                universe.update(100.0)
+                serial.update(100.0)
+            ## Objects added later are picked up too
+            for u in [universe, serial]:
+                u.addObject(SpaceObjectModel(Vec2(0.0, 4e7)))
+            ## and removed ones dropped, without new shared memory
+            blockNames = [block.name for block in universe.parallelStepper.blocks]
+            for u in [universe, serial]:
+                u.removeObject(u.masslessObjects[5])
+                u.removeObject(u.masslessObjects[0])
+            for i in range(10):
+                universe.update(100.0)
+                serial.update(100.0)
+            assert [b.name for b in universe.parallelStepper.blocks] == blockNames
+        finally:
+            universe.disableParallelStepping()
+        assert len(universe.masslessObjects) == 19
+        for obj, serialObj in zip(universe.masslessObjects, serial.masslessObjects):
+            assert obj.kinematics.position == serialObj.kinematics.position
+            assert obj.kinematics.velocity == serialObj.kinematics.velocity
+            assert obj.kinematics.direction == serialObj.kinematics.direction
+            assert obj.thrustVec == serialObj.thrustVec
+        for obj, serialObj in zip(universe.massiveObjects, serial.massiveObjects):
+            assert obj.kinematics.position == serialObj.kinematics.position
+        assert universe.parallelStepper is None
+
+    def test_state_in_shared_memory(self):
+        universe = makeUniverseWithBurns()
+        serial = deepcopy(universe)
+        universe.enableParallelStepping(2)
+        try:
+            assert type(universe.masslessObjects[0].kinematics) is SharedKinematics
+            copy = universe.copyUniverse()[0]
+            assert type(copy.masslessObjects[0].kinematics) is ObjectKinematics
+            for i in range(15):
+                universe.update(100.0)
+                serial.update(100.0)
+            ## Replaced kinematics are picked up by resync
+            for u in [universe, serial]:
+                u.masslessObjects[1].kinematics = ObjectKinematics(
+                    Vec2(4e7, 0.0), Vec2(0.0, 3e3)
+                )
+            universe.parallelStepper.resync()
+            ## and steps taken in this process, here through the end of a
+            ## burn, by the next parallel step
+            for u in [universe, serial]:
+                u.enableSphereOfInfluence()
+            for i in range(10):
+                universe.update(100.0)
+                serial.update(100.0)
+            for u in [universe, serial]:
+                u.disableSphereOfInfluence()
+            for i in range(10):
+                universe.update(100.0)
+                serial.update(100.0)
+        finally:
+            universe.disableParallelStepping()
+        for obj, serialObj in zip(universe.masslessObjects, serial.masslessObjects):
+            assert type(obj.kinematics) is ObjectKinematics
+            assert obj.kinematics == serialObj.kinematics
+            assert obj.kinematics.direction == serialObj.kinematics.direction
+            assert obj.thrustVec == serialObj.thrustVec
+
+    def test_restore(self):
+        """
+        State restored into objects, as a replay or stream does, without
+        the model time changing, is what gets stepped
+        """
+        universe = makeUniverseWithBurns()
+        serial = deepcopy(universe)
+        universe.enableParallelStepping(2)
+        try:
+            saved = [packObject(obj) for obj in universe.masslessObjects[:8]]
+            for i in range(15):
+                universe.update(100.0)
+                serial.update(100.0)
+            for u in [universe, serial]:
+                for obj, packed in zip(u.masslessObjects, saved):
+                    unpackObject(packed, 0, obj)
+            for i in range(15):
+                universe.update(100.0)
+                serial.update(100.0)
+        finally:
+            universe.disableParallelStepping()
+        for obj, serialObj in zip(universe.masslessObjects, serial.masslessObjects):
+            assert obj.kinematics == serialObj.kinematics
+            assert obj.thrustVec == serialObj.thrustVec
+
+    def test_dropped(self):
+        """
+        The workers and shared memory go with a model that's dropped without
+        disabling parallel stepping
+        """
+        universe = makeUniverseWithBurns()
+        universe.enableParallelStepping(2)
+        universe.update(100.0)
+        stepper = universe.parallelStepper
+        processes = list(stepper.processes)
+        blockNames = [block.name for block in stepper.blocks]
+        del universe, stepper
+        gc.collect()
+        for process in processes:
+            assert not process.is_alive()
+        for name in blockNames:
+            with pytest.raises(FileNotFoundError):
+                shared_memory.SharedMemory(name=name)
@@ -0,0 +1,60 @@
+from math import cos, sin, pi, sqrt
+
+from pathsampling import adaptiveSample, simplify, distanceToSegment
+
+
+def ellipse(t):
+    ## eccentric ellipse in pixels, traversed quickly near the left end
+    e = 0.9
+    E = t + e * sin(t)
+    return (300.0 * (cos(E) - e), 300.0 * sqrt(1 - e * e) * sin(E))
+
+
+def maxDeviation(f, times, tMin, tMax):
+    points = [f(t) for t in times]
+    result = 0.0
+    for i in range(1000):
+        t = tMin + (tMax - tMin) * i / 999
+        iSeg = max(j for j in range(len(times)) if times[j] <= t)
+        iSeg = min(iSeg, len(times) - 2)
+        result = max(result, distanceToSegment(f(t), points[iSeg], points[iSeg + 1]))
+    return result
+
+
+class Test_adaptiveSample:
+    def test_tolerance(self):
+        coarse = [2 * pi * i / 20 for i in range(21)]
+        assert maxDeviation(ellipse, coarse, 0.0, 2 * pi) > 10.0
+        times, points = adaptiveSample(ellipse, coarse, tolerance=0.5)
+        assert times[0] == 0.0 and times[-1] == 2 * pi
+        assert points == [ellipse(t) for t in times]
+        assert maxDeviation(ellipse, times, 0.0, 2 * pi) < 1.0
+        ## Most samples go where the path turns sharply
+        nearPeriapsis = [t for t in times if abs(t - pi) > pi / 2]
+        assert len(nearPeriapsis) > 2 * len(times) / 3
+
+    def test_bounds(self):
+        coarse = [2 * pi * i / 20 for i in range(21)]
+        times, points = adaptiveSample(ellipse, coarse, 0.5)
+        ## Not refined where it's off screen
+        offScreen = adaptiveSample(ellipse, coarse, 0.5, bounds=(0, -500, 500, 500))
+        assert len(offScreen[0]) < len(times)
+
+
+class Test_simplify:
+    def test_line(self):
+        points = [(float(i), 2.0 * i) for i in range(10)]
+        assert simplify(points) == [0, 9]
+
+    def test_corner(self):
+        points = [(float(i), 0.0) for i in range(5)] + [
+            (4.0, float(i)) for i in range(1, 5)
+        ]
+        assert simplify(points) == [0, 4, 8]
+        wiggle = [(float(i), 0.3 * (i % 2)) for i in range(10)]
+        assert simplify(wiggle, 0.5) == [0, 9]
+        assert len(simplify(wiggle, 0.1)) == 10
+
+    def test_short(self):
+        assert simplify([]) == []
+        assert simplify([(0.0, 0.0), (1.0, 1.0)]) == [0, 1]
@@ -0,0 +1,177 @@
+from utils import Vec2
+from spaceobject import SpaceObjectModel
+from recorder import Recorder, Replayer
+from testhelpers import makeUniverse, Push
+
+
+def positions(universe):
+    return [
+        obj.kinematics.getPosition()
+        for obj in universe.massiveObjects + universe.masslessObjects
+    ]
+
+
+def positionSet(universe):
+    """
+    positions, ignoring the order of the objects
+    """
+    return sorted(p.tuple() for p in positions(universe))
+
+
+class Test_Recorder:
+    def record(self, filename):
+        universe = makeUniverse()
+        recorder = Recorder(filename, universe, keyframeEvery=1e3)
+        states = {}
+        for i in range(100):
+            if i == 10:
+                obj = universe.masslessObjects[0]
+                recorder.recordBurn(obj, 500.0, 2000.0, 1.0)
+                obj.scheduleBurn(500.0, 2000.0, 1.0)
+            if i == 20:
+                obj = universe.masslessObjects[1]
+                recorder.recordThrust(obj, -1.0)
+                obj.thrust = -1.0
+            dt = 100.0 + (i % 7)
+            recorder.recordStep(dt)
+            universe.update(dt)
+            states[universe.time] = positions(universe)
+        recorder.close()
+        return universe, states
+
+    def test_play(self, tmp_path):
+        filename = str(tmp_path / "session.rec")
+        universe, states = self.record(filename)
+        replayer = Replayer(filename)
+        nSteps = 0
+        for model in replayer.play():
+            nSteps += 1
+            assert positions(model) == states[model.time]
+        assert nSteps == 100
+        assert positions(replayer.model) == positions(universe)
+        replayer.close()
+
+    def test_seek(self, tmp_path):
+        filename = str(tmp_path / "session.rec")
+        universe, states = self.record(filename)
+        replayer = Replayer(filename)
+        assert len(replayer.keyframeTimes) > 5
+        times = sorted(states)
+        for t in [times[50], times[20], times[99], times[3], times[4]]:
+            model = replayer.seek(t)
+            assert model.time == t
+            assert positions(model) == states[t]
+        ## Between steps goes to the last step before
+        model = replayer.seek(times[30] + 1.0)
+        assert model.time == times[30]
+        replayer.close()
+
+    def test_spawnDespawn(self, tmp_path):
+        """
+        Objects added and removed while recording, which reorders the
+        massless objects, are replayed, and inputs reach the right objects
+        """
+        filename = str(tmp_path / "session.rec")
+        universe = makeUniverse()
+        recorder = Recorder(filename, universe, keyframeEvery=1e3)
+        states = {}
+        for i in range(60):
+            if i == 10:
+                obj = universe.masslessObjects[0]
+                recorder.recordDespawn(obj)
+                universe.removeObject(obj)
+            if i == 20:
+                obj = SpaceObjectModel(Vec2(4e7, 0.0))
+                obj.kinematics.velocity = Vec2(0.0, 3e3)
+                universe.addObject(obj)
+                recorder.recordSpawn(obj)
+            if i == 30:
+                obj = universe.masslessObjects[0]
+                recorder.recordBurn(obj, 100.0, 2000.0, 1.0)
+                obj.scheduleBurn(100.0, 2000.0, 1.0)
+            recorder.recordStep(100.0)
+            universe.update(100.0)
+            states[universe.time] = positions(universe)
+        recorder.close()
+        replayer = Replayer(filename)
+        for model in replayer.play():
+            assert positions(model) == states[model.time]
+        for t in [1500.0, 5500.0, 900.0, 3500.0]:
+            assert positions(replayer.seek(t)) == states[t]
+        replayer.close()
+
+    def test_analyticCoasting(self, tmp_path):
+        """
+        Switching to analytic coasting part way through, as the time warp
+        does, is replayed
+        """
+        filename = str(tmp_path / "session.rec")
+        universe = makeUniverse()
+        recorder = Recorder(filename, universe, keyframeEvery=1e4)
+        states = {}
+        for i in range(60):
+            universe.analyticCoasting = 20 <= i < 40
+            recorder.recordStep(1000.0)
+            universe.update(1000.0)
+            states[universe.time] = positions(universe)
+        recorder.close()
+        replayer = Replayer(filename)
+        for model in replayer.play():
+            assert positions(model) == states[model.time]
+        for t in [25000.0, 45000.0, 15000.0]:
+            assert positions(replayer.seek(t)) == states[t]
+        replayer.close()
+
+    def test_readWhileRecording(self, tmp_path):
+        filename = str(tmp_path / "session.rec")
+        universe = makeUniverse()
+        recorder = Recorder(filename, universe, keyframeEvery=1e3)
+        for i in range(30):
+            recorder.recordStep(100.0)
+            universe.update(100.0)
+        replayer = Replayer(filename)
+        assert len(replayer.keyframeTimes) == 3
+        assert sum(1 for model in replayer.play()) == 30
+        replayer.close()
+        recorder.close()
+
+    def test_configuredModel(self, tmp_path):
+        """
+        Replaying into a model set up like the recorded one keeps its force
+        model, across objects coming and going
+        """
+        filename = str(tmp_path / "session.rec")
+
+        def makePushed():
+            universe = makeUniverse()
+            universe.forceModel.add(Push())
+            universe.enableSphereOfInfluence()
+            return universe
+
+        universe = makePushed()
+        recorder = Recorder(filename, universe, keyframeEvery=1e3)
+        states = {}
+        for i in range(40):
+            if i == 10:
+                obj = universe.masslessObjects[0]
+                recorder.recordDespawn(obj)
+                universe.removeObject(obj)
+            if i == 20:
+                obj = SpaceObjectModel(Vec2(4e7, 0.0))
+                universe.addObject(obj)
+                recorder.recordSpawn(obj)
+            recorder.recordStep(100.0)
+            universe.update(100.0)
+            states[universe.time] = positionSet(universe)
+        recorder.close()
+
+        model = makePushed()
+        replayer = Replayer(filename, model)
+        for t in [3500.0, 1500.0, 500.0, 4000.0, 2500.0]:
+            assert replayer.seek(t) is model
+            assert positionSet(model) == states[t]
+        replayer.close()
+        ## A plain model doesn't know about the push
+        replayer = Replayer(filename)
+        assert positionSet(replayer.seek(500.0)) != states[500.0]
+        replayer.close()
@@ -0,0 +1,66 @@
+import pygame  # type: ignore
+
+from renderer import SpriteRenderer
+
+
+class FakeSprite:
+    def __init__(self, image, x, selected=False, flame=None):
+        self.image = image
+        self.rect = image.get_rect(topleft=(x, 0))
+        self.selected = selected
+        self.flame = flame
+
+
+class FakeSurface:
+    def __init__(self):
+        self.calls = []
+
+    def blits(self, blits, doreturn=True):
+        self.calls.append(list(blits))
+
+
+class Test_renderer:
+    def test_drawList(self):
+        renderer = SpriteRenderer()
+        a = pygame.Surface((10, 10), pygame.SRCALPHA)
+        b = pygame.Surface((10, 10), pygame.SRCALPHA)
+        flame = renderer.flame((10, 10), 90.0)
+        sprites = [
+            FakeSprite(a, 0),
+            FakeSprite(b, 10, selected=True),
+            FakeSprite(a, 20, flame=flame),
+            FakeSprite(b, 30),
+        ]
+        images = [image for image, rect in renderer.drawList(sprites)]
+        border = renderer.border((10, 10))
+        ## borders under everything, sprites grouped by image, flames on top
+        assert images[0] is border
+        assert images[1] is images[2] and images[3] is images[4]
+        assert {id(images[1]), id(images[3])} == {id(a), id(b)}
+        assert images[5] is flame
+
+    def test_overlaysShared(self):
+        renderer = SpriteRenderer()
+        assert renderer.border((10, 12)) is renderer.border((10, 12))
+        assert renderer.flame((10, 12), 45.2) is renderer.flame((10, 12), 44.8)
+        assert renderer.flame((10, 12), 45.0) is renderer.flame((10, 12), 405.0)
+        assert renderer.flame((10, 12), 45.0) is not renderer.flame((10, 12), 46.0)
+        flame = renderer.flame((60, 60), 0.0)
+        ## the flame is at the edge, not over the middle
+        assert flame.get_at((30, 30)).a == 0
+        assert flame.get_at((57, 30)).a == 255
+
+    def test_draw(self):
+        renderer = SpriteRenderer()
+        surface = FakeSurface()
+        sprite = FakeSprite(pygame.Surface((10, 10)), 0)
+        assert renderer.draw(surface, [sprite]) == [pygame.Rect(0, 0, 10, 10)]
+        assert len(surface.calls) == 1
+        sprite.rect.x = 50
+        ## where it was is cleared too
+        assert renderer.draw(surface, [sprite]) == [
+            pygame.Rect(50, 0, 10, 10),
+            pygame.Rect(0, 0, 10, 10),
+        ]
+        assert renderer.draw(surface, []) == [pygame.Rect(50, 0, 10, 10)]
+        assert len(surface.calls) == 3
@@ -0,0 +1,80 @@
+from math import sqrt
+
+from utils import Vec2
+from testhelpers import makeUniverse, mEarth, mMoon, rMoon
+
+
+class Test_SphereOfInfluenceTree:
+    def test_hierarchy(self):
+        universe = makeUniverse(nOrbiting=0, radii=(3.5e7, rMoon + 1e7), moon=True)
+        earth, moon = universe.massiveObjects
+        universe.enableSphereOfInfluence()
+        soi = universe.sphereOfInfluence
+        assert soi.bodies == [earth, moon]
+        assert soi.parents == [-1, 0]
+        expected = rMoon * (mMoon / mEarth) ** 0.4
+        assert abs(sqrt(soi.radii2[1]) - expected) < 1e-6 * expected
+
+    def test_primaryOf(self):
+        universe = makeUniverse(nOrbiting=0, radii=(3.5e7, rMoon + 1e7), moon=True)
+        earth, moon = universe.massiveObjects
+        universe.enableSphereOfInfluence()
+        soi = universe.sphereOfInfluence
+        nearEarth, nearMoon = universe.masslessObjects
+        assert soi.primaryOf(nearEarth) is earth
+        assert soi.primaryOf(nearMoon) is moon
+        ## Crossing the boundary reassigns it
+        nearMoon.kinematics.position = Vec2(rMoon - 1e8, 0.0)
+        assert soi.primaryOf(nearMoon) is earth
+        nearMoon.kinematics.position = Vec2(rMoon, 1e6)
+        assert soi.primaryOf(nearMoon) is moon
+
+    def test_getA(self):
+        universe = makeUniverse(nOrbiting=0, radii=(3.5e7, rMoon + 1e7), moon=True)
+        earth, moon = universe.massiveObjects
+        nearEarth, nearMoon = universe.masslessObjects
+        fullNearEarth = universe.getAOn(nearEarth)
+        universe.enableSphereOfInfluence()
+        aNearEarth = universe.getAOn(nearEarth)
+        assert aNearEarth.isClose(fullNearEarth, 1e-3 * fullNearEarth.magnitude())
+        assert aNearEarth != fullNearEarth
+        ## Near the moon, it's the moon's pull plus the moon's own
+        ## acceleration towards the earth, even before anything's stepped
+        aNearMoon = universe.getAOn(nearMoon)
+        fromMoon = universe.G * mMoon / 1e7**2
+        moonToEarth = universe.G * mEarth / rMoon**2
+        expected = Vec2(-fromMoon - moonToEarth, 0.0)
+        assert aNearMoon.isClose(expected, 1e-9 * fromMoon)
+
+        universe.enableSphereOfInfluence(perturbers=[moon])
+        aNearEarth = universe.getAOn(nearEarth)
+        assert aNearEarth.isClose(fullNearEarth, 1e-12 * fullNearEarth.magnitude())
+
+    def test_follows_moon(self):
+        universe = makeUniverse(nOrbiting=0, radii=(3.5e7, rMoon + 1e7), moon=True)
+        earth, moon = universe.massiveObjects
+        universe.enableSphereOfInfluence()
+        nearMoon = universe.masslessObjects[1]
+        vCirc = sqrt(universe.G * mMoon / 1e7)
+        nearMoon.kinematics.velocity = moon.kinematics.getVelocity() + Vec2(0, vCirc)
+        for i in range(2000):
+            universe.update(10.0)
+        separation = nearMoon.kinematics.position.distance(moon.kinematics.position)
+        assert abs(separation - 1e7) < 0.1e7
+        assert universe.sphereOfInfluence.primaryOf(nearMoon) is moon
+
+    def test_accelerating_primary(self):
+        """
+        Objects around a moon get its acceleration at their step, not the
+        one it had at its last step, whichever order they're stepped in
+        """
+        universe = makeUniverse(nOrbiting=0, radii=(3.5e7, rMoon + 1e7), moon=True)
+        earth, moon = universe.massiveObjects
+        universe.enableSphereOfInfluence()
+        nearMoon = universe.masslessObjects[1]
+        universe.update(100.0)
+        ## A stale acceleration on the moon changes nothing
+        moon.kinematics.acceleration = Vec2(1.0, 1.0)
+        full = universe.getA(nearMoon.kinematics.position)
+        fromMoon = universe.G * mMoon / 1e7**2
+        assert universe.getAOn(nearMoon).isClose(full, 0.05 * fromMoon)
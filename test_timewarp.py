@@ -0,0 +1,90 @@
+from copy import deepcopy
+from math import sqrt
+
+from timewarp import TimeWarp
+from testhelpers import makeUniverse, mEarth, rOrbit
+
+
+class Test_TimeWarp:
+    def test_levels(self):
+        warp = TimeWarp(levels=[1.0, 10.0, 100.0], level=10.0)
+        assert warp.speedUpFactor == 10.0
+        assert warp.warpUp()
+        assert not warp.warpUp()
+        assert warp.speedUpFactor == 100.0
+        assert warp.warpDown() and warp.warpDown()
+        assert not warp.warpDown()
+        assert warp.speedUpFactor == 1.0
+
+    def test_stepSize(self):
+        warp = TimeWarp(
+            baseStep=100.0,
+            levels=[1e3, 1e5, 1e6],
+            level=1e3,
+            frameBudget=0.01,
+            maxStepsPerFrame=10,
+            maxStep=1e4,
+        )
+        assert warp.stepSize(1.0 / 60) == 100.0
+        assert not warp.analyticCoasting(warp.stepSize(1.0 / 60))
+        warp.warpUp()
+        ## 1e5/60 model seconds per frame in at most 10 steps
+        assert warp.stepSize(1.0 / 60) == 200.0
+        assert warp.analyticCoasting(200.0)
+        ## 1 ms per step means only 10 steps fit in the budget either way
+        warp.measure(0.01, 10)
+        assert warp.stepSize(1.0 / 60) == 200.0
+        ## 5 ms per step: only 2 steps fit
+        for i in range(50):
+            warp.measure(0.05, 10)
+        assert abs(warp.costPerStep - 0.005) < 1e-6
+        assert warp.stepSize(1.0 / 60) == 1600.0
+        warp.warpUp()
+        assert warp.stepSize(1.0 / 60) == 1e4
+
+    def test_hysteresis(self):
+        warp = TimeWarp(baseStep=100.0, levels=[1e5], level=1e5, maxStepsPerFrame=10)
+        steps = set()
+        for i in range(100):
+            steps.add(warp.stepSize(1.0 / 60 * (1.3 if i % 2 else 0.7)))
+        assert steps == {200.0}
+        ## it only shrinks once a quarter of the step would do
+        for i in range(20):
+            warp.stepSize(1.0 / 120)
+        assert warp.step == 200.0
+        for i in range(40):
+            warp.stepSize(1.0 / 300)
+        assert warp.step == 100.0
+
+    def test_accuracy(self):
+        """
+        Objects that can't coast analytically keep the step small, and the
+        objects stepped numerically stay accurate
+        """
+        universe = makeUniverse(nOrbiting=1, moon=True)
+        universe.masslessObjects[0].scheduleBurn(0.0, 1e9, 1e-3)
+        universe.analyticCoasting = True
+        warp = TimeWarp(baseStep=100.0, levels=[1e6], level=1e6, maxStepsPerFrame=10)
+        timescale = universe.numericTimescale(warp.maxStep)
+        assert abs(timescale - sqrt(rOrbit**3 / (universe.G * mEarth))) < 1.0
+        step = warp.stepSize(1.0 / 60, timescale)
+        assert step == 200.0 and warp.accuracyLimited
+        ## it follows the ship spiralling out as well as small steps do
+        reference = deepcopy(universe)
+        for i in range(3200):
+            reference.update(20.0)
+        for i in range(int(6.4e4 / step)):
+            universe.update(step)
+        ship = universe.masslessObjects[0]
+        referenceShip = reference.masslessObjects[0]
+        position = ship.kinematics.position
+        assert position.isClose(referenceShip.kinematics.position, 1e-2 * rOrbit)
+
+        ## Only the massive bodies are left once the ship coasts
+        ship.burnSchedule = []
+        universe.update(step)
+        assert universe.numericTimescale(1e5) < 1e5
+        universe.enableSphereOfInfluence()
+        assert universe.numericTimescale(1e5) > 1e5
+        universe.rPower = -1.5
+        assert universe.numericTimescale(1e5) < 1e5
@@ -0,0 +1,67 @@
+import pygame
+
+from utils import Vec2
+from spaceobject import SpaceObjectModel
+from trails import Trail, TrailsView
+
+
+def project(x, y):
+    return int(x), int(y)
+
+
+class FakeCtrl:
+    def __init__(self, model):
+        self.model = model
+
+
+def makeObject(x, y, mass=0.0):
+    return FakeCtrl(SpaceObjectModel(Vec2(x, y), mass))
+
+
+class Test_Trail:
+    def test_ring(self):
+        trail = Trail(4)
+        assert trail.points() == []
+        for i in range(3):
+            trail.add(i, 10 * i, project)
+        assert trail.points() == [(0, 0), (1, 10), (2, 20)]
+        for i in range(3, 7):
+            trail.add(i, 10 * i, project)
+        assert trail.points() == [(3, 30), (4, 40), (5, 50), (6, 60)]
+        assert trail.count == 4
+        trail.project(lambda x, y: (int(x) * 2, int(y) * 2))
+        assert trail.points() == [(6, 60), (8, 80), (10, 100), (12, 120)]
+
+
+class Test_TrailsView:
+    def test_record(self):
+        trails = TrailsView(capacity=8, interval=10.0)
+        ship = makeObject(1.0, 2.0)
+        planet = makeObject(0.0, 0.0, 1e24)
+        objects = [planet, ship]
+        for i in range(25):
+            ship.model.kinematics.position = Vec2(float(i), 2.0)
+            trails.record(objects, float(i), project, (1.0,))
+        assert list(trails.trails) == [ship]
+        ## recorded at 0, 10 and 20
+        assert trails.trails[ship].points() == [(0, 2), (10, 2), (20, 2)]
+
+        ## A new camera reprojects
+        trails.record(objects, 25.0, lambda x, y: (int(x) + 1, int(y)), (2.0,))
+        assert trails.trails[ship].points() == [(1, 2), (11, 2), (21, 2)]
+
+        surface = pygame.Surface((40, 40))
+        rects = trails.draw(surface)
+        assert len(rects) == 1 and rects[0].collidepoint(11, 2)
+        assert surface.get_at((11, 2))[:3] == trails.color
+
+        ## Trails are reused
+        trail = trails.trails[ship]
+        trails.remove(ship)
+        assert trails.trails == {}
+        ## the old trail's rect is still returned, to be cleared
+        assert len(trails.draw(surface)) == 1
+        missile = makeObject(5.0, 5.0)
+        trails.record([missile], 30.0, project, (2.0,))
+        assert trails.trails[missile] is trail
+        assert trail.points() == [(5, 5)]
@@ -0,0 +1,54 @@
+from trajectories import TrajectoryWriter, TrajectoryReader, propagate
+from testhelpers import makeUniverse
+
+
+class Test_Trajectories:
+    def test_roundtrip(self, tmp_path):
+        filename = str(tmp_path / "traj.dat")
+        universe = makeUniverse(nOrbiting=2)
+        universe.masslessObjects[1].scheduleBurn(0.0, 500.0, -1.0)
+        writer = TrajectoryWriter(filename, universe)
+        states = []
+        for i in range(20):
+            writer.write()
+            obj = universe.masslessObjects[1]
+            states.append(
+                (
+                    universe.time,
+                    obj.kinematics.position.x,
+                    obj.kinematics.velocity.y,
+                    obj.thrust,
+                )
+            )
+            universe.update(100.0)
+        writer.close()
+
+        reader = TrajectoryReader(filename)
+        assert len(reader) == 20
+        assert list(reader.masses) == [6.0e24, 0.0, 0.0]
+        traj = reader.slice(2)
+        assert list(traj.time) == [s[0] for s in states]
+        assert list(traj.x) == [s[1] for s in states]
+        assert list(traj.vy) == [s[2] for s in states]
+        assert list(traj.thrust) == [s[3] for s in states]
+
+        traj = reader.slice(2, 300.0, 700.0)
+        assert list(traj.time) == [300.0, 400.0, 500.0, 600.0, 700.0]
+        assert list(traj.x) == [s[1] for s in states[3:8]]
+        traj = reader.slice(2, 250.0, 750.0, every=2)
+        assert list(traj.time) == [300.0, 500.0, 700.0]
+        traj = reader.slice(0, 5000.0)
+        assert len(traj.time) == 0
+        reader.close()
+
+    def test_propagate(self, tmp_path):
+        filename = str(tmp_path / "traj.dat")
+        universe = makeUniverse(nOrbiting=2)
+        propagate(universe, filename, 1e4, dtStep=1e2, sampleEvery=1e3)
+        assert universe.time == 1e4
+        reader = TrajectoryReader(filename)
+        assert len(reader) == 11
+        traj = reader.slice(1)
+        assert traj.time[-1] == 1e4
+        assert traj.x[-1] == universe.masslessObjects[0].kinematics.position.x
+        reader.close()
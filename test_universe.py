@@ -0,0 +1,151 @@
+from copy import deepcopy
+import itertools
+import math
+
+import pytest
+
+from utils import Vec2
+from spaceobject import SpaceObjectModel
+from kepler import KeplerError
+import universe as universeModule
+from testhelpers import makeUniverse
+
+
+class Test_UniverseModel:
+    def test_getFuture(self):
+        universe = makeUniverse()
+        universe.masslessObjects[1].scheduleBurn(1000.0, 3000.0, 1.0)
+        timePoints = [i * 1e3 for i in range(10)]
+        paths, burns = universe.getFuture(timePoints)
+        assert len(paths) == 3
+        assert len(paths[0]) == 10
+        assert burns[1][:5] == [0.0, 1.0, 1.0, 0.0, 0.0]
+
+        manual = deepcopy(universe)
+        for i in range(50):
+            manual.update(100.0)
+        for obj, path in zip(manual.masslessObjects, paths):
+            assert obj.kinematics.getPosition().isClose(path[5], 1e-3)
+        ## getFuture doesn't change the universe itself
+        assert universe.time == 0.0
+
+    def test_getFuture_selected(self):
+        universe = makeUniverse()
+        selected = universe.masslessObjects[2]
+        paths, burns = universe.getFuture([0.0, 1e3], selectedObj=selected)
+        assert paths[0][0] == selected.kinematics.getPosition()
+
+    def test_iterFuture(self):
+        universe = makeUniverse()
+        timePoints = [i * 1e3 for i in range(10)]
+        paths, burns = universe.getFuture(timePoints)
+        samples = list(universe.iterFuture(timePoints))
+        assert [s.time for s in samples] == timePoints
+        for i, sample in enumerate(samples):
+            assert sample.positions == [path[i] for path in paths]
+            assert sample.burns == [burn[i] for burn in burns]
+
+    def test_iterFuture_open_ended(self):
+        universe = makeUniverse()
+        universe.masslessObjects[0].scheduleBurn(0.0, 1e9, 1.0)
+        r = universe.masslessObjects[0].kinematics.getPosition().magnitude()
+        escaped = lambda s: s.positions[0].magnitude() > 3 * r
+        samples = list(
+            universe.iterFuture(itertools.count(0.0, 1e3), stopCondition=escaped)
+        )
+        assert escaped(samples[-1])
+        assert not any(escaped(s) for s in samples[:-1])
+
+        firstThree = list(itertools.islice(universe.iterFuture(itertools.count()), 3))
+        assert [s.time for s in firstThree] == [0, 1, 2]
+
+    def test_analyticCoasting(self):
+        universe = makeUniverse()
+        universe.masslessObjects[1].scheduleBurn(5e3, 6e3, 1.0)
+        numeric = deepcopy(universe)
+        universe.analyticCoasting = True
+        r = universe.masslessObjects[0].kinematics.getPosition().magnitude()
+        v = universe.masslessObjects[0].kinematics.getVelocity().magnitude()
+        for i in range(100):
+            universe.update(100.0)
+            numeric.update(100.0)
+        ## Coasting circular orbits are exact
+        exact = Vec2(r, 0.0).rotated(math.degrees(v / r * 1e4))
+        assert universe.masslessObjects[0].kinematics.position.isClose(exact, 1e-3)
+        ## and burns still happen
+        for obj, numericObj in zip(universe.masslessObjects, numeric.masslessObjects):
+            position = obj.kinematics.getPosition()
+            numericPosition = numericObj.kinematics.getPosition()
+            assert position.isClose(numericPosition, 1e-2 * position.magnitude())
+        assert universe.masslessObjects[1].kinematics.position.magnitude() > 1.002 * r
+        ## even with big steps
+        for i in range(100):
+            universe.update(1e4)
+        exact = Vec2(r, 0.0).rotated(math.degrees(v / r * 1.01e6))
+        assert universe.masslessObjects[0].kinematics.position.isClose(exact, 1.0)
+
+    def test_analyticCoasting_fallback(self, monkeypatch):
+        """
+        Objects whose Kepler equation can't be solved are stepped
+        numerically instead
+        """
+
+        def fail(*args):
+            raise KeplerError("no convergence")
+
+        monkeypatch.setattr(universeModule, "propagateKepler", fail)
+        universe = makeUniverse()
+        numeric = deepcopy(universe)
+        universe.analyticCoasting = True
+        for i in range(10):
+            universe.update(100.0)
+            numeric.update(100.0)
+        for obj, numericObj in zip(universe.masslessObjects, numeric.masslessObjects):
+            assert obj.kinematics == numericObj.kinematics
+
+    def test_getFuture_objects(self):
+        universe = makeUniverse()
+        universe.masslessObjects[1].scheduleBurn(1000.0, 3000.0, 1.0)
+        timePoints = [i * 1e3 for i in range(10)]
+        allPaths, allBurns = universe.getFuture(timePoints)
+        selected = universe.masslessObjects[2]
+        paths, burns = universe.getFuture(
+            timePoints, selectedObj=selected, objects=[universe.masslessObjects[1]]
+        )
+        assert paths == [allPaths[2], allPaths[1]]
+        assert burns == [allBurns[2], allBurns[1]]
+
+        copy, mlos = universe.copyUniverse(objects=[])
+        assert mlos == [] and len(copy.massiveObjects) == 1
+        assert len(universe.masslessObjects) == 3
+
+    def test_removeObject(self):
+        universe = makeUniverse()
+        earth = universe.massiveObjects[0]
+        a, b, c = universe.masslessObjects
+        handleA = a.handle
+        universe.removeObject(a)
+        assert universe.masslessObjects == [c, b]
+        assert [obj.listIndex for obj in universe.masslessObjects] == [0, 1]
+        assert universe.getObject(handleA) is None
+        assert universe.getObject(b.handle) is b
+        with pytest.raises(ValueError):
+            universe.removeObject(a)
+        ## a's slot is reused, but its handle still doesn't find anything
+        d = SpaceObjectModel(Vec2(4e7, 0.0))
+        handleD = universe.addObject(d)
+        assert handleD % (1 << 32) == handleA % (1 << 32)
+        assert universe.getObject(handleA) is None
+        assert universe.getObject(handleD) is d
+        assert len(universe.objectPool) == 4
+
+        ## Copies keep the handles
+        copy, mlos = universe.copyUniverse(objects=[d])
+        assert mlos[0].handle == handleD and copy.getObject(handleD) is mlos[0]
+        assert copy.getObject(b.handle) is None
+        assert copy.getObject(earth.handle) is copy.massiveObjects[0]
+
+        universe.removeObject(earth)
+        assert universe.massiveObjects == []
+        universe.update(100.0)
+        assert d.kinematics.velocity == Vec2(0.0, 0.0)
@@ -0,0 +1,65 @@
+"""
+Universes and force terms shared by the tests
+"""
+
+from math import sqrt
+from typing import Sequence
+
+from utils import Vec2
+from spaceobject import SpaceObjectModel
+from universe import UniverseModel
+from forces import ForceTerm
+
+mEarth = 6.0e24
+mMoon = 7.35e22
+rMoon = 3.84e8
+## radius of the orbits of the nOrbiting objects
+rOrbit = 3.5e7
+
+
+def makeUniverse(
+    nOrbiting: int = 3,
+    radii: Sequence[float] = (),
+    moon: bool = False,
+    nParked: int = 0,
+) -> UniverseModel:
+    """
+    Earth at the origin, then, in this order:
+
+    moon: the Moon in a circular orbit, starting on the x axis
+    nOrbiting: up to 3 massless objects in circular orbits of rOrbit,
+        starting on the +x, +y and -y axes
+    radii: massless objects in circular orbits of these radii, starting on
+        the x axis
+    nParked: massless objects far away and barely moving
+    """
+    universe = UniverseModel()
+    universe.addObject(SpaceObjectModel(Vec2(0.0, 0.0), mEarth))
+    if moon:
+        obj = SpaceObjectModel(Vec2(rMoon, 0.0), mMoon)
+        obj.kinematics.velocity = Vec2(0.0, sqrt(universe.G * mEarth / rMoon))
+        universe.addObject(obj)
+    r = rOrbit
+    v = sqrt(universe.G * mEarth / r)
+    orbits = [(r, 0.0, 0.0, v), (0.0, r, v, 0.0), (0.0, -r, -v, 0.0)]
+    for x, y, vx, vy in orbits[:nOrbiting]:
+        obj = SpaceObjectModel(Vec2(x, y))
+        obj.kinematics.velocity = Vec2(vx, vy)
+        universe.addObject(obj)
+    for r in radii:
+        obj = SpaceObjectModel(Vec2(r, 0.0))
+        obj.kinematics.velocity = Vec2(0.0, sqrt(universe.G * mEarth / r))
+        universe.addObject(obj)
+    for i in range(nParked):
+        universe.addObject(SpaceObjectModel(Vec2(1e12, i * 1e6)))
+    return universe
+
+
+class Push(ForceTerm):
+    """
+    1 m/s^2 along x on every object
+    """
+
+    def accumulate(self, universe, objects, xs, ys, vxs, vys, axs, ays):
+        for i in range(len(objects)):
+            axs[i] += 1.0
@@ -0,0 +1,145 @@
+"""
+Time-warp control: keeps the physics cost per frame bounded as warp goes up
+"""
+
+from math import ceil, floor, inf, log2
+from typing import List, Optional, Sequence
+
+DEFAULT_LEVELS = [1.0, 10.0, 100.0, 1e3, 5e3, 1e4, 5e4, 1e5, 1e6]
+
+
+class TimeWarp:
+    """
+    Holds the warp level (model seconds per wall-clock second) and picks the
+    model step size for it
+
+    The wall-clock cost of each model step is measured as the game runs.
+    When the warp level needs more steps per frame than fit in frameBudget
+    (or maxStepsPerFrame), the step size is doubled from baseStep as often
+    as needed, up to maxStep. Once steps are bigger than baseStep, coasting
+    objects should be propagated analytically, since they can then take any
+    step size without losing accuracy. The objects that are still
+    integrated numerically bound the step to accuracy times their shortest
+    orbital timescale, see UniverseModel.numericTimescale; when that bound
+    is what stops the step growing, accuracyLimited is set, and the warp
+    level should come down.
+
+    The frame time is smoothed, and the step only shrinks once a quarter of
+    it would do, so it doesn't flip between sizes with frame jitter.
+    """
+
+    def __init__(
+        self,
+        baseStep: float = 1e2,
+        levels: Sequence[float] = DEFAULT_LEVELS,
+        level: float = 5e3,
+        frameBudget: float = 0.008,
+        maxStepsPerFrame: int = 100,
+        maxStep: float = 1e5,
+        accuracy: float = 0.02,
+    ) -> None:
+        """
+        baseStep: the model step size in model seconds when it's affordable
+        levels: the allowed warp levels, in increasing order
+        level: the starting warp level, which must be one of levels
+        frameBudget: wall-clock seconds of physics to allow per frame
+        maxStepsPerFrame: most model steps to take per frame
+        maxStep: largest model step size in model seconds
+        accuracy: largest step, as a fraction of the orbital timescale of
+            the objects integrated numerically
+        """
+        self.baseStep: float = baseStep
+        self.levels: List[float] = list(levels)
+        self.iLevel: int = self.levels.index(level)
+        self.frameBudget: float = frameBudget
+        self.maxStepsPerFrame: int = maxStepsPerFrame
+        self.maxStep: float = maxStep
+        self.accuracy: float = accuracy
+        ## step size chosen last, smoothed frame time, and whether the step
+        ## was held back by accuracy
+        self.step: float = baseStep
+        self.frameTime: Optional[float] = None
+        self.accuracyLimited: bool = False
+        ## smoothed wall-clock seconds per model step
+        self.costPerStep: Optional[float] = None
+        self.smoothing: float = 0.2
+
+    @property
+    def speedUpFactor(self) -> float:
+        """
+        Model seconds per wall-clock second at the current warp level
+        """
+        return self.levels[self.iLevel]
+
+    def warpUp(self) -> bool:
+        """
+        Go to the next higher warp level, returning True if it changed
+        """
+        if self.iLevel + 1 >= len(self.levels):
+            return False
+        self.iLevel += 1
+        return True
+
+    def warpDown(self) -> bool:
+        """
+        Go to the next lower warp level, returning True if it changed
+        """
+        if self.iLevel == 0:
+            return False
+        self.iLevel -= 1
+        return True
+
+    def measure(self, physicsTime: float, nSteps: int) -> None:
+        """
+        Record that nSteps model steps took physicsTime wall-clock seconds
+        """
+        if nSteps <= 0:
+            return
+        cost = physicsTime / nSteps
+        if self.costPerStep is None:
+            self.costPerStep = cost
+        else:
+            self.costPerStep += self.smoothing * (cost - self.costPerStep)
+
+    def stepsPerFrame(self) -> float:
+        """
+        Number of model steps that fit in a frame
+        """
+        result = float(self.maxStepsPerFrame)
+        if self.costPerStep is not None and self.costPerStep > 0.0:
+            result = min(result, self.frameBudget / self.costPerStep)
+        return max(result, 1.0)
+
+    def stepSize(self, frameTime: float, timescale: float = inf) -> float:
+        """
+        Model step size to use for a frame lasting frameTime wall-clock
+        seconds, when the objects integrated numerically have orbital
+        timescale timescale
+        """
+        if self.frameTime is None:
+            self.frameTime = frameTime
+        else:
+            self.frameTime += self.smoothing * (frameTime - self.frameTime)
+        exact = self.speedUpFactor * self.frameTime / self.stepsPerFrame()
+        ratio = exact / self.baseStep
+        needed = self.baseStep
+        if ratio > 1.0:
+            needed = min(self.baseStep * 2.0 ** ceil(log2(ratio)), self.maxStep)
+        if needed > self.step or exact * 4.0 <= self.step:
+            self.step = needed
+        accurate = self.maxStep
+        if self.accuracy * timescale < self.maxStep:
+            ratio = max(self.accuracy * timescale / self.baseStep, 1.0)
+            accurate = self.baseStep * 2.0 ** floor(log2(ratio))
+        self.accuracyLimited = accurate < needed
+        self.step = min(self.step, accurate)
+        return self.step
+
+    def analyticCoasting(self, stepSize: float) -> bool:
+        """
+        Whether coasting objects should be propagated analytically at stepSize
+        """
+        return stepSize > self.baseStep
+
+    def __str__(self) -> str:
+        return f"x{self.speedUpFactor:g}"
@@ -0,0 +1,159 @@
+"""
+Trails drawn behind objects, showing where they've been
+"""
+
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import pygame  # type: ignore
+
+if TYPE_CHECKING:
+    from spaceobject import SpaceObjectCtrl
+
+Projection = Callable[[float, float], Tuple[int, int]]
+
+
+class Trail:
+    """
+    The latest capacity positions of an object, in a ring buffer, in model
+    and pixel coordinates
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity: int = capacity
+        self.xs: array = array("d", bytes(8 * capacity))
+        self.ys: array = array("d", bytes(8 * capacity))
+        self.pixels: List[Tuple[int, int]] = [(0, 0)] * capacity
+        ## where the next position goes, and how many there are
+        self.next: int = 0
+        self.count: int = 0
+        ## pixel positions, oldest first, made when first needed
+        self.pointList: Optional[List[Tuple[int, int]]] = None
+
+    def clear(self) -> None:
+        self.next = 0
+        self.count = 0
+        self.pointList = None
+
+    def add(self, x: float, y: float, project: Projection) -> None:
+        """
+        Add model position x, y, overwriting the oldest if full
+        """
+        i = self.next
+        self.xs[i] = x
+        self.ys[i] = y
+        self.pixels[i] = project(x, y)
+        self.next = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.pointList = None
+
+    def project(self, project: Projection) -> None:
+        """
+        Find all of the pixel positions again, e.g. after the view changed
+        """
+        for i in range(self.capacity):
+            self.pixels[i] = project(self.xs[i], self.ys[i])
+        self.pointList = None
+
+    def points(self) -> List[Tuple[int, int]]:
+        """
+        The pixel positions, oldest first
+        """
+        if self.pointList is None:
+            start = self.next - self.count
+            if start >= 0:
+                self.pointList = self.pixels[start : self.next]
+            else:
+                self.pointList = self.pixels[start:] + self.pixels[: self.next]
+        return self.pointList
+
+
+class TrailsView:
+    """
+    Trails behind a set of objects, recorded every interval model seconds
+    and drawn as one line per object
+
+    Trails have fixed capacity and are reused when objects go away, so the
+    memory and drawing cost don't grow over time. Pixel positions are only
+    found when a position is recorded, and again for all positions when the
+    projection changes.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 64,
+        interval: float = 1e3,
+        color: Tuple[int, int, int] = (120, 120, 120),
+    ) -> None:
+        """
+        capacity: most positions kept per object
+        interval: model seconds between recorded positions
+        """
+        self.capacity: int = capacity
+        self.interval: float = interval
+        self.color: Tuple[int, int, int] = color
+        self.trails: Dict["SpaceObjectCtrl", Trail] = {}
+        ## unused trails, for reuse
+        self.spare: List[Trail] = []
+        self.lastTime: Optional[float] = None
+        ## what the projection depends on, when pixel positions were found
+        self.camera: Optional[Tuple] = None
+        ## where trails were drawn last time, to be redrawn without them
+        self.drawnRects: List[pygame.rect.Rect] = []
+
+    def record(
+        self,
+        objects: List["SpaceObjectCtrl"],
+        time: float,
+        project: Projection,
+        camera: Tuple,
+    ) -> None:
+        """
+        Record the massless objects' positions, if interval has passed since
+        the last time
+
+        camera is whatever project depends on, so that a change in it
+        reprojects all of the trails
+        """
+        if camera != self.camera:
+            for trail in self.trails.values():
+                trail.project(project)
+            self.camera = camera
+        if self.lastTime is not None and time - self.lastTime < self.interval:
+            return
+        self.lastTime = time
+        for obj in objects:
+            if obj.model.mass > 0.0:
+                continue
+            if obj not in self.trails:
+                self.trails[obj] = (
+                    self.spare.pop() if self.spare else Trail(self.capacity)
+                )
+            self.trails[obj].add(*obj.model.kinematics.position.tuple(), project)
+
+    def remove(self, obj: "SpaceObjectCtrl") -> None:
+        """
+        Drop obj's trail, keeping it for reuse
+        """
+        trail = self.trails.pop(obj, None)
+        if trail is not None:
+            trail.clear()
+            self.spare.append(trail)
+
+    def draw(self, surface: pygame.surface.Surface) -> List[pygame.rect.Rect]:
+        """
+        Draw the trails on surface, returning the rects that need updating on
+        the display: where they're drawn now, and where they were drawn last
+        time
+        """
+        drawn: List[pygame.rect.Rect] = []
+        bounds = surface.get_rect()
+        for trail in self.trails.values():
+            if trail.count < 2:
+                continue
+            rect = pygame.draw.lines(surface, self.color, False, trail.points())
+            if rect.colliderect(bounds):
+                drawn.append(rect.clip(bounds))
+        result = drawn + self.drawnRects
+        self.drawnRects = drawn
+        return result
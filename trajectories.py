@@ -0,0 +1,189 @@
+"""
+Memory-mapped trajectory archive for long, headless runs
+
+The archive is a fixed-record binary file: a header with the masses of the
+archived objects, then one record per sample holding the model time and the
+position, velocity, and thrust of every archived object. Records are
+appended as the model runs, and TrajectoryReader memory-maps the file so
+slices by object and time range are read without loading the whole archive.
+"""
+
+import mmap
+import struct
+from array import array
+from typing import BinaryIO, List, NamedTuple, Optional, Sequence
+
+from spaceobject import SpaceObjectModel
+from universe import UniverseModel
+
+MAGIC = b"OGTRAJ01"
+
+_HEADER = struct.Struct("<8sII")  # magic, number of objects, padding
+## x, y, vx, vy, thrust
+FIELDS_PER_OBJECT = 5
+
+
+class TrajectorySlice(NamedTuple):
+    """
+    Samples of a single object's trajectory
+    """
+
+    time: array
+    x: array
+    y: array
+    vx: array
+    vy: array
+    thrust: array
+
+
+class TrajectoryWriter:
+    """
+    Streams the state of objects in a UniverseModel to an archive file
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        model: UniverseModel,
+        objects: Optional[Sequence[SpaceObjectModel]] = None,
+    ) -> None:
+        """
+        objects are the objects to archive, by default all of them, in the
+        order massive then massless
+        """
+        self.model: UniverseModel = model
+        if objects is None:
+            objects = model.massiveObjects + model.masslessObjects
+        self.objects: List[SpaceObjectModel] = list(objects)
+        self.record: array = array("d", bytes(8 * self.recordLength()))
+        self.file: BinaryIO = open(filename, "wb")
+        self.file.write(_HEADER.pack(MAGIC, len(self.objects), 0))
+        self.file.write(array("d", [obj.mass for obj in self.objects]).tobytes())
+
+    def recordLength(self) -> int:
+        """
+        Number of float64 in each record
+        """
+        return 1 + FIELDS_PER_OBJECT * len(self.objects)
+
+    def write(self) -> None:
+        """
+        Append the current state of the objects
+        """
+        record = self.record
+        record[0] = self.model.time
+        i = 1
+        for obj in self.objects:
+            k = obj.kinematics
+            record[i] = k.position.x
+            record[i + 1] = k.position.y
+            record[i + 2] = k.velocity.x
+            record[i + 3] = k.velocity.y
+            record[i + 4] = obj.thrust
+            i += FIELDS_PER_OBJECT
+        record.tofile(self.file)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def propagate(
+    model: UniverseModel,
+    filename: str,
+    duration: float,
+    dtStep: float = 1e2,
+    sampleEvery: float = 1e3,
+    objects: Optional[Sequence[SpaceObjectModel]] = None,
+) -> None:
+    """
+    Run model for duration model seconds in steps of dtStep, archiving the
+    objects to filename every sampleEvery model seconds
+    """
+    writer = TrajectoryWriter(filename, model, objects)
+    tEnd = model.time + duration
+    nextSample = model.time
+    while True:
+        if model.time >= nextSample:
+            writer.write()
+            nextSample += sampleEvery
+        if model.time >= tEnd:
+            break
+        model.update(min(dtStep, nextSample - model.time, tEnd - model.time))
+    writer.close()
+
+
+class TrajectoryReader:
+    """
+    Reads an archive made by TrajectoryWriter through a memory map
+    """
+
+    def __init__(self, filename: str) -> None:
+        with open(filename, "rb") as f:
+            self.buffer: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.nObjects, padding = _HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} isn't a trajectory archive")
+        dataStart = _HEADER.size + 8 * self.nObjects
+        self.recordLength: int = 1 + FIELDS_PER_OBJECT * self.nObjects
+        recordSize = 8 * self.recordLength
+        ## A partly written last record is ignored
+        self.nRecords: int = (len(self.buffer) - dataStart) // recordSize
+        self.masses: array = array("d", self.buffer[_HEADER.size : dataStart])
+        self.data = memoryview(self.buffer)[
+            dataStart : dataStart + self.nRecords * recordSize
+        ].cast("d")
+
+    def __len__(self) -> int:
+        return self.nRecords
+
+    def timeAt(self, iRecord: int) -> float:
+        """
+        Model time of a record
+        """
+        return self.data[iRecord * self.recordLength]
+
+    def indexOf(self, time: float) -> int:
+        """
+        Index of the first record at or after time
+        """
+        lo = 0
+        hi = self.nRecords
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timeAt(mid) < time:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def slice(
+        self,
+        iObject: int,
+        tStart: float = float("-inf"),
+        tEnd: float = float("inf"),
+        every: int = 1,
+    ) -> TrajectorySlice:
+        """
+        Get the trajectory of object iObject between tStart and tEnd, inclusive
+
+        every takes only every n-th record
+        """
+        if not (0 <= iObject < self.nObjects):
+            raise IndexError(f"No object {iObject} in archive")
+        first = self.indexOf(tStart)
+        last = self.indexOf(tEnd)
+        if last < self.nRecords and self.timeAt(last) == tEnd:
+            last += 1
+        stride = self.recordLength * every
+        start = first * self.recordLength
+        stop = last * self.recordLength
+        column = 1 + iObject * FIELDS_PER_OBJECT
+        fields = [array("d", self.data[start:stop:stride])]
+        for iField in range(FIELDS_PER_OBJECT):
+            offset = column + iField
+            fields.append(array("d", self.data[start + offset : stop : stride]))
+        return TrajectorySlice(*fields)
+
+    def close(self) -> None:
+        self.data.release()
+        self.buffer.close()
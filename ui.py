@@ -3,44 +3,67 @@ Main screen/window through which the user plays the game
 """
 
 import pygame  # type: ignore
+from concurrent.futures import Future
 from typing import Optional, List, Any, Tuple, TYPE_CHECKING
 
+from assetcache import AssetCache, defaultCache, loadInBackground
+
 
 class MainWindow(pygame.Surface):
     """
     Main screen/window through which the user plays the game
     """
 
-    def __init__(self, size: Tuple[int, int], backgroundImageLoc: str) -> None:
+    def __init__(
+        self,
+        size: Tuple[int, int],
+        backgroundImageLoc: str,
+        assetCache: Optional[AssetCache] = None,
+    ) -> None:
         """
         size is a tuple (x,y): the size of the layer (world) in pixels
+
+        The background image is loaded in the background, through
+        assetCache or else the default one, and shown once it's ready
         """
         self.screen = pygame.display.set_mode(size)
         pygame.Surface.__init__(self, size)
         self.fill((0, 0, 0))
-        self.background: Optional[pygame.surface.Surface] = None
-        if backgroundImageLoc is None:
-            self.background = pygame.Surface(size)
-            self.background.fill((0, 0, 0))
-        else:
-            try:
-                self.background = pygame.image.load(backgroundImageLoc)
-            except pygame.error as e:
-                print(("Cannot load background image:", backgroundImageLoc))
-                raise SystemExit(e)
-            self.background = self.background.convert()
-            self.background = pygame.transform.smoothscale(self.background, size)
-            self.blit(self.background, (0, 0))
+        self.background: Optional[pygame.surface.Surface] = pygame.Surface(size)
+        self.background.fill((0, 0, 0))
+        self.backgroundFuture: Optional[Future] = None
+        if backgroundImageLoc is not None:
+            if assetCache is None:
+                assetCache = defaultCache()
+            self.backgroundFuture = loadInBackground(
+                assetCache.scaledImage, backgroundImageLoc, size
+            )
         self.size = size
 
-        pygame.display.set_caption("Orbital Game")
+        self.setStatus()
         self.screen.blit(self, (0, 0))
         pygame.display.update()
 
-    def update(self) -> None:
+    def setStatus(self, status: Optional[str] = None) -> None:
         """
-        Draw Everything
+        Show status, like the time warp, in the window caption
+        """
+        caption = "Orbital Game"
+        if status is not None:
+            caption += " - " + status
+        pygame.display.set_caption(caption)
+
+    def update(self) -> bool:
+        """
+        Draw Everything, returning whether the whole screen changed
         """
         if self.background is None:
             raise ValueError("background has not been set")
+        changed = False
+        if self.backgroundFuture is not None and self.backgroundFuture.done():
+            self.background = self.backgroundFuture.result().convert()
+            self.backgroundFuture = None
+            self.blit(self.background, (0, 0))
+            changed = True
         self.screen.blit(self, (0, 0))
+        return changed
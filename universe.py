@@ -3,18 +3,67 @@ Universe controls all of the SpaceObjects
 """
 
 import pygame  # type: ignore
-from pygame.locals import QUIT, KEYUP, KEYDOWN, K_ESCAPE, K_UP, K_DOWN, MOUSEBUTTONUP, MOUSEBUTTONDOWN  # type: ignore
-from math import sqrt
+from pygame.locals import QUIT, KEYUP, KEYDOWN, K_ESCAPE, K_UP, K_DOWN, K_COMMA, K_PERIOD, MOUSEBUTTONUP, MOUSEBUTTONDOWN, MOUSEMOTION, VIDEOEXPOSE, WINDOWEXPOSED  # type: ignore
+from math import inf, sqrt
+import heapq
+import time
 from copy import deepcopy
-from typing import Optional, List, Any, Tuple, TYPE_CHECKING
+from typing import (
+    Optional,
+    List,
+    Any,
+    Tuple,
+    Iterable,
+    Iterator,
+    Callable,
+    NamedTuple,
+    Sequence,
+    Dict,
+    TYPE_CHECKING,
+)
 
 from utils import Vec2
+from collisions import ConjunctionDetector, Conjunction
+from soi import SphereOfInfluenceTree
+from kepler import KeplerError, propagateKepler
+from ephemeris import Ephemeris
+from gravitygrid import GravityGrid
+from parallelstep import ParallelStepper
 from futurepaths import FuturePathsView
+from densepath import DensePath
+from pathsampling import adaptiveSample, simplify
+from objectpool import ObjectPool, swapRemove
+from monitor import ConservationMonitor
+from compactstate import CompactCatalog
+from forces import (
+    ForceModel,
+    GridGravity,
+    PointMassGravity,
+    SphereOfInfluenceGravity,
+)
+from trails import TrailsView
+from renderer import SpriteRenderer
 from spaceobject import SpaceObjectModel, SpaceObjectCtrl, SpaceObjectView
 from ui import MainWindow
+from timewarp import TimeWarp
 
 if TYPE_CHECKING:
     from spaceobject import SpaceObjectModel, SpaceObjectView, SpaceObjectCtrl
+    from recorder import Recorder
+    from netsim import SimClient
+    from controlapi import ControlServer
+
+
+class FutureSample(NamedTuple):
+    """
+    Predicted state of the massless objects at one model time
+    """
+
+    time: float
+    positions: List[Vec2]
+    burns: List[float]
+    ## Conjunctions since the previous sample, if the universe has a detector
+    conjunctions: List[Conjunction]
 
 
 class UniverseModel:
@@ -29,20 +78,248 @@ class UniverseModel:
         """
         self.massiveObjects: List[SpaceObjectModel] = []
         self.masslessObjects: List[SpaceObjectModel] = []
+        ## every object, by handle
+        self.objectPool: ObjectPool[SpaceObjectModel] = ObjectPool()
         self.G: float = G
         self.rPower: float = rPower
+        ## The terms of the acceleration on stepped objects. Terms besides
+        ## gravity and thrust turn off analytic coasting and parallel
+        ## stepping. The sphere of influence and gravity grid swap in their
+        ## own gravity terms.
+        self.forceModel: ForceModel = ForceModel()
+        self.time: float = 0.0  # model seconds since the start
+        ## If set, conjunctions found each update are appended to conjunctions
+        self.conjunctionDetector: Optional[ConjunctionDetector] = None
+        self.conjunctions: List[Conjunction] = []
+        ## If set, massless objects only feel their SOI primary and perturbers
+        self.sphereOfInfluence: Optional[SphereOfInfluenceTree] = None
+        ## If True, massless objects that aren't thrusting during a step are
+        ## propagated on Kepler orbits around their primary, when rPower is -2
+        ## and either there is one massive body or sphereOfInfluence is set
+        ## without perturbers
+        self.analyticCoasting: bool = False
+        ## If set, massive bodies follow it instead of being integrated,
+        ## while the model time is within it
+        self.ephemeris: Optional[Ephemeris] = None
+        ## If set, getA interpolates it instead of summing over the massive
+        ## objects. Dropped, along with its force term, as soon as a massive
+        ## object moves.
+        self.gravityGrid: Optional[GravityGrid] = None
+        ## If set, massless objects are stepped on its worker processes,
+        ## except while sphereOfInfluence is set or objects are coasting
+        ## analytically, and their kinematics are kept in its shared memory
+        self.parallelStepper: Optional[ParallelStepper] = None
+        ## Bumped whenever objects' kinematics are replaced from outside the
+        ## model's own stepping, as recorder.unpackObject does, so the
+        ## parallel stepper knows to pick the new ones up
+        self.stateVersion: int = 0
+        ## If set, samples how well energy and angular momentum are conserved
+        self.conservationMonitor: Optional[ConservationMonitor] = None
+        ## If set, coasting massless objects stored compactly, stepped along
+        ## with the rest. See compactstate.CompactCatalog
+        self.catalog: Optional[CompactCatalog] = None
 
-    def addObject(self, obj: SpaceObjectModel) -> None:
+    def addObject(self, obj: SpaceObjectModel) -> int:
+        """
+        Add obj, returning a handle that getObject finds it by until it's
+        removed
+        """
         obj.universe = self
+        obj.handle = self.objectPool.add(obj)
         if obj.mass > 0.0:
+            obj.listIndex = len(self.massiveObjects)
             self.massiveObjects += [obj]
+            if self.sphereOfInfluence is not None:
+                self.sphereOfInfluence.build()
+            self._dropGravityGrid()
+            if self.conservationMonitor is not None:
+                self.conservationMonitor.reset()
         else:
+            obj.listIndex = len(self.masslessObjects)
             self.masslessObjects += [obj]
+            if self.parallelStepper is not None:
+                self.parallelStepper.add(obj)
+        return obj.handle
+
+    def removeObject(self, obj: SpaceObjectModel) -> None:
+        """
+        Remove obj from the universe
+
+        A massless object is removed in constant time, by moving the last
+        massless object into its place. Removing a massive object keeps the
+        others in order, but drops the gravity grid, and the ephemeris if it
+        no longer matches.
+        """
+        if self.objectPool.get(obj.handle) is not obj:
+            raise ValueError("object isn't in this universe")
+        self.objectPool.remove(obj.handle)
+        if obj.mass > 0.0:
+            del self.massiveObjects[obj.listIndex]
+            for i in range(obj.listIndex, len(self.massiveObjects)):
+                self.massiveObjects[i].listIndex = i
+            if self.sphereOfInfluence is not None:
+                self.sphereOfInfluence.build()
+            self._dropGravityGrid()
+            if self.ephemeris is not None and not self.ephemeris.matches(self):
+                self.ephemeris = None
+            if self.conservationMonitor is not None:
+                self.conservationMonitor.reset()
+        else:
+            if self.parallelStepper is not None:
+                self.parallelStepper.remove(obj)
+            moved = swapRemove(self.masslessObjects, obj.listIndex)
+            if moved is not None:
+                moved.listIndex = obj.listIndex
+        obj.universe = None
+        obj.handle = -1
+        obj.listIndex = -1
+
+    def getObject(self, handle: int) -> Optional[SpaceObjectModel]:
+        """
+        The object added with handle, or None if it's been removed
+        """
+        return self.objectPool.get(handle)
+
+    def enableSphereOfInfluence(
+        self, perturbers: Sequence[SpaceObjectModel] = ()
+    ) -> None:
+        """
+        Evaluate gravity on massless objects using only the massive body whose
+        sphere of influence they are in, plus the tidal pull of perturbers.
+        See soi.SphereOfInfluenceTree
+        """
+        self.sphereOfInfluence = SphereOfInfluenceTree(self, perturbers)
+        self._setGravity()
+
+    def disableSphereOfInfluence(self) -> None:
+        """
+        Go back to evaluating gravity from every massive body
+        """
+        self.sphereOfInfluence = None
+        self._setGravity()
+
+    def enableGravityGrid(
+        self, rMin: float = 1e6, rMax: float = 1e9, cellsPerSide: int = 128
+    ) -> None:
+        """
+        Evaluate gravity from a grid precomputed for the current massive
+        objects, for as long as they don't move. See gravitygrid.GravityGrid
+
+        Raises ValueError if any massive object would move in the next
+        step, as the grid would be dropped straight away.
+        """
+        self.disableGravityGrid()
+        if self.ephemeris is not None:
+            raise ValueError("massive objects follow an ephemeris, so they move")
+        for obj in self.massiveObjects:
+            velocity = obj.kinematics.velocity
+            acceleration = self.getA(obj.kinematics.position)
+            if (
+                velocity.x != 0.0
+                or velocity.y != 0.0
+                or acceleration.x != 0.0
+                or acceleration.y != 0.0
+                or obj.thrust != 0.0
+                or obj.burnSchedule
+            ):
+                raise ValueError(f"massive object {obj.handle} isn't static")
+        self.gravityGrid = GravityGrid(self, rMin, rMax, cellsPerSide)
+        self._setGravity()
+
+    def disableGravityGrid(self) -> None:
+        """
+        Go back to evaluating gravity analytically
+        """
+        self.gravityGrid = None
+        self._setGravity()
+
+    def _dropGravityGrid(self) -> None:
+        """
+        disableGravityGrid, if there is a grid
+        """
+        if self.gravityGrid is not None:
+            self.disableGravityGrid()
+
+    def _setGravity(self) -> None:
+        """
+        Put the gravity term for the sphere of influence, or else the gravity
+        grid, into the force model, or point mass gravity if neither is set
+        """
+        if self.sphereOfInfluence is not None:
+            self.forceModel.setGravity(SphereOfInfluenceGravity())
+        elif self.gravityGrid is not None:
+            self.forceModel.setGravity(GridGravity())
+        else:
+            self.forceModel.setGravity(PointMassGravity())
+
+    def enableParallelStepping(self, nProcesses: Optional[int] = None) -> None:
+        """
+        Step the massless objects on nProcesses worker processes, by default
+        one per CPU. See parallelstep.ParallelStepper
+        """
+        self.disableParallelStepping()
+        self.parallelStepper = ParallelStepper(self, nProcesses)
+
+    def disableParallelStepping(self) -> None:
+        """
+        Go back to stepping everything in this process, stopping any workers
+        """
+        if self.parallelStepper is not None:
+            self.parallelStepper.close()
+        self.parallelStepper = None
+
+    def enableConservationMonitor(self, every: int = 10) -> None:
+        """
+        Sample the energy and angular momentum every so many steps, to see
+        how much they drift. See monitor.ConservationMonitor
+        """
+        self.conservationMonitor = ConservationMonitor(every)
+
+    def disableConservationMonitor(self) -> None:
+        """
+        Stop sampling the energy and angular momentum
+        """
+        self.conservationMonitor = None
+
+    def enableCompactCatalog(self) -> CompactCatalog:
+        """
+        Start stepping a compactstate.CompactCatalog, with one frame that
+        follows the heaviest massive object, if there is one, returning it
+        """
+        self.catalog = CompactCatalog()
+        if self.massiveObjects:
+            self.catalog.addFrame(max(self.massiveObjects, key=lambda o: o.mass))
+        else:
+            self.catalog.addFrame()
+        return self.catalog
+
+    def disableCompactCatalog(self) -> None:
+        self.catalog = None
+
+    def useEphemeris(self, ephemeris: Optional[Ephemeris]) -> None:
+        """
+        Move the massive bodies along ephemeris instead of integrating them,
+        or go back to integrating them if ephemeris is None.
+        See ephemeris.Ephemeris
+        """
+        if ephemeris is not None and not ephemeris.matches(self):
+            raise ValueError("ephemeris isn't for this universe's massive objects")
+        self.ephemeris = ephemeris
+
+    def getAOn(self, obj: SpaceObjectModel) -> Vec2:
+        """
+        Get the gravitational acceleration on obj
+        """
+        if self.sphereOfInfluence is not None and obj.mass == 0.0:
+            return self.sphereOfInfluence.getA(obj)
+        return self.getA(obj.kinematics.getPosition())
 
     def getA(self, position: Vec2) -> Vec2:
         """
         Get the gravitational acceleration at a point in space
         """
+        if self.gravityGrid is not None:
+            return Vec2(*self.gravityGrid.accelerationAt(position.x, position.y))
         acceleration = Vec2(0.0, 0.0)
         for mo in self.massiveObjects:
             rVec = mo.kinematics.getPosition() - position
@@ -58,15 +335,172 @@ class UniverseModel:
         """
         Update all of the objects' acceleration, velocity, position, and thrusts
         """
-        for obj in self.massiveObjects + self.masslessObjects:
-            obj.update1(dt)
-        for obj in self.massiveObjects + self.masslessObjects:
-            obj.update2(dt)
+        allObjects = self.massiveObjects + self.masslessObjects
+        ephemeris = self.ephemeris
+        onRails = (
+            ephemeris is not None
+            and ephemeris.covers(self.time)
+            and ephemeris.covers(self.time + dt)
+        )
+        if ephemeris is not None and onRails:
+            ephemeris.apply(self, self.time)
+        if self.sphereOfInfluence is not None:
+            self.sphereOfInfluence.update()
+        if self.gravityGrid is not None and not self.gravityGrid.matches(self):
+            self.disableGravityGrid()
+        if self.catalog is not None:
+            bodies = [
+                (
+                    obj.kinematics.position.x,
+                    obj.kinematics.position.y,
+                    self.G * obj.mass,
+                )
+                for obj in self.massiveObjects
+            ]
+        if self.conjunctionDetector is not None:
+            startPositions = [obj.kinematics.position.tuple() for obj in allObjects]
+        steppedObjects = allObjects
+        if onRails:
+            steppedObjects = self.masslessObjects
+        coasting: List[Tuple[SpaceObjectModel, SpaceObjectModel, Vec2, Vec2]] = []
+        if self.analyticCoasting and self.forceModel.isGravityAndThrust():
+            coasting = self._findCoasting(dt)
+            if coasting:
+                coastingIds = set(id(c[0]) for c in coasting)
+                steppedObjects = [o for o in steppedObjects if id(o) not in coastingIds]
+        ## Parallel stepping only knows about point mass gravity and thrust
+        parallelStepper = self.parallelStepper
+        if (
+            parallelStepper is not None
+            and self.sphereOfInfluence is None
+            and not coasting
+            and self.forceModel.isGravityAndThrust()
+        ):
+            ## Step the massive objects while the workers step the massless
+            massive = [obj for obj in steppedObjects if obj.mass > 0.0]
+            for obj in massive:
+                obj.update1(dt)
+            parallelStepper.start(dt)
+            for obj in massive:
+                obj.update2(dt)
+            parallelStepper.finish()
+        else:
+            self.forceModel.step(self, steppedObjects, dt)
+        if ephemeris is not None and onRails:
+            ephemeris.apply(self, self.time + dt)
+        for obj, primary, relPosition, relVelocity in coasting:
+            self._coast(obj, primary, relPosition, relVelocity, dt)
+        if self.catalog is not None:
+            self.catalog.step(dt, bodies, self)
+        if self.conjunctionDetector is not None:
+            self.conjunctions += self.conjunctionDetector.detect(
+                allObjects, startPositions, self.time, dt
+            )
+        self.time += dt
+        if self.conservationMonitor is not None:
+            self.conservationMonitor.afterStep(self)
+
+    def numericTimescale(self, dt: float) -> float:
+        """
+        Shortest orbital timescale, sqrt(r / a) for the gravity a of each
+        massive body at distance r, of the objects that a step of dt with
+        analytic coasting would still integrate numerically. inf if there
+        are none, or nothing pulls on them.
+        """
+        ephemeris = self.ephemeris
+        if (
+            ephemeris is not None
+            and ephemeris.covers(self.time)
+            and ephemeris.covers(self.time + dt)
+        ):
+            numeric = []
+        else:
+            numeric = list(self.massiveObjects)
+        if self.forceModel.isGravityAndThrust():
+            coastingIds = set(id(c[0]) for c in self._findCoasting(dt))
+            numeric += [o for o in self.masslessObjects if id(o) not in coastingIds]
+        else:
+            numeric += self.masslessObjects
+        shortest = inf
+        for body in self.massiveObjects:
+            gm = self.G * body.mass
+            bx, by = body.kinematics.position.tuple()
+            for obj in numeric:
+                if obj is body:
+                    continue
+                x, y = obj.kinematics.position.tuple()
+                r = sqrt((x - bx) ** 2 + (y - by) ** 2)
+                if r < 0.001:
+                    continue
+                shortest = min(shortest, r ** (1.0 - self.rPower) / gm)
+        return sqrt(shortest)
+
+    def _findCoasting(
+        self, dt: float
+    ) -> List[Tuple[SpaceObjectModel, SpaceObjectModel, Vec2, Vec2]]:
+        """
+        Find the massless objects that can be propagated analytically for
+        the next step of dt
+
+        Returns tuples of each object, its primary, and its position and
+        velocity relative to the primary.
+        """
+        result: List[Tuple[SpaceObjectModel, SpaceObjectModel, Vec2, Vec2]] = []
+        if self.rPower != -2.0:
+            return result
+        soi = self.sphereOfInfluence
+        if soi is None and len(self.massiveObjects) != 1:
+            return result
+        if soi is not None and soi.perturberIndices:
+            return result
+        for obj in self.masslessObjects:
+            if not obj.isCoasting(dt):
+                continue
+            if soi is not None:
+                primary = soi.primaryOf(obj)
+            else:
+                primary = self.massiveObjects[0]
+            relPosition = obj.kinematics.position - primary.kinematics.position
+            relVelocity = obj.kinematics.velocity - primary.kinematics.velocity
+            result += [(obj, primary, relPosition, relVelocity)]
+        return result
+
+    def _coast(
+        self,
+        obj: SpaceObjectModel,
+        primary: SpaceObjectModel,
+        relPosition: Vec2,
+        relVelocity: Vec2,
+        dt: float,
+    ) -> None:
+        """
+        Propagate obj on a Kepler orbit around primary, after primary was
+        updated. relPosition and relVelocity are from before the update.
+        If the Kepler equation can't be solved, obj is stepped numerically
+        instead.
+        """
+        mu = self.G * primary.mass
+        try:
+            x, y, vx, vy = propagateKepler(
+                mu, *relPosition.tuple(), *relVelocity.tuple(), dt
+            )
+        except KeplerError:
+            self.forceModel.step(self, [obj], dt)
+            return
+        position = primary.kinematics.getPosition() + Vec2(x, y)
+        velocity = primary.kinematics.getVelocity() + Vec2(vx, vy)
+        obj.kinematics.setPosVel(position, velocity)
+        r = sqrt(x * x + y * y)
+        if r > 0.001:
+            obj.kinematics.updateAcceleration(Vec2(-mu * x, -mu * y) * (1.0 / r**3))
+        obj.updateBurnSchedule(dt)
 
     def __str__(self) -> str:
         result = ""
         for obj in self.massiveObjects + self.masslessObjects:
             result += str(obj)
+        if self.conservationMonitor is not None:
+            result += str(self.conservationMonitor) + "\n"
         return result
 
     def getFuture(
@@ -74,50 +508,137 @@ class UniverseModel:
         dtList: List[float],
         selectedObj: Optional[SpaceObjectModel] = None,
         dtStepSize: float = 1e2,
+        objects: Optional[Sequence[SpaceObjectModel]] = None,
     ) -> Tuple[List[List[Vec2]], List[List[float]]]:
         """
-        Get the future positions and thrusts of all massless objects in the universe
+        Get the future positions and thrusts of all massless objects in the universe,
+        or only of selectedObj and objects, if objects isn't None
 
         dtStepSize is in model seconds, just like dtList
         """
-        futureUniverse, mlos = self.copyUniverse(selectedObj)
+        futurePositionList: List[List[Vec2]] = []
+        futureBurnList: List[List[float]] = []
+        for sample in self.iterFuture(dtList, selectedObj, dtStepSize, objects=objects):
+            if not futurePositionList:
+                futurePositionList = [[] for i in sample.positions]
+                futureBurnList = [[] for i in sample.burns]
+            for i in range(len(sample.positions)):
+                futurePositionList[i] += [sample.positions[i]]
+                futureBurnList[i] += [sample.burns[i]]
+        return futurePositionList, futureBurnList
+
+    def iterFuture(
+        self,
+        times: Iterable[float],
+        selectedObj: Optional[SpaceObjectModel] = None,
+        dtStepSize: float = 1e2,
+        stopCondition: Optional[Callable[["FutureSample"], bool]] = None,
+        objects: Optional[Sequence[SpaceObjectModel]] = None,
+    ) -> Iterator["FutureSample"]:
+        """
+        Yield a FutureSample of all massless objects at each of times, as soon
+        as it is computed
+
+        If objects isn't None, only selectedObj and objects are copied and
+        stepped, along with the massive objects, since massless objects don't
+        affect each other. Conjunctions are then only found among those.
+
+        times may be open-ended, like itertools.count(0.0, 1e3). Iteration
+        stops when times runs out, when the caller stops iterating, or right
+        after a sample for which stopCondition(sample) is True, e.g. to stop
+        once an object escapes or collides. dtStepSize is in model seconds, like times.
+        """
+        futureUniverse, mlos = self.copyUniverse(selectedObj, objects)
+        futureUniverse.conjunctions = []
 
-        futurePositionList: List[List[Vec2]] = [[] for i in mlos]
-        futureBurnList: List[List[float]] = [[] for i in mlos]
-        iDt = 0
         dtTotal = 0.0
-        while True:
-            dt = dtList[iDt]
-            dtStep = dtStepSize
-            recordThisStep = False
-            if dt - dtTotal < dtStepSize:
-                dtStep = dt - dtTotal
-                recordThisStep = True
+        for t in times:
+            while True:
+                dtStep = dtStepSize
+                recordThisStep = False
+                if t - dtTotal < dtStepSize:
+                    dtStep = t - dtTotal
+                    recordThisStep = True
+                futureUniverse.update(dtStep)
+                dtTotal += dtStep
+                if recordThisStep:
+                    break
+            positions = [obj.kinematics.getPosition() for obj in mlos]
+            burns: List[float] = []
+            for obj in mlos:
+                burn = 0.0
+                for burnTime in obj.burnSchedule:
+                    if burnTime[0] <= 0.0:
+                        burn += burnTime[2]
+                burns += [burn]
+            sample = FutureSample(t, positions, burns, futureUniverse.conjunctions)
+            futureUniverse.conjunctions = []
+            yield sample
+            if stopCondition is not None and stopCondition(sample):
+                return
+
+    def getDensePath(
+        self,
+        duration: float,
+        selectedObj: Optional[SpaceObjectModel] = None,
+        dtStepSize: float = 1e2,
+        objects: Optional[Sequence[SpaceObjectModel]] = None,
+    ) -> DensePath:
+        """
+        Predict the massless objects (or selectedObj and objects, as for
+        getFuture) for duration model seconds, keeping their states after
+        every step so their positions can be found at any time in between.
+        The selected object, if any, is object 0 of the DensePath.
+        """
+        futureUniverse, mlos = self.copyUniverse(selectedObj, objects)
+        path = DensePath(len(mlos))
+        path.record(0.0, mlos, dtStepSize)
+        t = 0.0
+        while t < duration:
+            dtStep = min(dtStepSize, duration - t)
             futureUniverse.update(dtStep)
-            if recordThisStep:
-                for i in range(len(mlos)):
-                    pos = mlos[i].kinematics.getPosition()
-                    futurePositionList[i] += [pos]
-                    burn = 0.0
-                    for burnTime in mlos[i].burnSchedule:
-                        if burnTime[0] <= 0.0:
-                            burn += burnTime[2]
-                    futureBurnList[i] += [burn]
-                iDt += 1
-            dtTotal += dtStep
-            if iDt >= len(dtList):
-                break
-        return futurePositionList, futureBurnList
+            t += dtStep
+            path.record(t, mlos, dtStep)
+        return path
 
     def copyUniverse(
-        self, selectedObj: Optional["SpaceObjectModel"] = None
+        self,
+        selectedObj: Optional["SpaceObjectModel"] = None,
+        objects: Optional[Sequence[SpaceObjectModel]] = None,
     ) -> Tuple["UniverseModel", List[SpaceObjectModel]]:
         """
         Make a copy of this universe and also return a list of its massless objects.
-        If selectedObj is not None, then make sure it is first in the list
+        If selectedObj is not None, then make sure it is first in the list.
+        If objects is not None, then the copy only has the massless objects
+        that are selectedObj or in objects
         """
-        futureUniverse = deepcopy(self)
+        allMassless = self.masslessObjects
+        allPool = self.objectPool
+        if objects is not None:
+            wanted = set(id(obj) for obj in objects)
+            if selectedObj is not None:
+                wanted.add(id(selectedObj))
+            self.masslessObjects = [obj for obj in allMassless if id(obj) in wanted]
+            self.objectPool = allPool.subset(self.massiveObjects + self.masslessObjects)
+        ## The copy steps serially, isn't monitored, and has no catalog
+        parallelStepper = self.parallelStepper
+        conservationMonitor = self.conservationMonitor
+        catalog = self.catalog
+        self.parallelStepper = None
+        self.conservationMonitor = None
+        self.catalog = None
+        try:
+            futureUniverse = deepcopy(self)
+        finally:
+            self.masslessObjects = allMassless
+            self.objectPool = allPool
+            self.parallelStepper = parallelStepper
+            self.conservationMonitor = conservationMonitor
+            self.catalog = catalog
         mlos = futureUniverse.masslessObjects
+        if objects is not None:
+            for i, obj in enumerate(mlos):
+                obj.listIndex = i
         if selectedObj is not None:
             foundSelected = False
             mlosNew: List[SpaceObjectModel] = []
@@ -142,20 +663,68 @@ class UniverseView:
     def __init__(self, window: "MainWindow") -> None:
         self.window = window
         self.objects: pygame.sprite.RenderUpdates = pygame.sprite.RenderUpdates()
+        ## the objects that are on screen, the only ones updated and drawn
+        self.visible: pygame.sprite.Group = pygame.sprite.Group()
+        ## draws the visible objects, with their borders and flames
+        self.renderer: SpriteRenderer = SpriteRenderer()
         self.selected = pygame.sprite.Group()
         self.hudGroup = pygame.sprite.RenderUpdates()
         self.toUpdateRectsList: List[pygame.rect.Rect] = []
+        ## removed sprites, by image file and scale, for reuse
+        self.spritePool: Dict[Tuple[str, float], List["SpaceObjectView"]] = {}
+
+    def newSprite(self, img: str, scaleImg: float, x: int, y: int) -> "SpaceObjectView":
+        """
+        A SpaceObjectView at pixel x, y, reusing a removed one with the same
+        image and scale if there is one
+        """
+        pool = self.spritePool.get((img, scaleImg))
+        if pool:
+            sprite = pool.pop()
+            sprite.reset(x, y)
+            return sprite
+        return SpaceObjectView(img, scaleImg, x, y)
 
     def addObject(self, obj: "SpaceObjectView") -> None:
         obj.setUniverse(self)
         self.objects.add(obj)
+        self.cull(obj)
+
+    def removeObject(self, obj: "SpaceObjectView") -> None:
+        """
+        Take obj off the screen and keep it for newSprite to reuse
+        """
+        ## The renderer still clears where it was last drawn
+        obj.kill()
+        self.spritePool.setdefault(obj.imageKey, []).append(obj)
+
+    def isOnScreen(self, xy: Tuple[int, int], size: Tuple[int, int]) -> bool:
+        """
+        Whether a sprite of size centred at pixel xy would overlap the screen
+        """
+        width, height = self.window.size
+        return (
+            -size[0] < 2 * xy[0] < 2 * width + size[0]
+            and -size[1] < 2 * xy[1] < 2 * height + size[1]
+        )
+
+    def cull(self, obj: "SpaceObjectView") -> None:
+        """
+        Put obj in or take it out of the visible group, depending on whether
+        it's on screen
+        """
+        if self.isOnScreen(obj.rect.center, obj.rect.size):
+            self.visible.add(obj)
+        else:
+            ## The renderer still clears where it was last drawn
+            self.visible.remove(obj)
 
     def update(self) -> None:
         """
-        Update everything
+        Update everything on screen
         """
-        self.objects.update()
-        self.toUpdateRectsList += self.objects.draw(self.window.screen)
+        self.visible.update()
+        self.toUpdateRectsList += self.renderer.draw(self.window.screen, self.visible)
         self.toUpdateRectsList += self.hudGroup.draw(self.window.screen)
 
         pygame.display.update(self.toUpdateRectsList)  # type: ignore
@@ -178,17 +747,26 @@ class UniverseView:
         futureBurns: List[List[float]],
         timePoints: Optional[List[float]] = None,
         selected: bool = False,
+        linePaths: Optional[List[List[Tuple[int, int]]]] = None,
     ) -> None:
         """
         Draw the future paths, highlighting the first entry in the list, if selected is True
+
+        If given, the lines are drawn through linePaths instead of futurePaths,
+        which then only place the burns and times
         """
         pathsView = FuturePathsView(self)
         selectedBools = [False for i in range(len(futurePaths))]
-        selectedBools[0] = selected
-        for objPath, objBurns, selectedPathBool in reversed(
-            list(zip(futurePaths, futureBurns, selectedBools))
+        if selectedBools:
+            selectedBools[0] = selected
+        if linePaths is None:
+            linePaths = futurePaths
+        for objPath, objBurns, selectedPathBool, linePath in reversed(
+            list(zip(futurePaths, futureBurns, selectedBools, linePaths))
         ):
-            pathsView.addPath(selectedPathBool, objPath, objBurns, timePoints)
+            pathsView.addPath(
+                selectedPathBool, objPath, objBurns, timePoints, linePoints=linePath
+            )
 
 
 ######################################################3
@@ -208,14 +786,44 @@ class UniverseCtrl:
         modelSize = 3.5e7 * 3.0
         # self.meterPerPixel = 1e10
         self.meterPerPixel = modelSize / self.viewSize[1]
-        self.speedUpFactor = 5e3
-        self.updateModelEvery = 1e2  # seconds of model time
+        self.timeWarp = TimeWarp(baseStep=1e2, level=5e3)
+        self.updateModelEvery = self.timeWarp.baseStep  # seconds of model time
+        self.maxModelUpdatesPerFrame = self.timeWarp.maxStepsPerFrame
+        ## model time not yet stepped, carried over to the next frame
+        self.modelTimeAccumulator = 0.0
         self.dRClickPath = 25.0
+        ## predicted paths are shown every pathSampleTime for pathDuration
+        ## model seconds
+        self.pathSampleTime = 1e3
+        self.pathDuration = 29e3
+        ## most pixels drawn paths may be off from the predicted ones
+        self.pathTolerance = 0.5
+        ## shorter burns dragged along a path are taken as clicks
+        self.minBurnTime = 1e2
+        ## frame rate caps while the model runs and while it's paused. When
+        ## paused and nothing has changed, run waits for input instead.
+        self.runningFps = 60
+        self.pausedFps = 30
+        ## whether the screen must be redrawn even if no object moved
+        self.needsRedraw = True
 
         self.mainwindow = MainWindow(size, backgroundImageLoc)
+        self.mainwindow.setStatus("warp {0}".format(self.timeWarp))
         self.model = UniverseModel()
+        if self.debug:
+            self.model.enableConservationMonitor()
         self.view = UniverseView(self.mainwindow)
         self.objects: List[SpaceObjectCtrl] = []
+        ## objects whose views are synced each frame, and a heap of the
+        ## others, off screen, by the model time they might reach it
+        self.viewAwake: List[SpaceObjectCtrl] = []
+        self.viewAsleep: List[Tuple[float, int, SpaceObjectCtrl]] = []
+        self.nViewSleeps = 0
+        ## longest model time an object's view sync is put off for
+        self.maxViewSleep = 1e4
+        ## what the sleeping views' times were found for; see updateViewToModel
+        self.viewSleepKey: Tuple[Any, ...] = ()
+        self.lastViewTime = 0.0
 
         self.selected: List[SpaceObjectCtrl] = []
 
@@ -224,12 +832,92 @@ class UniverseCtrl:
 
         self.selectedPathPointsView: Optional[List[Tuple[int, int]]] = None
         self.selectedPathTimes: Optional[List[float]] = None
-        self.selectedBurnStartIndex: Optional[int] = None
+        self.selectedDensePath: Optional[DensePath] = None
+        self.selectedBurnStartTime: Optional[float] = None
+
+        self.recorder: Optional["Recorder"] = None
+        ## If set, trails are drawn behind the massless objects
+        self.trails: Optional[TrailsView] = None
+        ## If set, the model follows a netsim.SimServer instead of stepping
+        self.simClient: Optional["SimClient"] = None
+        ## If set, external tools query and control the model through it
+        self.controlServer: Optional["ControlServer"] = None
+
+    def startRecording(self, filename: str, keyframeEvery: float = 1e5) -> None:
+        """
+        Record the model steps and inputs to filename, for later replay
+        with recorder.Replayer. Call after all objects are added.
+        """
+        from recorder import Recorder
+
+        self.recorder = Recorder(filename, self.model, keyframeEvery)
+
+    def connect(self, host: str, port: int) -> None:
+        """
+        Show the model of the netsim.SimServer at host, port instead of
+        stepping this one, sending it thrust and burns. The server's model
+        must have the same objects, e.g. set up by the same code, and keep
+        them; otherwise SimClient.poll raises ValueError.
+        """
+        from netsim import SimClient
+
+        self.simClient = SimClient(host, port, self.model)
+
+    def enableControlApi(self, port: int = 0, path: Optional[str] = None) -> None:
+        """
+        Serve controlapi's API on port on localhost, or on a Unix socket at
+        path. Commands are run between frames.
+        """
+        from controlapi import ControlServer
+
+        self.controlServer = ControlServer(
+            self.model,
+            port,
+            path,
+            scheduleBurn=self.scheduleBurn,
+            wake=lambda: pygame.event.post(pygame.event.Event(pygame.USEREVENT)),
+        )
+
+    def enableTrails(self, capacity: int = 64, interval: float = 1e3) -> None:
+        """
+        Draw trails of the last capacity positions of the massless objects,
+        recorded every interval model seconds. See trails.TrailsView
+        """
+        self.trails = TrailsView(capacity, interval)
+
+    def disableTrails(self) -> None:
+        self.trails = None
+        self.needsRedraw = True
+        self.view.toUpdateRectsList += [self.mainwindow.screen.get_rect()]
 
     def addObject(self, obj: "SpaceObjectCtrl") -> None:
+        obj.listIndex = len(self.objects)
         self.objects += [obj]
+        obj.viewAsleep = False
+        self.viewAwake.append(obj)
         self.model.addObject(obj.model)
         self.view.addObject(obj.view)
+        if self.recorder is not None:
+            self.recorder.recordSpawn(obj.model)
+
+    def removeObject(self, obj: "SpaceObjectCtrl") -> None:
+        """
+        Remove obj, e.g. a spent missile or debris, from the game
+        """
+        if obj.selected:
+            self.deselectAll()
+        moved = swapRemove(self.objects, obj.listIndex)
+        if moved is not None:
+            moved.listIndex = obj.listIndex
+        obj.listIndex = -1
+        if self.recorder is not None:
+            self.recorder.recordDespawn(obj.model)
+        self.model.removeObject(obj.model)
+        self.view.removeObject(obj.view)
+        if self.trails is not None:
+            self.trails.remove(obj)
+        if self.selectedModeFlag:
+            self.showPaths()
 
     def convertCoordsModel2View(self, x: float, y: float) -> Tuple[int, int]:
         """
@@ -240,20 +928,125 @@ class UniverseCtrl:
             int(-y // self.meterPerPixel + self.viewSize[1] // 2),
         )
 
+    def convertCoordsModel2ViewExact(self, x: float, y: float) -> Tuple[float, float]:
+        """
+        Convert from model/dynamics coordinates to view/screen/window coordinates,
+        without rounding to whole pixels
+        """
+        return (
+            x / self.meterPerPixel + self.viewSize[0] // 2,
+            -y / self.meterPerPixel + self.viewSize[1] // 2,
+        )
+
     def convertCoordsView2Model(self, x: int, y: int) -> Tuple[float, float]:
         """
         Convert from view/screen/window coordinates to model/dynamics coordinates
         """
-        return (x - self.viewSize[0] / 2) * self.meterPerPixel, (
+        return (x - self.viewSize[0] / 2) * self.meterPerPixel, -(
             y - self.viewSize[1] / 2
         ) * self.meterPerPixel
 
-    def updateViewToModel(self) -> None:
+    def updateViewToModel(self, alpha: float = 1.0) -> bool:
         """
-        Make sure the view/screen/window matches the model/dynamics
+        Make sure the view/screen/window matches the model/dynamics, returning
+        whether any object's view changed
+
+        alpha interpolates between the previous (0) and current (1) model step.
+        Only objects whose view changed are checked for going on or off screen.
+
+        Objects off screen are skipped until the model time they might reach
+        it, from SpaceObjectCtrl.viewSleepTime, so a frame only costs as
+        much as the objects on or near the screen. They're all woken if the
+        scale, screen size or model state (e.g. a replay seek) changes, or
+        time goes backwards.
         """
-        for obj in self.objects:
-            obj.updateViewToModel()
+        now = self.model.time
+        key = (
+            self.meterPerPixel,
+            self.viewSize,
+            self.view.window.size,
+            self.model.stateVersion,
+        )
+        if key != self.viewSleepKey or (self.viewAsleep and now < self.lastViewTime):
+            self.viewSleepKey = key
+            self._wakeViews(inf)
+        else:
+            self._wakeViews(now)
+        self.lastViewTime = now
+        changed = False
+        awake = []
+        for obj in self.viewAwake:
+            if obj.listIndex < 0:
+                continue
+            if obj.updateViewToModel(alpha):
+                self.view.cull(obj.view)
+                changed = True
+            if obj.view not in self.view.visible:
+                sleepTime = min(obj.viewSleepTime(), self.maxViewSleep)
+                if sleepTime > 0.0:
+                    obj.viewAsleep = True
+                    self.nViewSleeps += 1
+                    heapq.heappush(
+                        self.viewAsleep, (now + sleepTime, self.nViewSleeps, obj)
+                    )
+                    continue
+            awake.append(obj)
+        self.viewAwake = awake
+        return changed
+
+    def _wakeViews(self, until: float) -> None:
+        """
+        Sync the views of the objects put to sleep until model time until or
+        earlier again
+        """
+        asleep = self.viewAsleep
+        while asleep and asleep[0][0] <= until:
+            obj = heapq.heappop(asleep)[2]
+            ## Left in the heap if it was removed, or added again since
+            if obj.viewAsleep and obj.listIndex >= 0:
+                obj.viewAsleep = False
+                self.viewAwake.append(obj)
+
+    def advanceModel(self, dt: float) -> float:
+        """
+        Advance the model by dt seconds of wall-clock time at the current
+        time warp, in fixed steps of updateModelEvery model seconds, which the
+        time warp makes bigger when smaller steps wouldn't fit in the frame
+
+        Model time that doesn't fill a whole step is carried over to the next
+        call. At most maxModelUpdatesPerFrame steps are taken, and any time
+        beyond that is dropped, so the model slows down rather than taking
+        ever longer frames. Returns how far the leftover time is into the
+        next step, from 0 to 1, for interpolating the view.
+
+        Steps only grow past the time warp's baseStep as far as the objects
+        still integrated numerically stay accurate; when that holds them
+        back, the warp level comes down instead.
+        """
+        timescale = inf
+        baseStep = self.timeWarp.baseStep
+        if self.timeWarp.speedUpFactor * dt > baseStep or self.timeWarp.step > baseStep:
+            timescale = self.model.numericTimescale(self.timeWarp.maxStep)
+        self.updateModelEvery = self.timeWarp.stepSize(dt, timescale)
+        if self.timeWarp.accuracyLimited and self.timeWarp.warpDown():
+            self.warpChanged()
+        self.model.analyticCoasting = self.timeWarp.analyticCoasting(
+            self.updateModelEvery
+        )
+        self.modelTimeAccumulator += dt * self.timeWarp.speedUpFactor
+        nModelUpdates = int(self.modelTimeAccumulator // self.updateModelEvery)
+        if nModelUpdates > self.maxModelUpdatesPerFrame:
+            nModelUpdates = self.maxModelUpdatesPerFrame
+            self.modelTimeAccumulator = nModelUpdates * self.updateModelEvery
+        startTime = time.perf_counter()
+        for i in range(nModelUpdates):
+            if i == nModelUpdates - 1:
+                for obj in self.objects:
+                    obj.savePreviousPosition()
+            self.stepModel(self.updateModelEvery)
+            self.modelTimeAccumulator -= self.updateModelEvery
+        self.timeWarp.measure(time.perf_counter() - startTime, nModelUpdates)
+        return self.modelTimeAccumulator / self.updateModelEvery
 
     def run(self) -> None:
         """
@@ -263,59 +1056,156 @@ class UniverseCtrl:
         running = True
         counter = 0.0
         while running:
-            clock.tick(60)
+            if self.pauseModel:
+                clock.tick(self.pausedFps)
+            else:
+                clock.tick(self.runningFps)
             dt = clock.get_time() / 1000.0  # Convert from ms to s
             counter += dt
             if counter > 2.0:
                 if self.debug:
                     print(("fps: {0}".format(clock.get_fps())))
+                    print(
+                        "warp: {0}, step: {1:g}s, step cost: {2}s".format(
+                            self.timeWarp,
+                            self.updateModelEvery,
+                            self.timeWarp.costPerStep,
+                        )
+                    )
                     print((self.model))
                 counter = 0.0
 
-            # Handle Input Events
-            for event in pygame.event.get():
+            # Handle Input Events, waiting for some if there's nothing to do
+            events = []
+            if self.pauseModel and not self.needsRedraw and self.simClient is None:
+                events = [pygame.event.wait()]
+                ## Don't count the wait as frame time
+                clock.tick()
+            for event in events + pygame.event.get():
                 running = running and self.handleUIEvents(event)
+            if self.controlServer is not None and self.controlServer.process():
+                self.needsRedraw = True
+                if self.selectedModeFlag:
+                    self.showPaths()
 
             # Update Model
-            if not self.pauseModel:
-                dtModel = dt * self.speedUpFactor
-                nModelUpdates = int(dtModel / self.updateModelEvery)
-                dtRemainder = dtModel % self.updateModelEvery
-                for i in range(nModelUpdates):
-                    self.model.update(self.updateModelEvery)
-                self.model.update(dtRemainder)
+            alpha = 1.0
+            if self.simClient is not None:
+                self.simClient.poll()
+                if self.simClient.closed:
+                    running = False
+            elif not self.pauseModel:
+                alpha = self.advanceModel(dt)
+            if self.debug:
+                for conjunction in self.model.conjunctions:
+                    print(conjunction)
+            self.model.conjunctions = []
+
             # Update View to model
-            self.updateViewToModel()
+            changed = self.updateViewToModel(alpha)
+            if self.trails is not None:
+                self.trails.record(
+                    self.objects,
+                    self.model.time,
+                    self.convertCoordsModel2View,
+                    (self.meterPerPixel, self.viewSize),
+                )
 
-            # Update View
-            self.mainwindow.update()
-            self.view.update()
+            # Update View, if anything could look different
+            if changed or self.needsRedraw or not self.pauseModel:
+                if self.mainwindow.update():
+                    self.view.toUpdateRectsList += [self.mainwindow.screen.get_rect()]
+                if self.trails is not None:
+                    self.view.toUpdateRectsList += self.trails.draw(
+                        self.mainwindow.screen
+                    )
+                self.view.update()
+                self.needsRedraw = False
 
         ## End of event loop
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.controlServer is not None:
+            self.controlServer.close()
         pygame.quit()
 
+    def stepModel(self, dt: float) -> None:
+        """
+        Update the model by dt, recording the step if recording
+        """
+        if self.recorder is not None:
+            self.recorder.recordStep(dt)
+        self.model.update(dt)
+
+    def setThrust(self, obj: "SpaceObjectCtrl", thrust: float) -> None:
+        """
+        Set the thrust of an object, recording it if recording
+
+        Nothing is recorded or sent if the thrust isn't changing, e.g. for
+        all of the objects that weren't thrusting when a key is released.
+        """
+        if obj.model.thrust == thrust:
+            return
+        if self.recorder is not None:
+            self.recorder.recordThrust(obj.model, thrust)
+        if self.simClient is not None:
+            self.simClient.sendThrust(self.simClient.remoteHandle(obj.model), thrust)
+        obj.model.thrust = thrust
+
+    def scheduleBurn(
+        self, obj: SpaceObjectModel, startTime: float, endTime: float, thrust: float
+    ) -> None:
+        """
+        Add a burn to obj's schedule, recording it if recording
+        """
+        if self.recorder is not None:
+            self.recorder.recordBurn(obj, startTime, endTime, thrust)
+        if self.simClient is not None:
+            handle = self.simClient.remoteHandle(obj)
+            self.simClient.sendBurn(handle, startTime, endTime, thrust)
+        obj.scheduleBurn(startTime, endTime, thrust)
+
     def handleUIEvents(self, event: pygame.event.Event) -> bool:
         running = True
+        if event.type != MOUSEMOTION:
+            self.needsRedraw = True
         if event.type == QUIT:
             running = False
         elif event.type == KEYDOWN and event.key == K_ESCAPE:
             running = False
 
+        elif event.type == KEYDOWN and event.key == K_PERIOD:
+            if self.timeWarp.warpUp():
+                self.warpChanged()
+        elif event.type == KEYDOWN and event.key == K_COMMA:
+            if self.timeWarp.warpDown():
+                self.warpChanged()
         elif event.type == KEYDOWN and event.key == K_UP:
             for obj in self.selected:
-                obj.model.thrust = 1.0
+                self.setThrust(obj, 1.0)
         elif event.type == KEYDOWN and event.key == K_DOWN:
             for obj in self.selected:
-                obj.model.thrust = -1.0
+                self.setThrust(obj, -1.0)
         elif event.type == KEYUP and (event.key == K_UP or event.key == K_DOWN):
             for obj in self.objects:
-                obj.model.thrust = 0.0
+                self.setThrust(obj, 0.0)
         elif event.type == MOUSEBUTTONDOWN and event.dict["button"] == 1:
             self.handleMouseButtonDownEvent(event)
         elif event.type == MOUSEBUTTONUP:
             self.handleMouseButtonUpEvent(event)
+        elif event.type == VIDEOEXPOSE or event.type == WINDOWEXPOSED:
+            ## The whole window needs repainting, not just the sprites
+            self.view.toUpdateRectsList += [self.mainwindow.screen.get_rect()]
         return running
 
+    def warpChanged(self) -> None:
+        """
+        Show the new time warp level and drop model time left over from the
+        old one
+        """
+        self.modelTimeAccumulator = 0.0
+        self.mainwindow.setStatus("warp {0}".format(self.timeWarp))
+
     def handleMouseButtonDownEvent(self, event: pygame.event.Event) -> None:
         assert event.type == MOUSEBUTTONDOWN and event.dict["button"] == 1
         mousePosition = event.dict["pos"]
@@ -324,9 +1214,9 @@ class UniverseCtrl:
         if nClickedObjects == 1:
             self.selectObject(clickedObjects[0])
         elif self.selectedModeFlag:
-            startIndex = self.isCloseToFuturePath(mousePosition)
-            if startIndex is not None:
-                self.selectedBurnStartIndex = startIndex
+            startTime = self.isCloseToFuturePath(mousePosition)
+            if startTime is not None:
+                self.selectedBurnStartTime = startTime
             else:
                 self.deselectAll()
         elif nClickedObjects == 0:
@@ -335,22 +1225,16 @@ class UniverseCtrl:
     def handleMouseButtonUpEvent(self, event: pygame.event.Event) -> None:
         assert event.type == MOUSEBUTTONUP
         mousePosition = event.dict["pos"]
-        if (
-            self.selectedModeFlag
-            and self.selectedBurnStartIndex is not None
-            and self.selectedPathTimes is not None
-        ):
-            endIndex = self.isCloseToFuturePath(mousePosition)
-            if endIndex is not None and endIndex != self.selectedBurnStartIndex:
-                burnStartT = self.selectedPathTimes[self.selectedBurnStartIndex]
-                burnEndT = self.selectedPathTimes[endIndex]
-                if burnEndT is not None:
-                    if burnEndT > burnStartT:
-                        self.selected[0].scheduleBurn(burnStartT, burnEndT, 1.0)
-                    if burnEndT < burnStartT:
-                        self.selected[0].scheduleBurn(burnEndT, burnStartT, -1.0)
+        if self.selectedModeFlag and self.selectedBurnStartTime is not None:
+            burnStartT = self.selectedBurnStartTime
+            burnEndT = self.isCloseToFuturePath(mousePosition)
+            if burnEndT is not None and abs(burnEndT - burnStartT) >= self.minBurnTime:
+                if burnEndT > burnStartT:
+                    self.selected[0].scheduleBurn(burnStartT, burnEndT, 1.0)
+                if burnEndT < burnStartT:
+                    self.selected[0].scheduleBurn(burnEndT, burnStartT, -1.0)
             else:
-                self.selectedBurnStartIndex = None
+                self.selectedBurnStartTime = None
 
     def findObjectsAtPoint(self, point: Tuple[int, int]) -> List["SpaceObjectCtrl"]:
         """
@@ -382,54 +1266,111 @@ class UniverseCtrl:
             obj.selected = False
         self.view.deselectAll()
         self.view.hudGroup.empty()
+        self.needsRedraw = True
         self.selected = []
         self.selectedPathPointsView = None
         self.selectedPathTimes = None
-        self.selectedBurnStartIndex = None
+        self.selectedDensePath = None
+        self.selectedBurnStartTime = None
 
     def showPaths(self) -> None:
         """
         Show space object paths in view
         """
+        self.needsRedraw = True
         self.view.hudGroup.empty()
-        timePoints = [i * 1e3 for i in range(30)]
+        nPoints = int(round(self.pathDuration / self.pathSampleTime)) + 1
+        timePoints = [i * self.pathSampleTime for i in range(nPoints)]
         selectedModel: Optional[SpaceObjectModel] = self.selected[0].model
         if selectedModel is None or selectedModel.mass > 0.0:
             selectedModel = None
-        futurePaths, futureBurns = self.model.getFuture(
-            timePoints, selectedObj=selectedModel
+        densePath = self.model.getDensePath(
+            self.pathDuration, selectedObj=selectedModel, objects=self.onScreenObjects()
         )
+        bounds = (0.0, 0.0, float(self.viewSize[0]), float(self.viewSize[1]))
         futurePathsView: List[List[Tuple[int, int]]] = []
-        for path in futurePaths:
+        futureBurns: List[List[float]] = []
+        linePathsView: List[List[Tuple[int, int]]] = []
+        lineTimes: List[List[float]] = []
+        for iObject in range(densePath.nObjects):
             pathView: List[Tuple[int, int]] = []
-            for p in path:
+            for p in densePath.positionsAt(iObject, timePoints):
                 pView = self.convertCoordsModel2View(*(p.tuple()))
                 pathView += [pView]
             futurePathsView += [pathView]
+            futureBurns += [[densePath.burnAt(iObject, t) for t in timePoints]]
+
+            ## Lines sampled more finely where the path turns on screen, then
+            ## only the points needed to draw them
+            def positionAt(t: float, iObject: int = iObject) -> Tuple[float, float]:
+                return self.convertCoordsModel2ViewExact(
+                    *densePath.positionAt(iObject, t).tuple()
+                )
+
+            times, points = adaptiveSample(
+                positionAt, timePoints, self.pathTolerance, bounds=bounds
+            )
+            keep = simplify(points, self.pathTolerance)
+            linePathsView += [[(int(points[i][0]), int(points[i][1])) for i in keep]]
+            lineTimes += [[times[i] for i in keep]]
         selected = True
         if selectedModel is None or selectedModel.mass > 0.0:
             selected = False
-        self.view.showPaths(futurePathsView, futureBurns, timePoints, selected=selected)
+        self.view.showPaths(
+            futurePathsView,
+            futureBurns,
+            timePoints,
+            selected=selected,
+            linePaths=linePathsView,
+        )
 
         if selectedModel is not None and selectedModel.mass == 0.0:
-            self.selectedPathPointsView = futurePathsView[0]
-            self.selectedPathTimes = timePoints
+            self.selectedPathPointsView = linePathsView[0]
+            self.selectedPathTimes = lineTimes[0]
+            self.selectedDensePath = densePath
 
-    def isCloseToFuturePath(self, pos: Tuple[int, int]) -> Optional[int]:
+    def onScreenObjects(self) -> List[SpaceObjectModel]:
         """
-        Check if position is close to a path
+        The massless objects that are currently in view
         """
-        if self.selectedPathPointsView is None:
+        result: List[SpaceObjectModel] = []
+        for obj in self.model.masslessObjects:
+            x, y = self.convertCoordsModel2View(*obj.kinematics.position.tuple())
+            if 0 <= x < self.viewSize[0] and 0 <= y < self.viewSize[1]:
+                result += [obj]
+        return result
+
+    def isCloseToFuturePath(self, pos: Tuple[int, int]) -> Optional[float]:
+        """
+        Check if position is close to the selected path, returning the time
+        along the path closest to it, or None if it isn't close
+        """
+        points = self.selectedPathPointsView
+        times = self.selectedPathTimes
+        if points is None or times is None or self.selectedDensePath is None:
             return None
         drMax2 = self.dRClickPath**2
         x, y = pos
-        dR2List = [
-            (xS - x) ** 2 + (yS - y) ** 2 for xS, yS in self.selectedPathPointsView
-        ]
-        minR2 = min(dR2List)
-        result = minR2 < drMax2
-        if not result:
+        ## Find the closest drawn segment, then the closest time along it
+        minR2 = float("inf")
+        iMin = 0
+        for i in range(max(len(points) - 1, 1)):
+            xA, yA = points[i]
+            xB, yB = points[min(i + 1, len(points) - 1)]
+            dx = xB - xA
+            dy = yB - yA
+            length2 = dx * dx + dy * dy
+            f = 0.0
+            if length2 > 0:
+                f = min(max(((x - xA) * dx + (y - yA) * dy) / length2, 0.0), 1.0)
+            r2 = (xA + f * dx - x) ** 2 + (yA + f * dy - y) ** 2
+            if r2 < minR2:
+                minR2 = r2
+                iMin = i
+        if not minR2 < drMax2:
             return None
-        # print("minR: {0:.1f}, result: {1}".format(sqrt(minR2),result))
-        iMinR2 = dR2List.index(minR2)
-        return iMinR2
+        tStart = times[max(iMin - 1, 0)]
+        tEnd = times[min(iMin + 2, len(times) - 1)]
+        return self.selectedDensePath.closestTime(
+            0, Vec2(*self.convertCoordsView2Model(x, y)), tStart, tEnd
+        )
@@ -169,3 +169,36 @@ class Vec2:
 
     def copy(self) -> "Vec2":
         return Vec2(self.x, self.y)
+
+
+def hermite(
+    p0: float, v0: float, p1: float, v1: float, h: float, s: float
+) -> Tuple[float, float, float]:
+    """
+    Cubic Hermite interpolation between positions p0 and p1 with derivatives
+    (velocities) v0 and v1, over an interval of length h
+
+    s is the fraction of the way through the interval, from 0 to 1.
+    Returns the interpolated position, velocity, and acceleration.
+    """
+    s2 = s * s
+    s3 = s2 * s
+    position = (
+        (2 * s3 - 3 * s2 + 1) * p0
+        + (s3 - 2 * s2 + s) * h * v0
+        + (-2 * s3 + 3 * s2) * p1
+        + (s3 - s2) * h * v1
+    )
+    velocity = (
+        (6 * s2 - 6 * s) * p0
+        + (3 * s2 - 4 * s + 1) * h * v0
+        + (-6 * s2 + 6 * s) * p1
+        + (3 * s2 - 2 * s) * h * v1
+    ) / h
+    acceleration = (
+        (12 * s - 6) * p0
+        + (6 * s - 4) * h * v0
+        + (-12 * s + 6) * p1
+        + (6 * s - 2) * h * v1
+    ) / (h * h)
+    return position, velocity, acceleration